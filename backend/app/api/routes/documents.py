@@ -1,16 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Body, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from io import BytesIO
 from pathlib import Path
-import tempfile
 import os
 import logging
 import json
 import traceback
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
 import mimetypes # Added for file type detection
+import zipfile
+from pydantic import BaseModel
 
+from ...core.config import settings
+from ...core.idempotency import IdempotencyKeyConflictError, get_idempotency_store, request_fingerprint
 from ...services.document import get_document_service
-from ...services.document.base import DocumentService
+from ...services.document.batch import stream_batch_zip
+from ...services.document.bundle import BundleItem, generate_bundle
+from ...services.document.executor import RenderTimeoutError, get_render_executor
+from ...services.document.jobs import JOB_FAILED, JOB_SUCCEEDED, JobQueueFullError, get_job_queue
+from ...services.document.pdf import RendererUnavailableError
+from ...services.document.scheduler import PRIORITY_INTERACTIVE, use_priority
 from ...services.storage import get_storage_service
 from ...services.storage.base import StorageService
 
@@ -61,6 +70,8 @@ async def get_template_schema(
         return schema
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Template not found: {template_name}")
+    except RendererUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.exception(f"Failed to get template schema: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -84,6 +95,8 @@ async def get_template_info(
         return info
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Template not found: {template_name}")
+    except RendererUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.exception(f"Failed to get template info: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -94,18 +107,27 @@ async def generate_document(
     template_name: str = Query(..., description="Name of the template to use"),
     document_type: str = Query(..., description="Document type (docx, pptx, pdf)"),
     storage_path: Optional[str] = Query(None, description="Path where to store the document in storage (relative to root folder)"),
+    priority: str = Query(PRIORITY_INTERACTIVE, description="Priority class (interactive, batch)"),
     data: Dict[str, Any] = Body(..., description="Data to populate the template with"),
-    document_service: DocumentService = Depends(lambda: get_document_service(None)),
+    idempotency_key: Optional[str] = Header(None, description="Key that makes retries of this request safe"),
     storage_service: StorageService = Depends(get_storage_service)
 ):
     """
     Generate a document from a template and data.
     
+    Requests with an Idempotency-Key header are generated once: identical
+    requests with the same key, concurrent or later, get the same result,
+    marked with an Idempotent-Replayed header. Reusing a key for a
+    different request is rejected with 422.
+    
     Args:
         template_name: Name of the template to use
         document_type: Type of document (docx, pptx, pdf)
         storage_path: Path where to store the document in storage (relative to root folder)
+        priority: Priority class; bulk clients should pass "batch" so
+            interactive renders keep their latency
         data: Data to populate the template with
+        idempotency_key: Optional Idempotency-Key header
     """
     try:
         # Log the start of the operation
@@ -115,52 +137,63 @@ async def generate_document(
         document_service = get_document_service(document_type)
         logger.info(f"Document service obtained: {document_service.__class__.__name__}")
         
-        # Create a temporary directory for the output
-        with tempfile.TemporaryDirectory() as temp_dir:
-            logger.info(f"Created temporary directory: {temp_dir}")
+        try:
+            logger.info(f"Generating document with data: {data}")
             
-            # Generate output filename
-            temp_output_path = Path(temp_dir) / f"{template_name}_output.{document_type}"
-            logger.info(f"Temporary output path: {temp_output_path}")
+            async def generate():
+                with use_priority(priority):
+                    # Upload to storage if storage_path is provided
+                    if storage_path:
+                        logger.info(f"Storing document in storage: {storage_path}")
+                        file_url = await document_service.store_document(
+                            template_name, data, storage_service, storage_path
+                        )
+                        logger.info(f"Document stored: {file_url}")
+                        return {
+                            "message": "Document generated and stored successfully",
+                            "file_url": file_url,
+                            "storage_path": storage_path
+                        }
+                    
+                    # Generate the document in memory and stream it back without touching the disk
+                    content = await document_service.render_bytes(template_name, data)
+                    logger.info(f"Document generated: {template_name}.{document_type} ({len(content)} bytes)")
+                    return content
             
-            try:
-                # Generate the document
-                logger.info(f"Generating document with data: {data}")
-                output_file = await document_service.generate_document(
-                    template_name=template_name,
-                    data=data,
-                    output_path=str(temp_output_path)
+            # Identical requests with the same Idempotency-Key share one generation
+            replayed = False
+            if idempotency_key:
+                fingerprint = request_fingerprint(document_type, template_name, storage_path, data)
+                result, replayed = await get_idempotency_store().run(
+                    "generate", idempotency_key, fingerprint, generate
                 )
-                logger.info(f"Document generated: {output_file}")
-                
-                # Check if the file exists
-                if not output_file.exists():
-                    logger.error(f"Generated file does not exist: {output_file}")
-                    raise FileNotFoundError(f"Generated file not found: {output_file}")
-                
-                # Upload to storage if storage_path is provided
-                if storage_path:
-                    logger.info(f"Uploading document to storage: {storage_path}")
-                    file_url = await storage_service.upload_file(output_file, storage_path)
-                    logger.info(f"Document uploaded to storage: {file_url}")
-                    return {
-                        "message": "Document generated and stored successfully",
-                        "file_url": file_url,
-                        "storage_path": storage_path
-                    }
-                else:
-                    # Return the file
-                    logger.info(f"Returning file directly: {output_file}")
-                    return FileResponse(
-                        path=output_file,
-                        filename=output_file.name,
-                        media_type=f"application/{document_type}"
-                    )
-            except Exception as e:
-                logger.error(f"Error during document generation or storage: {str(e)}")
-                logger.error(traceback.format_exc())
-                raise e
+            else:
+                result = await generate()
+            headers = {"Idempotent-Replayed": "true"} if replayed else {}
+            
+            if isinstance(result, dict):
+                return JSONResponse(content=result, headers=headers)
+            
+            filename = f"{template_name}_output.{document_type}"
+            logger.info(f"Returning document directly: {filename}")
+            return Response(
+                content=result,
+                media_type=document_service.media_type,
+                headers={"Content-Disposition": f'attachment; filename="{filename}"', **headers}
+            )
+        except Exception as e:
+            logger.error(f"Error during document generation or storage: {str(e)}")
+            logger.error(traceback.format_exc())
+            raise e
     
+    except RenderTimeoutError as e:
+        logger.error(f"Document generation timed out: {e}")
+        raise HTTPException(status_code=504, detail=str(e))
+    except RendererUnavailableError as e:
+        logger.error(f"Document generation unavailable: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except IdempotencyKeyConflictError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except FileNotFoundError as e:
         logger.exception(f"File not found: {e}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -172,6 +205,278 @@ async def generate_document(
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@router.post("/jobs", status_code=202)
+async def create_document_job(
+    request: Request,
+    template_name: str = Query(..., description="Name of the template to use"),
+    document_type: str = Query(..., description="Document type (docx, pptx, pdf)"),
+    storage_path: Optional[str] = Query(None, description="Path where to store the document in storage (relative to root folder)"),
+    data: Dict[str, Any] = Body(..., description="Data to populate the template with")
+):
+    """
+    Queue a document for generation in the background.
+    
+    Returns a job ID right away; poll GET /documents/jobs/{job_id} for the
+    outcome. Use this instead of /generate for renders that may take longer
+    than a load balancer's request timeout.
+    
+    Args:
+        template_name: Name of the template to use
+        document_type: Type of document (docx, pptx, pdf)
+        storage_path: Path where to store the document in storage (relative to root folder);
+            without one the document is kept with the job for download
+        data: Data to populate the template with
+    """
+    try:
+        document_service = get_document_service(document_type)
+        # Fail fast on a missing template, rather than in the background
+        document_service.preload_template(template_name)
+        
+        job = await get_job_queue().submit(document_type, template_name, data, storage_path)
+        logger.info(f"Queued document job {job.id}: {template_name}.{document_type}")
+        return {
+            **job.to_dict(),
+            "status_url": str(request.url_for("get_document_job", job_id=job.id))
+        }
+    except JobQueueFullError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)}
+        )
+    except RendererUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception(f"Failed to queue document job: {e}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.get("/jobs/{job_id}")
+async def get_document_job(request: Request, job_id: str):
+    """
+    Get the status, stage timings and outcome of a document job.
+    
+    Finished jobs report the file URL of a stored document, or a
+    result_url to download a document kept with the job.
+    
+    Args:
+        job_id: ID returned when the job was queued
+    """
+    job = await get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    
+    result = job.to_dict()
+    if job.status == JOB_SUCCEEDED and not job.file_url:
+        result["result_url"] = str(request.url_for("get_document_job_result", job_id=job.id))
+    return result
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_document_job_result(job_id: str):
+    """
+    Download the document generated by a job without a storage path.
+    
+    Args:
+        job_id: ID returned when the job was queued
+    """
+    job_queue = get_job_queue()
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    if job.status == JOB_FAILED:
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+    if job.status != JOB_SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    if job.file_url:
+        raise HTTPException(status_code=404, detail=f"Document was stored at {job.file_url}")
+    
+    content = await job_queue.get_content(job_id)
+    filename = f"{job.template_name}_output.{job.document_type}"
+    return Response(
+        content=content,
+        media_type=get_document_service(job.document_type).media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+async def _read_batch_body(request: Request, max_bytes: int) -> bytes:
+    """
+    Read the body of a batch request, up to max_bytes.
+    
+    The body has to be fully consumed before a streaming response starts,
+    because Starlette listens for client disconnects on the same channel,
+    so batch records are buffered rather than rendered as they arrive.
+    """
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Batch body exceeds the limit of {max_bytes} bytes")
+    return bytes(body)
+
+
+def _parse_batch_records(body: bytes, ndjson: bool, max_records: int) -> List[Any]:
+    """
+    Parse the data records of a batch body, up to max_records.
+    
+    Args:
+        body: The request body
+        ndjson: Whether the body holds one JSON record per line rather than a JSON array
+        max_records: Maximum number of records in a batch
+        
+    Returns:
+        The data records
+    """
+    if ndjson:
+        records = [json.loads(line) for line in body.split(b"\n") if line.strip()]
+    else:
+        records = json.loads(body)
+        if not isinstance(records, list):
+            raise ValueError("Request body must be a JSON array of data records")
+    
+    if len(records) > max_records:
+        raise HTTPException(status_code=413, detail=f"Batch of {len(records)} records exceeds the limit of {max_records}")
+    return records
+
+
+async def _iter_records(records: List[Any]) -> AsyncIterator[Any]:
+    """Adapt a list of records to the async iterator stream_batch_zip expects."""
+    for record in records:
+        yield record
+
+
+@router.post("/generate-batch")
+async def generate_batch(
+    request: Request,
+    template_name: str = Query(..., description="Name of the template to use"),
+    document_type: str = Query(..., description="Document type (docx, pptx, pdf)")
+):
+    """
+    Generate one document per data record from a single template.
+    
+    The body is either a JSON array of data records or, with a
+    Content-Type of application/x-ndjson, one JSON record per line. The
+    body is read in full before rendering starts, and batches larger than
+    BATCH_MAX_BYTES or BATCH_MAX_RECORDS are rejected with 413. The
+    documents are streamed back as a ZIP archive as they finish rendering,
+    followed by a manifest.json listing the file or error for each record.
+    
+    Args:
+        template_name: Name of the template to use
+        document_type: Type of document (docx, pptx, pdf)
+    """
+    try:
+        document_service = get_document_service(document_type)
+        # Fail fast on a missing template, before the response has started
+        document_service.preload_template(template_name)
+        
+        content_type = request.headers.get("content-type", "")
+        body = await _read_batch_body(request, settings.BATCH_MAX_BYTES)
+        records = _parse_batch_records(
+            body, "ndjson" in content_type or "jsonl" in content_type, settings.BATCH_MAX_RECORDS
+        )
+        # Only the parsed records are kept while the batch renders
+        del body
+        
+        logger.info(f"Starting batch generation: {template_name}.{document_type}")
+        return StreamingResponse(
+            stream_batch_zip(
+                document_service,
+                template_name,
+                _iter_records(records),
+                concurrency=get_render_executor().max_workers
+            ),
+            media_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="{template_name}_batch.zip"'}
+        )
+    except HTTPException:
+        raise
+    except RendererUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception(f"Failed to start batch generation: {e}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+class BundleDocument(BaseModel):
+    document_type: str
+    template_name: str
+    storage_path: Optional[str] = None
+
+
+class BundleRequest(BaseModel):
+    documents: List[BundleDocument]
+    data: Dict[str, Any]
+    storage_folder: Optional[str] = None
+
+
+@router.post("/bundle")
+async def generate_document_bundle(
+    bundle: BundleRequest,
+    storage_service: StorageService = Depends(get_storage_service)
+):
+    """
+    Generate several documents, e.g. the PPTX, PDF and DOCX of a business
+    plan package, from one data payload.
+    
+    All documents render and upload in parallel. When storage paths are
+    given (per document, or for all of them via storage_folder) the response
+    is a JSON manifest with the URL of each document; otherwise the
+    documents are returned in a ZIP archive together with manifest.json.
+    Either every document or none has a storage path; bundles mixing both
+    are rejected with 422.
+    """
+    items = []
+    for document in bundle.documents:
+        storage_path = document.storage_path
+        if not storage_path and bundle.storage_folder:
+            folder = bundle.storage_folder.rstrip("/")
+            storage_path = f"{folder}/{document.template_name}.{document.document_type}"
+        items.append(BundleItem(document.document_type, document.template_name, storage_path))
+    
+    unstored = [f"{item.template_name}.{item.document_type}" for item in items if not item.storage_path]
+    if unstored and len(unstored) < len(items):
+        raise HTTPException(
+            status_code=422,
+            detail=f"Documents without a storage path in a bundle with stored documents: {', '.join(unstored)}"
+        )
+    
+    try:
+        logger.info(f"Starting bundle generation: {[f'{i.template_name}.{i.document_type}' for i in items]}")
+        results = await generate_bundle(items, bundle.data, storage_service)
+        manifest = [result.to_manifest_entry() for result in results]
+        
+        if not unstored:
+            return {"documents": manifest}
+        
+        archive = BytesIO()
+        with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for result in results:
+                if result.content is not None:
+                    zf.writestr(result.filename, result.content)
+            zf.writestr("manifest.json", json.dumps(manifest, indent=2))
+        
+        return Response(
+            content=archive.getvalue(),
+            media_type="application/zip",
+            headers={"Content-Disposition": 'attachment; filename="bundle.zip"'}
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception(f"Failed to generate bundle: {e}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
 # --- Helper Function to map extensions to frontend types ---
 def get_frontend_file_type(extension: str) -> Optional[str]:
     ext = extension.lower()
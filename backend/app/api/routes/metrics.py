@@ -0,0 +1,83 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+import logging
+from typing import Optional
+
+from ...core.admission import admission_stats
+from ...core.metrics import registry
+from ...services.document.executor import render_executor_stats
+from ...services.document.jobs import job_queue_stats
+from ...services.document.output_cache import get_output_cache
+from ...services.document.scheduler import render_scheduler_stats
+from ...services.document.template_cache import get_template_cache
+
+router = APIRouter(tags=["metrics"])
+logger = logging.getLogger(__name__)
+
+CACHE_HITS = registry.counter("cache_hits_total", "Cache hits", ("cache",))
+CACHE_MISSES = registry.counter("cache_misses_total", "Cache misses", ("cache",))
+CACHE_HIT_RATIO = registry.gauge("cache_hit_ratio", "Share of cache lookups that were hits", ("cache",))
+CACHE_BYTES = registry.gauge("cache_bytes", "Bytes held in the cache", ("cache",))
+CACHE_ENTRIES = registry.gauge("cache_entries", "Entries held in the cache", ("cache",))
+EXECUTOR_WORKERS = registry.gauge("render_executor_workers", "Render executor worker count")
+EXECUTOR_PENDING = registry.gauge("render_executor_pending_jobs", "Render jobs submitted and not finished")
+EXECUTOR_QUEUE_DEPTH = registry.gauge("render_executor_queue_depth", "Render jobs waiting for a free worker")
+JOBS_QUEUED = registry.gauge("document_jobs_queued", "Background document jobs waiting for a worker")
+JOBS_RUNNING = registry.gauge("document_jobs_running", "Background document jobs being generated")
+ADMISSION_IN_FLIGHT = registry.gauge("admission_in_flight", "Admitted requests that have not finished", ("endpoint",))
+ADMISSION_QUEUED = registry.gauge("admission_queued", "Requests waiting to be admitted", ("endpoint",))
+ADMISSION_BYTES = registry.gauge("admission_bytes_in_flight", "Bytes reserved by admitted requests", ("endpoint",))
+SCHEDULER_WAITING = registry.gauge("render_scheduler_waiting", "Renders waiting for a render slot", ("priority",))
+SCHEDULER_RUNNING = registry.gauge("render_scheduler_running", "Renders holding a render slot", ("document_type",))
+
+
+def _set_cache_metrics(cache: str, hits: int, misses: int, entries: int, size: Optional[int] = None):
+    CACHE_HITS.set_total(hits, cache=cache)
+    CACHE_MISSES.set_total(misses, cache=cache)
+    CACHE_HIT_RATIO.set(hits / (hits + misses) if hits + misses else 0.0, cache=cache)
+    CACHE_ENTRIES.set(entries, cache=cache)
+    if size is not None:
+        CACHE_BYTES.set(size, cache=cache)
+
+
+def collect_runtime_metrics():
+    """Copy cache statistics, admission, render executor, scheduler and job queue load into gauges."""
+    stats = get_template_cache().stats()
+    _set_cache_metrics("template", stats["hits"], stats["misses"], stats["entries"], stats["bytes"])
+
+    stats = get_output_cache().stats()
+    _set_cache_metrics("output", stats["hits"], stats["misses"], stats["entries"], stats["bytes"])
+    _set_cache_metrics("output_url", stats["url_hits"], stats["url_misses"], stats["urls"])
+
+    for name, stats in admission_stats().items():
+        ADMISSION_IN_FLIGHT.set(stats["in_flight"], endpoint=name)
+        ADMISSION_QUEUED.set(stats["queued"], endpoint=name)
+        ADMISSION_BYTES.set(stats["bytes_in_flight"], endpoint=name)
+
+    # The executor, scheduler and job queue aren't started just to report on them
+    stats = render_executor_stats()
+    if stats is not None:
+        EXECUTOR_WORKERS.set(stats["workers"])
+        EXECUTOR_PENDING.set(stats["pending"])
+        EXECUTOR_QUEUE_DEPTH.set(stats["queue_depth"])
+
+    stats = render_scheduler_stats()
+    if stats is not None:
+        for priority, count in stats["waiting"].items():
+            SCHEDULER_WAITING.set(count, priority=priority)
+        for document_type, count in stats["running_by_type"].items():
+            SCHEDULER_RUNNING.set(count, document_type=document_type)
+
+    stats = job_queue_stats()
+    if stats is not None:
+        JOBS_QUEUED.set(stats["queued"])
+        JOBS_RUNNING.set(stats["running"])
+
+
+registry.add_collector(collect_runtime_metrics)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Expose metrics in the Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
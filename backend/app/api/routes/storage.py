@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi import APIRouter, Depends, Header, HTTPException, UploadFile, File
 from fastapi.responses import JSONResponse
-from pathlib import Path
-import tempfile
-import os
+import asyncio
+import hashlib
+import mimetypes
 import logging
-from typing import List
+from typing import BinaryIO, List, Optional
 
+from ...core.idempotency import IdempotencyKeyConflictError, get_idempotency_store, request_fingerprint
+from ...core.timing import stage
+from ...services.document.output_cache import get_output_cache, storage_key
 from ...services.storage import get_storage_service
 from ...services.storage.base import StorageService
 
@@ -25,43 +28,59 @@ async def storage_status():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _file_digest(file: BinaryIO) -> str:
+    """Hash the content of a file in chunks, leaving it positioned at the start."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(1024 * 1024), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
 @router.post("/upload")
 async def upload_file(
     file: UploadFile = File(...),
     destination_path: str = None,
-    background_tasks: BackgroundTasks = None,
+    idempotency_key: Optional[str] = Header(None, description="Key that makes retries of this request safe"),
     storage_service: StorageService = Depends(get_storage_service)
 ):
     """
     Upload a file to storage.
     
+    The upload is streamed to storage from the spooled request file rather
+    than read into memory first. Uploads with an Idempotency-Key header are
+    performed once: identical uploads with the same key, concurrent or
+    later, get the same result instead of creating a renamed copy.
+    
     Args:
         file: The file to upload
         destination_path: Path where to store the file (relative to root folder)
+        idempotency_key: Optional Idempotency-Key header
     """
     try:
         # Use the filename as destination path if not provided
         if not destination_path:
             destination_path = file.filename
         
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            # Write the uploaded file to the temporary file
-            content = await file.read()
-            temp_file.write(content)
-            temp_path = temp_file.name
+        content_type = file.content_type or mimetypes.guess_type(destination_path)[0] or "application/octet-stream"
         
-        # Upload the file
-        file_url = await storage_service.upload_file(Path(temp_path), destination_path)
+        async def upload():
+            # Upload the file
+            with stage("upload"):
+                file_url = await storage_service.upload_stream(file.file, destination_path, content_type)
+            # The path no longer holds a generated document the output cache knows about
+            get_output_cache().forget_url(storage_key(storage_service, destination_path))
+            return {"filename": file.filename, "destination": destination_path, "url": file_url}
         
-        # Schedule temp file deletion
-        if background_tasks:
-            background_tasks.add_task(os.unlink, temp_path)
-        else:
-            os.unlink(temp_path)
+        if not idempotency_key:
+            return await upload()
         
-        return {"filename": file.filename, "destination": destination_path, "url": file_url}
+        fingerprint = request_fingerprint(destination_path, await asyncio.to_thread(_file_digest, file.file))
+        result, replayed = await get_idempotency_store().run("upload", idempotency_key, fingerprint, upload)
+        return JSONResponse(content=result, headers={"Idempotent-Replayed": "true"} if replayed else {})
     
+    except IdempotencyKeyConflictError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         logger.exception(f"Failed to upload file: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -118,6 +137,7 @@ async def delete_file(
     """
     try:
         success = await storage_service.delete_file(file_path)
+        get_output_cache().forget_url(storage_key(storage_service, file_path))
         if success:
             return {"status": "ok", "file": file_path}
         else:
@@ -0,0 +1,290 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+from .metrics import ADMISSION_REJECTIONS
+from .timing import stage
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request is turned away because the service is saturated."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[int] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class Admission:
+    """A request's place among the in-flight requests, see AdmissionController.admit."""
+
+    def __init__(self, controller: "AdmissionController", size: int):
+        self.controller = controller
+        self.size = size
+        self.received = 0
+
+    def receive(self, count: int):
+        """
+        Count request body bytes as they arrive.
+
+        Bytes beyond the size the request was admitted with are added to the
+        byte budget as they come, so a request without a Content-Length
+        header is counted all the same.
+
+        Args:
+            count: Number of bytes received
+
+        Raises:
+            AdmissionRejectedError: If the body passes the limit of the byte budget
+        """
+        self.received += count
+        if self.received <= self.size:
+            return
+
+        controller = self.controller
+        if controller.max_bytes and self.received > controller.max_bytes:
+            controller._reject(
+                413, "too_large", f"Request body exceeds the limit of {controller.max_bytes} bytes"
+            )
+        controller._bytes += self.received - self.size
+        self.size = self.received
+
+
+class AdmissionController:
+    """
+    Bounds the requests of one kind that are worked on at the same time.
+
+    A request is admitted while fewer than max_in_flight requests are in
+    flight and its bytes fit in the byte budget together with theirs.
+    Otherwise it waits, up to queue_timeout seconds, in a queue of at most
+    max_queued requests. A request that finds the queue full is rejected
+    with 429 and one that times out in the queue with 503, both with a
+    Retry-After header; a request that could never fit in the byte budget
+    is rejected with 413. Set max_bytes to 0 to only bound the request count.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_in_flight: int,
+        max_queued: int = 0,
+        max_bytes: int = 0,
+        queue_timeout: float = 10.0,
+        retry_after: int = 5
+    ):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.max_bytes = max_bytes
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+
+        self._in_flight = 0
+        self._bytes = 0
+        self._queued = 0
+        self._condition = asyncio.Condition()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of admitted requests that have not finished."""
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        """Number of requests waiting to be admitted."""
+        return self._queued
+
+    @property
+    def bytes_in_flight(self) -> int:
+        """Bytes reserved by admitted requests."""
+        return self._bytes
+
+    def stats(self) -> Dict[str, int]:
+        """Get admission statistics."""
+        return {"in_flight": self.in_flight, "queued": self.queued, "bytes_in_flight": self.bytes_in_flight}
+
+    def _fits(self, size: int) -> bool:
+        if self._in_flight >= self.max_in_flight:
+            return False
+        return not self.max_bytes or self._bytes + size <= self.max_bytes
+
+    def _reject(self, status_code: int, reason: str, detail: str):
+        ADMISSION_REJECTIONS.inc(endpoint=self.name, reason=reason)
+        logger.warning(f"Rejected {self.name} request ({reason}): {detail}")
+        raise AdmissionRejectedError(status_code, detail, self.retry_after if status_code != 413 else None)
+
+    @asynccontextmanager
+    async def admit(self, size: int = 0) -> AsyncIterator[Admission]:
+        """
+        Hold a place among the in-flight requests for the duration of the block.
+
+        Args:
+            size: Bytes the request is expected to hold in memory
+
+        Yields:
+            The admission, to count the request body with as it arrives
+
+        Raises:
+            AdmissionRejectedError: If the request can't be admitted
+        """
+        if self.max_bytes and size > self.max_bytes:
+            self._reject(413, "too_large", f"Request of {size} bytes exceeds the limit of {self.max_bytes} bytes")
+
+        async with self._condition:
+            if not self._fits(size):
+                if self._queued >= self.max_queued:
+                    self._reject(429, "queue_full", f"Too many {self.name} requests in progress, try again later")
+
+                self._queued += 1
+                try:
+                    with stage("admission"):
+                        await asyncio.wait_for(self._condition.wait_for(lambda: self._fits(size)), self.queue_timeout)
+                except asyncio.TimeoutError:
+                    self._reject(503, "timeout", f"Service is busy with {self.name} requests, try again later")
+                finally:
+                    self._queued -= 1
+
+            self._in_flight += 1
+            self._bytes += size
+
+        admission = Admission(self, size)
+        try:
+            yield admission
+        finally:
+            async with self._condition:
+                self._in_flight -= 1
+                self._bytes -= admission.size
+                self._condition.notify_all()
+
+
+class AdmissionMiddleware:
+    """
+    Applies admission control to POST requests for selected paths.
+
+    Requests are admitted before their body is read, so a saturated service
+    turns work away without buffering it first. A request holds its place
+    until its response has been sent, including streamed responses. The
+    Content-Length header is used as the request's size in the byte
+    budget, and the body is counted as it is received, so a request
+    without the header, or with more body than it declared, is rejected
+    with 413 as soon as it passes the limit.
+    """
+
+    def __init__(self, app: ASGIApp, controllers: Dict[str, AdmissionController]):
+        self.app = app
+        self.controllers = controllers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        controller = None
+        if scope["type"] == "http" and scope["method"] == "POST":
+            controller = self.controllers.get(scope["path"].rstrip("/"))
+        if controller is None:
+            await self.app(scope, receive, send)
+            return
+
+        size = 0
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    size = int(value)
+                except ValueError:
+                    pass
+                break
+
+        rejected = False
+        response_started = False
+        cut_off = False
+
+        async def reject(e: AdmissionRejectedError):
+            nonlocal rejected
+            rejected = True
+            headers = {"Retry-After": str(e.retry_after)} if e.retry_after is not None else None
+            response = JSONResponse({"detail": e.detail}, status_code=e.status_code, headers=headers)
+            await response(scope, receive, send)
+
+        try:
+            async with controller.admit(size) as admission:
+                async def receive_counted() -> Message:
+                    nonlocal cut_off
+                    if cut_off:
+                        return {"type": "http.disconnect"}
+                    message = await receive()
+                    if message["type"] == "http.request":
+                        try:
+                            admission.receive(len(message.get("body", b"")))
+                        except AdmissionRejectedError as e:
+                            cut_off = True
+                            if not response_started:
+                                await reject(e)
+                            # Stop the app reading the body, as if the client had gone away
+                            return {"type": "http.disconnect"}
+                    return message
+
+                async def send_tracked(message: Message):
+                    nonlocal response_started
+                    if rejected:
+                        # The request was already answered
+                        return
+                    if message["type"] == "http.response.start":
+                        response_started = True
+                    await send(message)
+
+                try:
+                    await self.app(scope, receive_counted, send_tracked)
+                except Exception:
+                    # The app failing to read the cut-off body is expected
+                    if not cut_off:
+                        raise
+        except AdmissionRejectedError as e:
+            await reject(e)
+
+
+_admission_controllers: Dict[str, AdmissionController] = {}
+
+
+def get_admission_controller(name: str) -> AdmissionController:
+    """
+    Get the admission controller for a kind of request ("generate" or "upload").
+    Implements a singleton pattern per kind.
+    """
+    controller = _admission_controllers.get(name)
+    if controller is None:
+        if name == "generate":
+            controller = AdmissionController(
+                name,
+                max_in_flight=settings.ADMISSION_GENERATE_MAX_IN_FLIGHT,
+                max_queued=settings.ADMISSION_GENERATE_MAX_QUEUED,
+                max_bytes=settings.ADMISSION_GENERATE_MAX_BYTES,
+                queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+                retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS
+            )
+        elif name == "upload":
+            controller = AdmissionController(
+                name,
+                max_in_flight=settings.ADMISSION_UPLOAD_MAX_IN_FLIGHT,
+                max_queued=settings.ADMISSION_UPLOAD_MAX_QUEUED,
+                max_bytes=settings.ADMISSION_UPLOAD_MAX_BYTES,
+                queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+                retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS
+            )
+        else:
+            raise ValueError(f"Unknown admission controller: {name}")
+        _admission_controllers[name] = controller
+
+    return controller
+
+
+def admission_stats() -> Dict[str, Dict[str, int]]:
+    """Get the statistics of the admission controllers started so far, by kind of request."""
+    return {name: controller.stats() for name, controller in _admission_controllers.items()}
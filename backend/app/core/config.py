@@ -52,6 +52,73 @@ class Settings(BaseSettings):
     PPTX_TEMPLATES_PATH: str = "./data/templates/pptx"
     PDF_TEMPLATES_PATH: str = "./data/templates/pdf"
     
+    # Template cache settings
+    TEMPLATE_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    
+    # Output cache settings (set OUTPUT_CACHE_MAX_BYTES to 0 to disable)
+    OUTPUT_CACHE_MAX_BYTES: int = 128 * 1024 * 1024
+    OUTPUT_CACHE_MAX_URLS: int = 10000
+    
+    # Render DOCX/PPTX documents by rewriting only the XML parts that contain
+    # placeholders, instead of loading and saving the whole package through
+    # python-docx/python-pptx
+    OOXML_FAST_PATH_ENABLED: bool = True
+    
+    # Render .html PDF templates with WeasyPrint; they then take precedence over
+    # a .json template of the same name
+    PDF_HTML_TEMPLATES_ENABLED: bool = False
+    
+    # Compiled HTML templates for PDF documents (set to an empty string to disable)
+    PDF_HTML_BYTECODE_CACHE_PATH: str = "./data/cache/pdf_html"
+    
+    # Template watcher settings
+    TEMPLATE_WATCHER_ENABLED: bool = True
+    TEMPLATE_WATCHER_POLL_SECONDS: float = 2.0
+    
+    # Render executor settings
+    RENDER_EXECUTOR: str = "thread"  # Options: thread, process
+    RENDER_MAX_WORKERS: int = 4
+    RENDER_TIMEOUT_SECONDS: float = 120.0
+    
+    # Render scheduler settings: concurrency caps per document type and per
+    # template, e.g. RENDER_TYPE_LIMITS='{"pptx": 2}', and workers only
+    # interactive renders may use
+    RENDER_TYPE_LIMITS: Dict[str, int] = {}
+    RENDER_TEMPLATE_LIMITS: Dict[str, int] = {}
+    RENDER_INTERACTIVE_RESERVED_WORKERS: int = 1
+    
+    # Admission control for generation and upload requests: requests beyond
+    # the in-flight limit or byte budget wait in a bounded queue, and are
+    # rejected with 429/503 and Retry-After when it is full or they time out
+    # (set a byte budget to 0 to disable it)
+    ADMISSION_GENERATE_MAX_IN_FLIGHT: int = 32
+    ADMISSION_GENERATE_MAX_QUEUED: int = 64
+    ADMISSION_GENERATE_MAX_BYTES: int = 64 * 1024 * 1024
+    ADMISSION_UPLOAD_MAX_IN_FLIGHT: int = 8
+    ADMISSION_UPLOAD_MAX_QUEUED: int = 16
+    ADMISSION_UPLOAD_MAX_BYTES: int = 512 * 1024 * 1024
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 10.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 5
+    
+    # Batch generation: the records of a batch are buffered before the ZIP
+    # response starts, so their count and size are bounded
+    BATCH_MAX_RECORDS: int = 1000
+    BATCH_MAX_BYTES: int = 16 * 1024 * 1024
+    
+    # Idempotency-Key support: how long results are replayed, and how many
+    # keys and bytes of generated documents are kept for it
+    IDEMPOTENCY_TTL_SECONDS: float = 24 * 60 * 60
+    IDEMPOTENCY_MAX_KEYS: int = 10000
+    IDEMPOTENCY_MAX_BYTES: int = 64 * 1024 * 1024
+    
+    # Background job settings (set JOB_STORE_PATH to ":memory:" to keep jobs in memory only)
+    JOB_STORE_PATH: str = "./data/jobs.sqlite3"
+    JOB_WORKERS: int = 2
+    JOB_QUEUE_MAX_SIZE: int = 100
+    JOB_RETENTION_SECONDS: float = 24 * 60 * 60
+    # How long a running job stays claimed without its process renewing the claim
+    JOB_LEASE_SECONDS: float = 60
+    
     # OpenAI Configuration
     OPENAI_API_KEY: Optional[str] = None
     
@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .config import settings
+from .metrics import IDEMPOTENT_REPLAYS
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyKeyConflictError(ValueError):
+    """Raised when an idempotency key is reused for a different request."""
+
+
+def request_fingerprint(*parts: Any) -> str:
+    """Hash the parts of a request that make two requests identical."""
+    encoded = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _result_size(result: Any) -> int:
+    """Approximate bytes held by a stored result; only document content counts."""
+    if isinstance(result, (bytes, bytearray)):
+        return len(result)
+    if isinstance(result, tuple):
+        return sum(_result_size(part) for part in result)
+    return 0
+
+
+@dataclass
+class _Operation:
+    fingerprint: str
+    task: asyncio.Future
+    expires_at: Optional[float] = None
+    size: int = 0
+
+
+class IdempotencyStore:
+    """
+    Runs each idempotent operation once per key and shares its result.
+
+    The first request with a key starts the operation; identical requests
+    that arrive while it runs wait for the same result instead of doing the
+    work again, and later ones get the stored result until it expires.
+    The operation runs in its own task, so it finishes even if the request
+    that started it goes away. Failed operations are not stored, so a
+    retry with the same key runs again. Reusing a key for a different
+    request raises IdempotencyKeyConflictError.
+
+    Results are kept in memory, oldest evicted first once there are more
+    than max_keys or they hold more than max_bytes of document content.
+    """
+
+    def __init__(self, ttl: float = 86400.0, max_keys: int = 10000, max_bytes: int = 64 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.max_bytes = max_bytes
+        self._operations: "OrderedDict[str, _Operation]" = OrderedDict()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Report the keys and bytes held by the store."""
+        return {"keys": len(self._operations), "bytes": self._bytes}
+
+    def _forget(self, key: str):
+        operation = self._operations.pop(key, None)
+        if operation is not None:
+            self._bytes -= operation.size
+
+    def _evict(self):
+        now = time.monotonic()
+        for key in [key for key, operation in self._operations.items()
+                    if operation.expires_at is not None and operation.expires_at <= now]:
+            self._forget(key)
+
+        # Operations still running are never evicted, or they could run twice
+        for key in list(self._operations):
+            if len(self._operations) <= self.max_keys and self._bytes <= self.max_bytes:
+                break
+            if self._operations[key].expires_at is not None:
+                self._forget(key)
+
+    def _finished(self, key: str, operation: _Operation, task: asyncio.Future):
+        if self._operations.get(key) is not operation:
+            return
+        if task.cancelled() or task.exception() is not None:
+            self._forget(key)
+            return
+
+        operation.expires_at = time.monotonic() + self.ttl
+        operation.size = _result_size(task.result())
+        self._bytes += operation.size
+        self._evict()
+
+    async def run(
+        self,
+        endpoint: str,
+        key: str,
+        fingerprint: str,
+        operation: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Run an operation once for an idempotency key.
+
+        Args:
+            endpoint: Name of the endpoint, so keys of different endpoints don't collide
+            key: The client's idempotency key
+            fingerprint: Hash of the request, see request_fingerprint
+            operation: Coroutine function performing the request
+
+        Returns:
+            The operation's result, and whether it was shared with or
+            replayed from another request
+
+        Raises:
+            IdempotencyKeyConflictError: If the key was used for a different request
+        """
+        store_key = f"{endpoint}:{key}"
+        self._evict()
+
+        existing = self._operations.get(store_key)
+        if existing is not None:
+            if existing.fingerprint != fingerprint:
+                raise IdempotencyKeyConflictError(
+                    f"Idempotency-Key {key} was already used for a different request"
+                )
+            self._operations.move_to_end(store_key)
+            IDEMPOTENT_REPLAYS.inc(endpoint=endpoint, kind="cached" if existing.task.done() else "coalesced")
+            logger.info(f"Sharing the result of {endpoint} request with Idempotency-Key {key}")
+            return await asyncio.shield(existing.task), True
+
+        task = asyncio.ensure_future(operation())
+        entry = _Operation(fingerprint, task)
+        self._operations[store_key] = entry
+        task.add_done_callback(lambda done: self._finished(store_key, entry, done))
+        return await asyncio.shield(task), False
+
+
+_idempotency_store: Optional[IdempotencyStore] = None
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """
+    Get the idempotency store.
+    Implements a singleton pattern.
+    """
+    global _idempotency_store
+
+    if _idempotency_store is None:
+        _idempotency_store = IdempotencyStore(
+            ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+            max_keys=settings.IDEMPOTENCY_MAX_KEYS,
+            max_bytes=settings.IDEMPOTENCY_MAX_BYTES
+        )
+
+    return _idempotency_store
@@ -0,0 +1,166 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+_current_timer: ContextVar[Optional["StageTimer"]] = ContextVar("stage_timer", default=None)
+
+
+class StageTimer:
+    """
+    Accumulates the time spent in named stages of one request.
+
+    Durations of stages with the same name are added up, so a stage that
+    runs several times (e.g. one Graph call per uploaded chunk) is reported
+    once. Stages can be recorded from render threads, so recording is
+    thread-safe. Stages that run concurrently can add up to more than the
+    request's total time.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._durations: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, duration_ms: float):
+        """Add time to a stage."""
+        with self._lock:
+            self._durations[name] = self._durations.get(name, 0.0) + duration_ms
+
+    def merge(self, durations: Dict[str, float]):
+        """Add the stages recorded by another timer, e.g. in a worker process."""
+        for name, duration_ms in durations.items():
+            self.add(name, duration_ms)
+
+    @property
+    def durations(self) -> Dict[str, float]:
+        """Milliseconds spent in each stage, in the order stages first ran."""
+        with self._lock:
+            return dict(self._durations)
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def header_value(self) -> str:
+        """Format the stages and the total so far as a Server-Timing header value."""
+        metrics = [f"{name};dur={duration_ms:.1f}" for name, duration_ms in self.durations.items()]
+        metrics.append(f"total;dur={self.elapsed_ms:.1f}")
+        return ", ".join(metrics)
+
+
+def current_timer() -> Optional[StageTimer]:
+    """Get the stage timer of the current request, if any."""
+    return _current_timer.get()
+
+
+@contextmanager
+def use_timer(timer: StageTimer) -> Iterator[StageTimer]:
+    """Record stages in the current context into a timer."""
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a block of code as a named stage of the current request.
+
+    Does nothing outside a request, so library code can be instrumented
+    unconditionally.
+
+    Args:
+        name: Stage name; must be a valid Server-Timing metric name
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, (time.perf_counter() - started) * 1000)
+
+
+class LapTimer:
+    """
+    Times consecutive stages by marking where each one ends.
+
+    Useful for instrumenting a long function without re-indenting it into
+    nested stage blocks.
+    """
+
+    def __init__(self):
+        self._timer = _current_timer.get()
+        self._last = time.perf_counter()
+
+    def lap(self, name: str):
+        """Record the time since the previous lap as a stage."""
+        now = time.perf_counter()
+        if self._timer is not None:
+            self._timer.add(name, (now - self._last) * 1000)
+        self._last = now
+
+
+def record_stages(durations: Dict[str, float]):
+    """Add stages timed elsewhere, e.g. in a worker process, to the current request."""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.merge(durations)
+
+
+class ServerTimingMiddleware:
+    """
+    Times each HTTP request and reports its stages.
+
+    Requests that recorded any stages before their response started get
+    them in a Server-Timing header, which browser devtools show in the
+    request's timing tab. Requests that recorded any stages are also
+    logged, with the durations as structured fields. This is a plain ASGI middleware, so streaming responses and the
+    request context are left untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timer = StageTimer()
+        status_code = None
+
+        async def send_with_timing(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if timer.durations:
+                    MutableHeaders(scope=message).append("Server-Timing", timer.header_value())
+            await send(message)
+
+        with use_timer(timer):
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                durations = timer.durations
+                if durations:
+                    fields = {f"{name}_ms": round(duration_ms, 1) for name, duration_ms in durations.items()}
+                    fields["total_ms"] = round(timer.elapsed_ms, 1)
+                    summary = " ".join(f"{name}={value}" for name, value in fields.items())
+                    logger.info(
+                        f"{scope['method']} {scope['path']} {status_code} timings: {summary}",
+                        extra={"method": scope["method"], "path": scope["path"], "status_code": status_code, "timings": fields}
+                    )
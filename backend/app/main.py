@@ -6,6 +6,11 @@ from dotenv import load_dotenv
 import logging
 from pathlib import Path
 
+from .core.admission import AdmissionMiddleware, get_admission_controller
+from .core.config import settings
+from .core.metrics import MetricsMiddleware
+from .core.timing import ServerTimingMiddleware
+
 # Load environment variables
 load_dotenv()
 
@@ -40,6 +45,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Bound in-flight generation and upload work, turning requests away with
+# 429/503 and Retry-After when the service is saturated
+generate_admission = get_admission_controller("generate")
+app.add_middleware(AdmissionMiddleware, controllers={
+    f"{settings.API_V1_STR}/documents/generate": generate_admission,
+    f"{settings.API_V1_STR}/documents/generate-batch": generate_admission,
+    f"{settings.API_V1_STR}/documents/bundle": generate_admission,
+    f"{settings.API_V1_STR}/storage/upload": get_admission_controller("upload"),
+})
+
+# Report per-stage timings as Server-Timing headers and log fields
+app.add_middleware(ServerTimingMiddleware)
+
+# Record request counts and latencies for /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -55,13 +76,23 @@ async def root():
     }
 
 # Import and include routes
-from .api.routes import storage, documents
+from .api.routes import storage, documents, metrics
+from .services.document.executor import get_render_executor, shutdown_render_executor
+from .services.document.jobs import get_job_queue, stop_job_queue
+from .services.document.watcher import start_template_watcher, stop_template_watcher
 app.include_router(storage.router, prefix="/api/v1")
 app.include_router(documents.router, prefix="/api/v1")
+app.include_router(metrics.router)
 
 @app.on_event("startup")
 async def startup_event():
     logger.info("Starting Nexus Business Builder API...")
+    # Start the render pool up front so the first request doesn't pay for it
+    get_render_executor()
+    # Load templates in the background and reload them whenever they change
+    start_template_watcher()
+    # Resume background jobs left unfinished by the previous process
+    get_job_queue().start()
     # Future startup tasks:
     # - Connect to database
     # - Initialize services
@@ -70,6 +101,9 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down Nexus Business Builder API...")
+    stop_template_watcher()
+    await stop_job_queue()
+    shutdown_render_executor()
     # Future shutdown tasks:
     # - Close database connections
     # - Clean up resources
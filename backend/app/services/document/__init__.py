@@ -1,34 +1,45 @@
-from typing import Optional
+import threading
+from typing import Dict, Type
 from ...core.config import settings
 from .base import DocumentService
 from .docx import DocxDocumentService
 from .pptx import PptxDocumentService
 from .pdf import PdfDocumentService
 
-_document_service: Optional[DocumentService] = None
+_SERVICE_CLASSES: Dict[str, Type[DocumentService]] = {
+    "docx": DocxDocumentService,
+    "pptx": PptxDocumentService,
+    "pdf": PdfDocumentService,
+}
+
+_document_services: Dict[str, DocumentService] = {}
+_document_services_lock = threading.Lock()
 
 
 def get_document_service(document_type: str = None) -> DocumentService:
     """
     Factory function to get the appropriate document service based on document type.
-    
+
+    Services are created once per document type and shared by all requests,
+    so the templates they have loaded stay warm. They hold no per-request
+    state and are safe to use concurrently.
+
     Args:
         document_type: The type of document to generate (docx, pptx, pdf)
-        
+
     Returns:
-        An instance of the appropriate DocumentService
+        The shared instance of the appropriate DocumentService
     """
-    global _document_service
-    
-    # If no specific type is requested, return the cached service
-    if document_type is None and _document_service is not None:
-        return _document_service
-    
-    if document_type == "docx":
-        return DocxDocumentService()
-    elif document_type == "pptx":
-        return PptxDocumentService()
-    elif document_type == "pdf":
-        return PdfDocumentService()
-    else:
-        raise ValueError(f"Unknown document type: {document_type}") 
\ No newline at end of file
+    service_class = _SERVICE_CLASSES.get(document_type)
+    if service_class is None:
+        raise ValueError(f"Unknown document type: {document_type}")
+
+    document_service = _document_services.get(document_type)
+    if document_service is None:
+        with _document_services_lock:
+            document_service = _document_services.get(document_type)
+            if document_service is None:
+                document_service = service_class()
+                _document_services[document_type] = document_service
+
+    return document_service
@@ -1,42 +1,338 @@
+import asyncio
+import copy
+import json
+import logging
+import time
 from abc import ABC, abstractmethod
+from io import BytesIO
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import BinaryIO, Dict, Any, List, Optional, Union
+
+from ...core.metrics import GENERATION_DURATION, GENERATION_ERRORS
+from ...core.timing import stage
+from .catalog import TemplateCatalog, get_template_catalog
+from .output_cache import OutputCache, get_output_cache, storage_key
+from .placeholders import PlaceholderIndex
+from .row_templates import parse_row_key
+
+logger = logging.getLogger(__name__)
+
+
+def _default_schema() -> Dict[str, Any]:
+    """The schema of a template without a schema file or placeholders."""
+    return {
+        "type": "object",
+        "properties": {},
+        "required": []
+    }
+
+
+def _parse_schema_file(content: bytes) -> Dict[str, Any]:
+    """Build a template schema from the content of a schema file."""
+    schema = _default_schema()
+    try:
+        schema.update(json.loads(content))
+    except Exception as e:
+        logger.error(f"Error reading template schema file: {e}")
+    return schema
+
+
+def _placeholder_schema(index: PlaceholderIndex) -> Dict[str, Any]:
+    """
+    Build a template schema from a placeholder index.
+    
+    Every placeholder becomes a required string, and every list repeated by
+    a template row an array of objects with the fields the row uses.
+    """
+    schema = _default_schema()
+    for placeholder in sorted(index.placeholders):
+        schema["properties"][placeholder] = {"type": "string"}
+        schema["required"].append(placeholder)
+    
+    for row_template in index.row_templates:
+        items = schema["properties"].setdefault(row_template.list_name, {
+            "type": "array",
+            "items": {"type": "object", "properties": {}}
+        })["items"]
+        for key in sorted(row_template.keys):
+            _, field, number_format = parse_row_key(key)
+            items["properties"][field] = {"type": "number"} if number_format else {"type": "string"}
+    
+    schema["required"].extend(sorted(
+        {row_template.list_name for row_template in index.row_templates} - set(schema["required"])
+    ))
+    return schema
 
 
 class DocumentService(ABC):
     """Base abstract class for document generation services."""
     
+    document_type: str = ""
+    media_type: str = "application/octet-stream"
+    
     @abstractmethod
+    def _get_template_path(self, template_name: str) -> Path:
+        """Get the full path to a template, raising FileNotFoundError if it doesn't exist."""
+        pass
+    
+    def preload_template(self, template_name: str) -> None:
+        """
+        Load a template into the template cache ahead of rendering.
+        
+        Args:
+            template_name: Name of the template to load
+        """
+        self.template_cache.get_bytes(self._get_template_path(template_name))
+    
+    def warm_template(self, template_name: str) -> None:
+        """
+        Load a template and the objects derived from it into the template cache.
+        
+        Args:
+            template_name: Name of the template to load
+        """
+        self._get_placeholder_index(self._get_template_path(template_name))
+        
+        schema_path = self._get_schema_path(template_name)
+        if schema_path.exists():
+            self.template_cache.get_derived(schema_path, "template_schema", _parse_schema_file)
+    
     async def generate_document(
         self, 
         template_name: str, 
         data: Dict[str, Any], 
-        output_path: Optional[str] = None
-    ) -> Path:
+        output_path: Optional[str] = None,
+        output_stream: Optional[BinaryIO] = None
+    ) -> Union[Path, BinaryIO]:
         """
         Generate a document from a template and data.
         
+        Rendering is CPU-bound, so it is dispatched to the render executor
+        instead of running on the event loop. The render scheduler decides
+        when it gets a worker, based on the priority class of the current
+        context and the concurrency caps of the document type and template.
+        The render keeps its slot until it has left its worker, also when it
+        times out, so the caps count renders that are still running.
+        
         Args:
             template_name: Name of the template to use
             data: Data to populate the template with
             output_path: Optional path where to save the document, relative to the configured output directory
+            output_stream: Optional writable stream to render into instead of a file
+            
+        Returns:
+            Path to the generated document, or output_stream if one was given
+        """
+        from .executor import get_render_executor
+        from .scheduler import get_render_scheduler
+        
+        # Resolve the template first, so only existing templates become metric labels
+        self._get_template_path(template_name)
+        labels = {"document_type": self.document_type, "template": template_name}
+        started = time.perf_counter()
+        try:
+            async with get_render_scheduler().slot(self.document_type, template_name) as render_slot:
+                return await get_render_executor().render(
+                    self, template_name, data, output_path, output_stream,
+                    on_finished=render_slot.detach()
+                )
+        except Exception:
+            GENERATION_ERRORS.inc(**labels)
+            raise
+        finally:
+            GENERATION_DURATION.observe(time.perf_counter() - started, **labels)
+    
+    def get_template_digest(self, template_name: str) -> str:
+        """
+        Get the content hash of a template.
+        
+        Args:
+            template_name: Name of the template
             
         Returns:
-            Path to the generated document
+            Hex digest of the template content
+        """
+        return self.template_cache.get_digest(self._get_template_path(template_name))
+    
+    def _output_cache_key(self, template_name: str, data: Dict[str, Any]) -> Optional[str]:
+        """Get the output cache key for a request, or None if the cache is disabled."""
+        if not get_output_cache().enabled:
+            return None
+        return OutputCache.make_key(self.get_template_digest(template_name), self.document_type, data)
+    
+    async def render_bytes(self, template_name: str, data: Dict[str, Any]) -> bytes:
         """
+        Generate a document entirely in memory.
+        
+        Identical requests (same template content, document type and data)
+        are served from the output cache instead of rendering again.
+        
+        Args:
+            template_name: Name of the template to use
+            data: Data to populate the template with
+            
+        Returns:
+            The document content
+        """
+        output_cache = get_output_cache()
+        key = self._output_cache_key(template_name, data)
+        if key is not None:
+            content = output_cache.get(key)
+            if content is not None:
+                return content
+        
+        buffer = BytesIO()
+        await self.generate_document(template_name, data, output_stream=buffer)
+        content = buffer.getvalue()
+        
+        if key is not None:
+            output_cache.put(key, content)
+        return content
+    
+    async def store_document(
+        self,
+        template_name: str,
+        data: Dict[str, Any],
+        storage_service,
+        storage_path: str,
+        content: Optional[bytes] = None
+    ) -> str:
+        """
+        Generate a document and upload it to storage.
+        
+        If identical output was already uploaded to the same path, the
+        existing URL is returned without rendering or uploading again.
+        
+        Args:
+            template_name: Name of the template to use
+            data: Data to populate the template with
+            storage_service: Storage to upload the document to
+            storage_path: Path where to store the document in storage
+            content: The document content, if it has already been rendered
+            
+        Returns:
+            URL of the stored document
+        """
+        output_cache = get_output_cache()
+        key = self._output_cache_key(template_name, data)
+        destination = storage_key(storage_service, storage_path)
+        if key is not None:
+            file_url = output_cache.get_url(key, destination)
+            if file_url is not None:
+                return file_url
+        
+        if content is None:
+            content = await self.render_bytes(template_name, data)
+        with stage("upload"):
+            file_url = await storage_service.upload_stream(BytesIO(content), storage_path, self.media_type)
+        
+        if key is not None:
+            output_cache.put_url(key, destination, file_url)
+        else:
+            output_cache.forget_url(destination)
+        return file_url
+    
+    @abstractmethod
+    def render_document(
+        self, 
+        template_name: str, 
+        data: Dict[str, Any], 
+        output_path: Optional[str] = None,
+        output_stream: Optional[BinaryIO] = None
+    ) -> Union[Path, BinaryIO]:
+        """
+        Synchronously render a document from a template and data.
+        
+        Runs in a render executor worker; call generate_document from async code.
+        
+        Args:
+            template_name: Name of the template to use
+            data: Data to populate the template with
+            output_path: Optional path where to save the document, relative to the configured output directory
+            output_stream: Optional writable stream to render into instead of a file
+            
+        Returns:
+            Path to the generated document, or output_stream if one was given
+        """
+        pass
+    
+    @abstractmethod
+    def _list_template_files(self) -> List[Path]:
+        """List the template files in the templates directory."""
+        pass
+    
+    @abstractmethod
+    def _get_info_path(self, template_name: str) -> Path:
+        """Get the path to a template's info file, which may not exist."""
         pass
     
     @abstractmethod
+    def _default_template_info(self, template_name: str) -> Dict[str, Any]:
+        """Get the info of a template without an info file."""
+        pass
+    
+    def _inspect_template(self, template_path: Path) -> Dict[str, Any]:
+        """Get info that can only be read from the template itself, such as its slide count."""
+        return {}
+    
+    def _build_template_info(self, template_name: str, template_path: Path) -> Dict[str, Any]:
+        """
+        Build the info of a template from its defaults, info file and content.
+        
+        Args:
+            template_name: Name of the template
+            template_path: Path to the template file
+            
+        Returns:
+            Template metadata
+        """
+        info = self._default_template_info(template_name)
+        info_path = self._get_info_path(template_name)
+        
+        # Try to get info from the info file
+        if info_path.exists():
+            try:
+                with open(info_path, "r") as f:
+                    info.update(json.load(f))
+            except Exception as e:
+                logger.error(f"Error reading template info file: {e}")
+        
+        info.update(self._inspect_template(template_path))
+        return info
+    
+    @property
+    def catalog(self) -> TemplateCatalog:
+        """The catalog of the templates directory."""
+        return get_template_catalog(self.templates_path)
+    
+    async def _refresh_catalog(self) -> Dict[str, Dict[str, Any]]:
+        """Bring the catalog up to date without blocking the event loop."""
+        return await asyncio.to_thread(self.catalog.refresh, self)
+    
     async def list_templates(self) -> List[Dict[str, Any]]:
         """
         List available templates.
         
+        Templates are listed from the catalog, so only templates that changed
+        since the last call are opened.
+        
         Returns:
             List of template metadata
         """
-        pass
+        entries = await self._refresh_catalog()
+        return [
+            {
+                "name": entry["name"],
+                "file": entry["file"],
+                "type": entry["type"],
+                "size": entry["size"],
+                "hash": entry["hash"],
+                "placeholders": list(entry["placeholders"]),
+                "info": copy.deepcopy(entry["info"])
+            }
+            for _, entry in sorted(entries.items())
+        ]
     
-    @abstractmethod
     async def get_template_info(self, template_name: str) -> Dict[str, Any]:
         """
         Get information about a specific template.
@@ -47,17 +343,49 @@ class DocumentService(ABC):
         Returns:
             Template metadata
         """
+        entries = await self._refresh_catalog()
+        if template_name not in entries:
+            # Report why the catalog skipped the template, if it exists at all
+            self._get_template_path(template_name)
+            raise FileNotFoundError(f"Template not found: {template_name}")
+        return copy.deepcopy(entries[template_name]["info"])
+    
+    @abstractmethod
+    def _get_schema_path(self, template_name: str) -> Path:
+        """Get the path to a template's schema file, which may not exist."""
         pass
     
     @abstractmethod
+    def _get_placeholder_index(self, template_path: Path) -> PlaceholderIndex:
+        """Get the cached placeholder index of a template."""
+        pass
+    
     async def get_template_schema(self, template_name: str) -> Dict[str, Any]:
         """
         Get the schema of data required for a specific template.
         
+        The schema comes from the template's schema file if there is one,
+        otherwise every placeholder in the template becomes a required string
+        field. Both are derived from files in the template cache, so a schema
+        is only computed again when its file changes.
+        
         Args:
             template_name: Name of the template
             
         Returns:
             JSON schema of the data required for the template
         """
-        pass 
\ No newline at end of file
+        schema_path = self._get_schema_path(template_name)
+        
+        # Try to get schema from the schema file
+        if schema_path.exists():
+            schema = self.template_cache.get_derived(schema_path, "template_schema", _parse_schema_file)
+            return copy.deepcopy(schema)
+        
+        # If no schema file exists, use the placeholders indexed from the template
+        try:
+            template_path = self._get_template_path(template_name)
+            return _placeholder_schema(self._get_placeholder_index(template_path))
+        except Exception as e:
+            logger.error(f"Error extracting placeholders from template: {e}")
+            return _default_schema()
@@ -0,0 +1,131 @@
+import asyncio
+import io
+import json
+import logging
+import zipfile
+from typing import Any, AsyncIterator, Dict, List
+
+from .base import DocumentService
+from .scheduler import PRIORITY_BATCH, use_priority
+
+logger = logging.getLogger(__name__)
+
+# OOXML files are already deflated, so compressing them again only costs CPU
+_ZIP_COMPRESSION = {
+    "docx": zipfile.ZIP_STORED,
+    "pptx": zipfile.ZIP_STORED,
+    "pdf": zipfile.ZIP_DEFLATED,
+}
+
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """
+    Write-only, non-seekable sink for zipfile.
+
+    zipfile falls back to data descriptors when it cannot seek, so each
+    member can be sent to the client as soon as it is written.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        """Return everything written since the last drain."""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def stream_batch_zip(
+    document_service: DocumentService,
+    template_name: str,
+    records: AsyncIterator[Any],
+    concurrency: int
+) -> AsyncIterator[bytes]:
+    """
+    Render one template for many data records and stream the results as a ZIP.
+
+    Records are rendered concurrently as batch work, at most `concurrency`
+    at a time, and each document is added to the archive as soon as it
+    finishes. A failed record does not abort the batch; the final
+    manifest.json lists the file or error for every record in input order.
+
+    Args:
+        document_service: The service that renders the documents
+        template_name: Name of the template to use
+        records: Data records to render, one document per record
+        concurrency: Maximum number of documents rendered at once
+
+    Yields:
+        Chunks of the ZIP archive
+    """
+    document_type = document_service.document_type
+    manifest: Dict[int, Dict[str, Any]] = {}
+    buffer = _ZipStreamBuffer()
+    pending: Dict[asyncio.Future, int] = {}
+
+    # Load the template once; every render below reuses the cached copy
+    document_service.preload_template(template_name)
+
+    async def render(index: int, record: Any):
+        filename = f"{template_name}_{index + 1:04d}.{document_type}"
+        if not isinstance(record, dict):
+            raise ValueError(f"Record must be an object, got {type(record).__name__}")
+        # Batch renders only get workers that interactive renders leave free
+        with use_priority(PRIORITY_BATCH):
+            return filename, await document_service.render_bytes(template_name, record)
+
+    def collect(index: int, task: asyncio.Future):
+        try:
+            filename, content = task.result()
+        except Exception as e:
+            logger.error(f"Batch record {index} failed: {e}")
+            manifest[index] = {"record": index, "status": "failed", "error": str(e)}
+            return
+        archive.writestr(filename, content)
+        manifest[index] = {"record": index, "status": "ok", "file": filename}
+
+    async def wait_for_any():
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            collect(pending.pop(task), task)
+
+    try:
+        with zipfile.ZipFile(buffer, "w", compression=_ZIP_COMPRESSION.get(document_type, zipfile.ZIP_DEFLATED)) as archive:
+            index = 0
+            async for record in records:
+                pending[asyncio.ensure_future(render(index, record))] = index
+                index += 1
+
+                if len(pending) >= concurrency:
+                    await wait_for_any()
+                    yield buffer.drain()
+
+            while pending:
+                await wait_for_any()
+                yield buffer.drain()
+
+            archive.writestr(
+                "manifest.json",
+                json.dumps([manifest[i] for i in sorted(manifest)], indent=2)
+            )
+        yield buffer.drain()
+    finally:
+        # The client went away or rendering failed; don't leave work behind
+        for task in pending:
+            task.cancel()
+
+    failed = sum(1 for entry in manifest.values() if entry["status"] != "ok")
+    logger.info(f"Batch for {template_name}.{document_type} finished: {len(manifest)} records, {failed} failed")
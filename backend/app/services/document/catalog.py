@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILENAME = ".catalog.json"
+CATALOG_VERSION = 1
+
+
+def _fingerprint(path: Path) -> Optional[List[int]]:
+    """Identify a version of a file by its size and mtime, or None if it doesn't exist."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class TemplateCatalog:
+    """
+    Persistent manifest of the templates in one directory.
+
+    Each entry holds a template's name, type, size, content hash, placeholders
+    and info (including slide or page counts), so templates can be listed and
+    described without opening them. The manifest is stored as .catalog.json
+    in the template directory and updated incrementally: a refresh only stats
+    the files and rebuilds the entries whose template or info file changed.
+    If the directory is not writable the catalog is kept in memory only.
+    """
+
+    def __init__(self, templates_path: Path):
+        self.templates_path = Path(templates_path)
+        self.path = self.templates_path / CATALOG_FILENAME
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._persist = True
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Read the manifest from disk, ignoring it if it is missing or unusable."""
+        try:
+            manifest = json.loads(self.path.read_text())
+            if manifest.get("version") == CATALOG_VERSION:
+                return manifest["templates"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable template catalog {self.path}: {e}")
+        return {}
+
+    def _save(self, entries: Dict[str, Dict[str, Any]]):
+        """Write the manifest atomically, falling back to memory if that fails."""
+        if not self._persist:
+            return
+
+        manifest = {"version": CATALOG_VERSION, "templates": entries}
+        temp_path = self.path.with_name(f"{CATALOG_FILENAME}.{os.getpid()}.tmp")
+        try:
+            temp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Cannot write template catalog {self.path}, keeping it in memory: {e}")
+            self._persist = False
+            temp_path.unlink(missing_ok=True)
+
+    def _build_entry(self, document_service, template_path: Path, fingerprint: Dict[str, Any]) -> Dict[str, Any]:
+        """Describe one template."""
+        template_name = template_path.stem
+        template_cache = document_service.template_cache
+        entry = {
+            "name": template_name,
+            "file": template_path.name,
+            "type": document_service.document_type,
+            "size": fingerprint["template"][0],
+            "hash": template_cache.get_digest(template_path),
+            "placeholders": [],
+            "info": document_service._build_template_info(template_name, template_path),
+            "fingerprint": fingerprint,
+        }
+        try:
+            entry["placeholders"] = sorted(document_service._get_placeholder_index(template_path).placeholders)
+        except Exception as e:
+            logger.error(f"Error extracting placeholders from template: {e}")
+        return entry
+
+    def refresh(self, document_service) -> Dict[str, Dict[str, Any]]:
+        """
+        Bring the catalog up to date with the template directory.
+
+        Args:
+            document_service: The service owning the template directory
+
+        Returns:
+            Catalog entries by template name
+        """
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+
+            entries = {}
+            changed = False
+            for template_path in document_service._list_template_files():
+                template_name = template_path.stem
+                fingerprint = {
+                    "template": _fingerprint(template_path),
+                    "info": _fingerprint(document_service._get_info_path(template_name)),
+                }
+                if fingerprint["template"] is None:
+                    continue
+
+                entry = self._entries.get(template_name)
+                if entry is None or entry.get("fingerprint") != fingerprint:
+                    logger.info(f"Cataloging template: {template_path}")
+                    entry = self._build_entry(document_service, template_path, fingerprint)
+                    changed = True
+                entries[template_name] = entry
+
+            if changed or entries.keys() != self._entries.keys():
+                self._entries = entries
+                self._save(entries)
+
+            return self._entries
+
+    def invalidate(self, template_name: Optional[str] = None):
+        """
+        Force a template, or every template if no name is given, to be described again.
+
+        Args:
+            template_name: Name of the template
+        """
+        with self._lock:
+            if self._entries is None:
+                return
+            if template_name is None:
+                self._entries = {}
+            else:
+                self._entries.pop(template_name, None)
+
+
+_catalogs: Dict[str, TemplateCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_template_catalog(templates_path: Path) -> TemplateCatalog:
+    """
+    Get the catalog of a template directory.
+    Implements a singleton pattern per directory.
+    """
+    key = str(Path(templates_path).resolve())
+
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = TemplateCatalog(templates_path)
+
+    return catalog
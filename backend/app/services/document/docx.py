@@ -1,28 +1,52 @@
 import os
-import json
+import copy
 import logging
 import mimetypes
+import zipfile
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import BinaryIO, Dict, Any, List, Optional, Union
 from datetime import datetime
 from io import BytesIO
 
 from docx import Document
+from docx.opc.oxml import serialize_part_xml
+from docx.oxml.ns import qn
+from docx.oxml.parser import parse_xml
 from docx.shared import Pt, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.text.paragraph import Paragraph
 
 from ...core.config import settings
+from ...core.timing import LapTimer
 from .base import DocumentService
+from .ooxml import OoxmlPackage, main_part_name
+from .template_cache import get_template_cache
+from .placeholders import PlaceholderIndex, PlaceholderSubstituter, RowTemplate, find_placeholders, has_placeholders
+from .row_templates import RowBinder, find_row_list, get_row_items, list_keys
 from ..storage import get_storage_service
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass(frozen=True)
+class DocxTemplate:
+    """A Word template split around its main document part, with the part's placeholder index."""
+    package: OoxmlPackage
+    part_name: str
+    index: PlaceholderIndex
+
+
 class DocxDocumentService(DocumentService):
     """Service for generating Word documents."""
     
+    document_type = "docx"
+    media_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    
     def __init__(self):
         self.templates_path = Path(settings.DOCX_TEMPLATES_PATH)
         self.storage_service = get_storage_service()
+        self.template_cache = get_template_cache()
         
         # Ensure the templates directory exists
         self._ensure_templates_path_exists()
@@ -50,38 +74,92 @@ class DocxDocumentService(DocumentService):
         info_path = self.templates_path / f"{template_name}.info.json"
         return info_path
     
-    async def generate_document(
+    def _list_template_files(self) -> List[Path]:
+        """List the Word templates in the templates directory."""
+        if not self.templates_path.exists():
+            return []
+        return [
+            file_path for file_path in self.templates_path.glob("*.docx")
+            if file_path.is_file() and not file_path.name.startswith(".")
+        ]
+    
+    def _default_template_info(self, template_name: str) -> Dict[str, Any]:
+        """Get the info of a template without an info file."""
+        return {
+            "name": template_name,
+            "type": "docx",
+            "description": f"Word template: {template_name}",
+            "pages": 0
+        }
+    
+    def _get_placeholder_index(self, template_path: Path) -> PlaceholderIndex:
+        """Get the cached placeholder index of a template."""
+        return self._load_template(template_path).index
+    
+    def _load_template(self, template_path: Path) -> DocxTemplate:
+        """Get a compiled template from the template cache."""
+        return self.template_cache.get_derived(template_path, "docx_template", self._compile_template)
+    
+    def _compile_template(self, content: bytes) -> DocxTemplate:
+        """Split a template package around its main document part and index the part."""
+        with zipfile.ZipFile(BytesIO(content)) as archive:
+            part_name = main_part_name(archive)
+        package = OoxmlPackage(content, [part_name])
+        return DocxTemplate(package, part_name, self._build_placeholder_index(package.parts[part_name]))
+    
+    def render_document(
         self, 
         template_name: str, 
         data: Dict[str, Any], 
-        output_path: Optional[str] = None
-    ) -> Path:
+        output_path: Optional[str] = None,
+        output_stream: Optional[BinaryIO] = None
+    ) -> Union[Path, BinaryIO]:
         """
-        Generate a Word document from a template and data.
+        Render a Word document from a template and data.
+        
+        By default only the main document part is parsed and rewritten, and
+        every other member of the package is copied to the output as it is.
+        With OOXML_FAST_PATH_ENABLED off, the whole document is loaded and
+        saved through python-docx instead; both produce the same document.
         
         Args:
             template_name: Name of the template to use
             data: Data to populate the template with
             output_path: Optional path where to save the document
+            output_stream: Optional writable stream to render into instead of a file
             
         Returns:
-            Path to the generated document
+            Path to the generated document, or output_stream if one was given
         """
+        laps = LapTimer()
         template_path = self._get_template_path(template_name)
         
-        # Create a document from the template
-        doc = Document(template_path)
-        
-        # Process paragraphs
-        for paragraph in doc.paragraphs:
-            self._process_paragraph(paragraph, data)
+        if settings.OOXML_FAST_PATH_ENABLED:
+            template = self._load_template(template_path)
+            document = parse_xml(template.package.parts[template.part_name])
+            laps.lap("template")
+            self._substitute(document.body, template.index, data)
+            laps.lap("substitute")
+            
+            def save(stream: BinaryIO):
+                template.package.save({template.part_name: serialize_part_xml(document)}, stream)
+        else:
+            # Create a document from the template, together with its placeholder index
+            template_stream, template = self.template_cache.open_with_derived(
+                template_path, "docx_template", self._compile_template
+            )
+            doc = Document(template_stream)
+            laps.lap("template")
+            self._substitute(doc.element.body, template.index, data)
+            laps.lap("substitute")
+            save = doc.save
         
-        # Process tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        self._process_paragraph(paragraph, data)
+        # Render straight into the caller's stream if one was given
+        if output_stream is not None:
+            save(output_stream)
+            laps.lap("save")
+            logger.info(f"Generated document in memory: {template_name}")
+            return output_stream
         
         # Create output filename if not provided
         if not output_path:
@@ -93,161 +171,146 @@ class DocxDocumentService(DocumentService):
         output_file.parent.mkdir(parents=True, exist_ok=True)
         
         # Save the document
-        doc.save(output_file)
+        with open(output_file, "wb") as f:
+            save(f)
+        laps.lap("save")
         logger.info(f"Generated document: {output_file}")
         
         return output_file
     
-    def _process_paragraph(self, paragraph, data: Dict[str, Any]):
+    def _substitute(self, body, index: PlaceholderIndex, data: Dict[str, Any]):
         """
-        Process a paragraph in a document, replacing placeholders with data.
+        Replace the placeholders of a document body in place.
         
         Args:
-            paragraph: The paragraph to process
-            data: The data dictionary
+            body: The w:body element of the document
+            index: Placeholder index of the template
+            data: Data to populate the template with
         """
-        if not paragraph.runs:
-            return
-        
-        # Get the paragraph text
-        text = paragraph.text
-        
-        # Check if there are any placeholders in the paragraph
-        if "{{" not in text or "}}" not in text:
-            return
+        substituter = PlaceholderSubstituter(data)
         
-        # Replace placeholders
-        new_text = text
-        for key, value in data.items():
-            placeholder = f"{{{{{key}}}}}"
-            if placeholder in new_text:
-                new_text = new_text.replace(placeholder, str(value))
+        # Only visit the paragraphs known to contain placeholders
+        for location in index.locations:
+            p = body
+            for position in location:
+                p = p[position]
+            self._process_paragraph(Paragraph(p, None), substituter)
         
-        # Remove all runs except the first one
-        for _ in range(len(paragraph.runs) - 1):
-            p = paragraph._p
-            p.remove(paragraph.runs[1]._r)
-        
-        # Set the new text to the first run
-        paragraph.runs[0].text = new_text
+        # Expand template rows last, from the bottom up, so inserted rows don't
+        # shift the locations of the nodes and rows still to be processed
+        for row_template in sorted(index.row_templates, key=lambda row_template: row_template.location, reverse=True):
+            table_idx, row_idx = row_template.location
+            self._expand_row(body[table_idx][row_idx], row_template, data, substituter)
     
-    async def list_templates(self) -> List[Dict[str, Any]]:
+    def _build_placeholder_index(self, document_xml: bytes) -> PlaceholderIndex:
         """
-        List available Word templates.
+        Scan a template for the paragraphs that contain placeholders.
         
-        Returns:
-            List of template metadata
-        """
-        templates = []
-        
-        if not self.templates_path.exists():
-            return templates
-        
-        for file_path in self.templates_path.glob("*.docx"):
-            if file_path.is_file() and not file_path.name.startswith("."):
-                template_name = file_path.stem
-                
-                # Try to get info from the info file
-                info = await self.get_template_info(template_name)
-                
-                templates.append({
-                    "name": template_name,
-                    "file": file_path.name,
-                    "type": "docx",
-                    "info": info
-                })
-        
-        return templates
-    
-    async def get_template_info(self, template_name: str) -> Dict[str, Any]:
-        """
-        Get information about a specific template.
+        Covers body paragraphs and paragraphs in the cells of body tables.
+        Locations are child-index paths from the document body, e.g. (4,)
+        for a body paragraph or (7, 2, 1, 0) for table/row/cell/paragraph.
         
         Args:
-            template_name: Name of the template
+            document_xml: The template's main document part
             
         Returns:
-            Template metadata
+            Placeholder index for the template
         """
-        info_path = self._get_info_path(template_name)
+        body = parse_xml(document_xml).body
+        locations = []
+        placeholders = set()
+        row_templates = []
+        nodes_scanned = 0
         
-        # Default info
-        info = {
-            "name": template_name,
-            "type": "docx",
-            "description": f"Word template: {template_name}",
-            "pages": 0
-        }
+        def scan(p, location):
+            nonlocal nodes_scanned
+            nodes_scanned += 1
+            found = find_placeholders(p.text)
+            if found:
+                locations.append(location)
+            return found
         
-        # Try to get info from the info file
-        if info_path.exists():
-            try:
-                with open(info_path, "r") as f:
-                    file_info = json.load(f)
-                    info.update(file_info)
-            except Exception as e:
-                logger.error(f"Error reading template info file: {e}")
+        for i, child in enumerate(body):
+            if child.tag == qn("w:p"):
+                placeholders.update(scan(child, (i,)))
+            elif child.tag == qn("w:tbl"):
+                for j, tr in enumerate(child):
+                    if tr.tag != qn("w:tr"):
+                        continue
+                    row_keys = set()
+                    for k, tc in enumerate(tr):
+                        if tc.tag != qn("w:tc"):
+                            continue
+                        for m, p in enumerate(tc):
+                            if p.tag == qn("w:p"):
+                                row_keys.update(scan(p, (i, j, k, m)))
+                    
+                    # Rows addressing list fields, e.g. {{competitors.name}}, are repeated per element
+                    list_name = find_row_list(row_keys)
+                    if list_name is not None:
+                        keys = list_keys(row_keys, list_name)
+                        row_templates.append(RowTemplate((i, j), list_name, frozenset(keys)))
+                        row_keys -= keys
+                    placeholders.update(row_keys)
         
-        return info
+        logger.info(f"Indexed {len(locations)} of {nodes_scanned} paragraphs containing placeholders")
+        return PlaceholderIndex(tuple(locations), frozenset(placeholders), nodes_scanned, tuple(row_templates))
     
-    async def get_template_schema(self, template_name: str) -> Dict[str, Any]:
+    def _expand_row(self, tr, row_template: RowTemplate, data: Dict[str, Any], substituter: PlaceholderSubstituter):
         """
-        Get the schema of data required for a specific template.
+        Replace a template row with one filled copy per element of its list.
+        
+        The row is left as it is if the data has no such list.
         
         Args:
-            template_name: Name of the template
-            
-        Returns:
-            JSON schema of the data required for the template
+            tr: The template row element
+            row_template: The indexed template row
+            data: Data to populate the template with
+            substituter: Placeholder substituter bound to the request data
         """
-        schema_path = self._get_schema_path(template_name)
+        items = get_row_items(data, row_template.list_name)
+        if items is None:
+            return
         
-        # Default schema
-        schema = {
-            "type": "object",
-            "properties": {},
-            "required": []
-        }
+        binder = RowBinder(items, row_template.keys, substituter)
+        anchor = tr
+        for position in range(binder.count):
+            row = copy.deepcopy(tr)
+            row_substituter = binder.substituter(position)
+            # The row's paragraphs were merged into single runs when their other
+            # placeholders were replaced, so each placeholder is within one text element
+            for t in row.iter(qn("w:t")):
+                if has_placeholders(t.text):
+                    t.text = row_substituter.substitute(t.text)
+            anchor.addnext(row)
+            anchor = row
+        tr.getparent().remove(tr)
+    
+    def _process_paragraph(self, paragraph, substituter: PlaceholderSubstituter):
+        """
+        Process a paragraph in a document, replacing placeholders with data.
         
-        # Try to get schema from the schema file
-        if schema_path.exists():
-            try:
-                with open(schema_path, "r") as f:
-                    file_schema = json.load(f)
-                    schema.update(file_schema)
-            except Exception as e:
-                logger.error(f"Error reading template schema file: {e}")
-        else:
-            # If no schema file exists, try to extract placeholders from the template
-            try:
-                template_path = self._get_template_path(template_name)
-                doc = Document(template_path)
-                
-                # Find all placeholders in paragraphs and tables
-                placeholders = set()
-                
-                # Check paragraphs
-                for paragraph in doc.paragraphs:
-                    text = paragraph.text
-                    import re
-                    for match in re.finditer(r"{{([^}]+)}}", text):
-                        placeholders.add(match.group(1))
-                
-                # Check tables
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            for paragraph in cell.paragraphs:
-                                text = paragraph.text
-                                for match in re.finditer(r"{{([^}]+)}}", text):
-                                    placeholders.add(match.group(1))
-                
-                # Create schema properties for each placeholder
-                for placeholder in placeholders:
-                    schema["properties"][placeholder] = {"type": "string"}
-                    schema["required"].append(placeholder)
-            
-            except Exception as e:
-                logger.error(f"Error extracting placeholders from template: {e}")
+        Args:
+            paragraph: The paragraph to process
+            substituter: Placeholder substituter bound to the request data
+        """
+        if not paragraph.runs:
+            return
         
-        return schema 
\ No newline at end of file
+        # Get the paragraph text
+        text = paragraph.text
+        
+        # Check if there are any placeholders in the paragraph
+        if not has_placeholders(text):
+            return
+        
+        # Replace placeholders in a single pass
+        new_text = substituter.substitute(text)
+        
+        # Remove all runs except the first one
+        for _ in range(len(paragraph.runs) - 1):
+            p = paragraph._p
+            p.remove(paragraph.runs[1]._r)
+        
+        # Set the new text to the first run
+        paragraph.runs[0].text = new_text
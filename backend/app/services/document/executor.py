@@ -0,0 +1,237 @@
+import asyncio
+import contextvars
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Optional, Tuple, Union
+
+from ...core.config import settings
+from ...core.timing import StageTimer, record_stages, stage, use_timer
+
+logger = logging.getLogger(__name__)
+
+
+class RenderTimeoutError(TimeoutError):
+    """Raised when a render job does not finish within its timeout."""
+
+
+def render_document_job(
+    document_type: str,
+    template_name: str,
+    data: Dict[str, Any],
+    output_path: Optional[str] = None,
+    in_memory: bool = False
+) -> Tuple[Union[Path, bytes], Dict[str, float]]:
+    """
+    Render a document inside a worker process.
+    
+    Process pool workers cannot receive service instances or streams, so the
+    job looks up a service for the document type in the worker and renders
+    there. In-memory renders return the document content. The stage timings
+    recorded in the worker are returned alongside the result, so they can be
+    added to the request that submitted the job.
+    """
+    from . import get_document_service
+    
+    document_service = get_document_service(document_type)
+    with use_timer(StageTimer()) as timer:
+        if in_memory:
+            buffer = BytesIO()
+            document_service.render_document(template_name, data, output_stream=buffer)
+            result = buffer.getvalue()
+        else:
+            result = document_service.render_document(template_name, data, output_path)
+    return result, timer.durations
+
+
+class RenderExecutor:
+    """
+    Runs CPU-bound document rendering off the event loop.
+
+    Rendering is dispatched to a bounded thread or process pool so a slow
+    render cannot stall other requests. Each job is awaited with a timeout.
+    A timed-out job is abandoned by the caller, but a job that has already
+    started keeps its worker until it finishes; callers that account for
+    workers learn when through on_finished.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 4, timeout: float = 120.0):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+
+        self.kind = kind
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._pending = 0
+
+        if kind == "thread":
+            self._pool: Executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="render")
+        elif kind == "process":
+            # Spawn fresh interpreters rather than forking the threaded server process
+            self._pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            raise ValueError(f"Unknown render executor: {kind}")
+
+        logger.info(f"Render executor started: {kind} pool with {max_workers} workers")
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs submitted and not yet finished."""
+        return self._pending
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a free worker."""
+        return max(0, self._pending - self.max_workers)
+
+    def stats(self) -> Dict[str, int]:
+        """Get render executor statistics."""
+        return {"workers": self.max_workers, "pending": self.pending, "queue_depth": self.queue_depth}
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        timeout: Optional[float] = None,
+        on_finished: Optional[Callable[[], None]] = None
+    ) -> Any:
+        """
+        Run a function in the pool and wait for its result.
+
+        Args:
+            fn: The function to run; must be picklable for process pools
+            *args: Positional arguments for the function
+            timeout: Seconds to wait for the result, defaults to the executor timeout
+            on_finished: Called on the event loop once the job has left its worker,
+                or was cancelled before it started. A timed-out job keeps running,
+                so this can be long after the caller has given up.
+
+        Returns:
+            The function's return value
+        """
+        loop = asyncio.get_running_loop()
+        timeout = self.timeout if timeout is None else timeout
+
+        try:
+            if self.kind == "thread":
+                # Run in the caller's context, so stage timings reach its request
+                job = self._pool.submit(contextvars.copy_context().run, fn, *args)
+            else:
+                job = self._pool.submit(fn, *args)
+        except Exception:
+            if on_finished is not None:
+                on_finished()
+            raise
+        self._pending += 1
+
+        def finished():
+            self._pending -= 1
+            if on_finished is not None:
+                on_finished()
+
+        def job_done(_):
+            try:
+                loop.call_soon_threadsafe(finished)
+            except RuntimeError:
+                # The event loop is already closed
+                pass
+
+        job.add_done_callback(job_done)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(job), timeout)
+        except asyncio.TimeoutError:
+            raise RenderTimeoutError(f"Render job did not finish within {timeout} seconds")
+
+    async def render(
+        self,
+        document_service,
+        template_name: str,
+        data: Dict[str, Any],
+        output_path: Optional[str] = None,
+        output_stream: Optional[BinaryIO] = None,
+        on_finished: Optional[Callable[[], None]] = None
+    ) -> Union[Path, BinaryIO]:
+        """
+        Render a document with a document service in the pool.
+
+        Args:
+            document_service: The service that renders the document
+            template_name: Name of the template to use
+            data: Data to populate the template with
+            output_path: Optional path where to save the document
+            output_stream: Optional writable stream to render into instead of a file
+            on_finished: Called once the render has left its worker, see run
+
+        Returns:
+            Path to the generated document, or output_stream if one was given
+        """
+        with stage("render"):
+            if self.kind == "process":
+                result, durations = await self.run(
+                    render_document_job,
+                    document_service.document_type,
+                    template_name,
+                    data,
+                    output_path,
+                    output_stream is not None,
+                    on_finished=on_finished
+                )
+                record_stages(durations)
+                if output_stream is None:
+                    return result
+                output_stream.write(result)
+                return output_stream
+            
+            return await self.run(
+                document_service.render_document, template_name, data, output_path, output_stream,
+                on_finished=on_finished
+            )
+    
+    def shutdown(self, wait: bool = True):
+        """
+        Stop the pool, cancelling jobs that have not started yet.
+
+        Args:
+            wait: Whether to wait for running jobs to finish
+        """
+        logger.info("Shutting down render executor...")
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_render_executor: Optional[RenderExecutor] = None
+
+
+def get_render_executor() -> RenderExecutor:
+    """
+    Get the configured render executor.
+    Implements a singleton pattern.
+    """
+    global _render_executor
+
+    if _render_executor is None:
+        _render_executor = RenderExecutor(
+            kind=settings.RENDER_EXECUTOR,
+            max_workers=settings.RENDER_MAX_WORKERS,
+            timeout=settings.RENDER_TIMEOUT_SECONDS
+        )
+
+    return _render_executor
+
+
+def render_executor_stats() -> Optional[Dict[str, int]]:
+    """Get the statistics of the render executor, or None if it hasn't been started."""
+    return _render_executor.stats() if _render_executor is not None else None
+
+
+def shutdown_render_executor(wait: bool = True):
+    """Shut down the render executor if it was started."""
+    global _render_executor
+
+    if _render_executor is not None:
+        _render_executor.shutdown(wait=wait)
+        _render_executor = None
@@ -0,0 +1,499 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from ...core.config import settings
+from ...core.timing import StageTimer, use_timer
+from .scheduler import PRIORITY_BATCH, use_priority
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    document_type TEXT NOT NULL,
+    template_name TEXT NOT NULL,
+    storage_path TEXT,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    timings TEXT,
+    file_url TEXT,
+    content BLOB,
+    content_size INTEGER,
+    error TEXT,
+    owner TEXT,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (finished_at);
+"""
+
+# Columns added after the first release, with their types
+_ADDED_COLUMNS = {"owner": "TEXT", "lease_until": "REAL"}
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+@dataclass
+class Job:
+    """A document generation job and its outcome."""
+    id: str
+    status: str
+    document_type: str
+    template_name: str
+    storage_path: Optional[str]
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    file_url: Optional[str] = None
+    content_size: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_SUCCEEDED, JOB_FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "document_type": self.document_type,
+            "template_name": self.template_name,
+            "storage_path": self.storage_path,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "timings": self.timings,
+            "file_url": self.file_url,
+            "size": self.content_size,
+            "error": self.error,
+        }
+
+
+class JobStore:
+    """
+    Keeps job state in a SQLite database.
+
+    Finished documents that were not uploaded to storage are kept in the
+    database until the job expires. One connection is shared by all
+    threads and guarded by a lock; statements are short, so the lock is
+    never held for long. Use ":memory:" for a store that lives only as
+    long as the process.
+
+    A store claims the jobs it runs with a lease that its owner renews
+    while they run. Several processes can share a database: a running job
+    is only queued again once its lease has expired, i.e. once the process
+    running it has stopped or hung.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 60.0):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(_SCHEMA)
+            columns = {row[1] for row in self._connection.execute("PRAGMA table_info(jobs)")}
+            for name, column_type in _ADDED_COLUMNS.items():
+                if name not in columns:
+                    self._connection.execute(f"ALTER TABLE jobs ADD COLUMN {name} {column_type}")
+
+    def _execute(self, sql: str, parameters: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in one write transaction, so other processes see all of them or none."""
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def _row_to_job(self, row) -> Job:
+        (job_id, status, document_type, template_name, storage_path, created_at,
+         started_at, finished_at, timings, file_url, content_size, error) = row
+        return Job(
+            id=job_id,
+            status=status,
+            document_type=document_type,
+            template_name=template_name,
+            storage_path=storage_path,
+            created_at=created_at,
+            started_at=started_at,
+            finished_at=finished_at,
+            timings=json.loads(timings) if timings else {},
+            file_url=file_url,
+            content_size=content_size,
+            error=error,
+        )
+
+    def create(self, document_type: str, template_name: str, data: Dict[str, Any], storage_path: Optional[str]) -> Job:
+        """Record a new queued job."""
+        job = Job(
+            id=uuid.uuid4().hex,
+            status=JOB_QUEUED,
+            document_type=document_type,
+            template_name=template_name,
+            storage_path=storage_path,
+            created_at=time.time(),
+        )
+        self._execute(
+            "INSERT INTO jobs (id, status, document_type, template_name, storage_path, data, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job.id, job.status, document_type, template_name, storage_path, json.dumps(data, default=str), job.created_at)
+        )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job, or None if it doesn't exist or has expired."""
+        rows = self._execute(
+            "SELECT id, status, document_type, template_name, storage_path, created_at, started_at, "
+            "finished_at, timings, file_url, content_size, error FROM jobs WHERE id = ?",
+            (job_id,)
+        )
+        return self._row_to_job(rows[0]) if rows else None
+
+    def get_data(self, job_id: str) -> Dict[str, Any]:
+        """Get the data a job renders its document with."""
+        rows = self._execute("SELECT data FROM jobs WHERE id = ?", (job_id,))
+        return json.loads(rows[0][0])
+
+    def get_content(self, job_id: str) -> Optional[bytes]:
+        """Get the document a finished job rendered in memory."""
+        rows = self._execute("SELECT content FROM jobs WHERE id = ?", (job_id,))
+        return rows[0][0] if rows else None
+
+    def mark_running(self, job_id: str) -> bool:
+        """
+        Claim a queued job for this store's owner.
+
+        Returns:
+            False if the job has finished or another process is running it
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._connection.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, owner = ?, lease_until = ? "
+                "WHERE id = ? AND (status = ? OR (status = ? AND lease_until < ?))",
+                (JOB_RUNNING, now, self.owner, now + self.lease_seconds, job_id, JOB_QUEUED, JOB_RUNNING, now)
+            )
+            return cursor.rowcount == 1
+
+    def renew_leases(self):
+        """Extend the leases of the jobs this store's owner is running."""
+        self._execute(
+            "UPDATE jobs SET lease_until = ? WHERE status = ? AND owner = ?",
+            (time.time() + self.lease_seconds, JOB_RUNNING, self.owner)
+        )
+
+    def mark_succeeded(
+        self,
+        job_id: str,
+        timings: Dict[str, float],
+        file_url: Optional[str] = None,
+        content: Optional[bytes] = None,
+        content_size: Optional[int] = None
+    ):
+        self._execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, timings = ?, file_url = ?, content = ?, "
+            "content_size = ?, data = '{}' WHERE id = ?",
+            (JOB_SUCCEEDED, time.time(), json.dumps(timings), file_url, content, content_size, job_id)
+        )
+
+    def mark_failed(self, job_id: str, error: str, timings: Optional[Dict[str, float]] = None):
+        self._execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, timings = ?, error = ?, data = '{}' WHERE id = ?",
+            (JOB_FAILED, time.time(), json.dumps(timings or {}), error, job_id)
+        )
+
+    def _requeue(self, connection: sqlite3.Connection, condition: str, parameters: tuple) -> List[str]:
+        """Put the running jobs matching a condition back in the queue, within a transaction."""
+        rows = connection.execute(
+            f"SELECT id FROM jobs WHERE status = ? AND ({condition}) ORDER BY created_at",
+            (JOB_RUNNING, *parameters)
+        ).fetchall()
+        connection.execute(
+            f"UPDATE jobs SET status = ?, started_at = NULL, owner = NULL, lease_until = NULL "
+            f"WHERE status = ? AND ({condition})",
+            (JOB_QUEUED, JOB_RUNNING, *parameters)
+        )
+        return [row[0] for row in rows]
+
+    def requeue_expired(self) -> List[str]:
+        """
+        Put running jobs whose lease has expired back in the queue.
+
+        Returns:
+            IDs of the requeued jobs, oldest first
+        """
+        with self._transaction() as connection:
+            return self._requeue(connection, "lease_until IS NULL OR lease_until < ?", (time.time(),))
+
+    def requeue_unfinished(self) -> List[str]:
+        """
+        Queue again the jobs that a stopped process left running.
+
+        Jobs whose lease is still held by another process are left alone.
+
+        Returns:
+            IDs of all queued jobs, oldest first
+        """
+        with self._transaction() as connection:
+            self._requeue(connection, "lease_until IS NULL OR lease_until < ?", (time.time(),))
+            rows = connection.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (JOB_QUEUED,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def release(self) -> List[str]:
+        """
+        Put the jobs this store's owner is running back in the queue, e.g. on shutdown.
+
+        Returns:
+            IDs of the requeued jobs, oldest first
+        """
+        with self._transaction() as connection:
+            return self._requeue(connection, "owner = ?", (self.owner,))
+
+    def purge(self, older_than: float) -> int:
+        """Delete jobs that finished before a point in time."""
+        with self._lock:
+            cursor = self._connection.execute("DELETE FROM jobs WHERE finished_at < ?", (older_than,))
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class JobQueue:
+    """
+    Runs document generation jobs in the background.
+
+    A fixed number of worker tasks take jobs from a bounded queue, so
+    clients get a job ID immediately and poll for the result instead of
+    holding a request open for the whole render. Rendering itself still
+    goes through the render executor, as batch work. Jobs that were queued
+    or running when the process stopped are queued again on start, and a
+    background task renews the leases of running jobs while picking up
+    jobs whose process stopped renewing theirs.
+    """
+
+    def __init__(self, store: JobStore, workers: int = 2, max_queued: int = 100, retention: float = 86400.0):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+
+        self.store = store
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retention = retention
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._running = 0
+
+    @property
+    def queued(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def running(self) -> int:
+        """Number of jobs being generated."""
+        return self._running
+
+    def stats(self) -> Dict[str, int]:
+        """Get job queue statistics."""
+        return {"queued": self.queued, "running": self.running}
+
+    def start(self):
+        """Start the workers on the running event loop, if they aren't running yet."""
+        if self._tasks:
+            return
+
+        self._queue = asyncio.Queue()
+        for job_id in self.store.requeue_unfinished():
+            self._queue.put_nowait(job_id)
+        self.store.purge(time.time() - self.retention)
+
+        self._tasks = [asyncio.create_task(self._work(), name=f"document-job-{i}") for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintain_leases(), name="document-job-leases"))
+        logger.info(f"Job queue started with {self.workers} workers and {self._queue.qsize()} queued jobs")
+
+    async def stop(self):
+        """Stop the workers; jobs they were running are queued again on the next start."""
+        tasks, self._tasks = self._tasks, []
+        if not tasks:
+            return
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        released = await asyncio.to_thread(self.store.release)
+        logger.info(f"Job queue stopped, {len(released)} running jobs queued again")
+
+    async def submit(
+        self,
+        document_type: str,
+        template_name: str,
+        data: Dict[str, Any],
+        storage_path: Optional[str] = None
+    ) -> Job:
+        """
+        Queue a document generation job.
+
+        Args:
+            document_type: Type of document (docx, pptx, pdf)
+            template_name: Name of the template to use
+            data: Data to populate the template with
+            storage_path: Optional path to upload the document to; without
+                one the document is kept with the job
+
+        Returns:
+            The queued job
+        """
+        self.start()
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFullError(f"Job queue is full ({self.max_queued} jobs waiting)")
+
+        job = await asyncio.to_thread(self.store.create, document_type, template_name, data, storage_path)
+        self._queue.put_nowait(job.id)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def get_content(self, job_id: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self.store.get_content, job_id)
+
+    async def _maintain_leases(self):
+        """Renew the leases of running jobs and queue the jobs whose lease expired."""
+        while True:
+            await asyncio.sleep(self.store.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self.store.renew_leases)
+                for job_id in await asyncio.to_thread(self.store.requeue_expired):
+                    logger.warning(f"Job {job_id} lost its lease and was queued again")
+                    self._queue.put_nowait(job_id)
+            except Exception as e:
+                logger.exception(f"Could not maintain job leases: {e}")
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            self._running += 1
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Job {job_id} could not be recorded: {e}")
+            finally:
+                self._running -= 1
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        from . import get_document_service
+        from ..storage import get_storage_service
+
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None or job.finished:
+            return
+        # Another worker or process may have claimed the job first
+        if not await asyncio.to_thread(self.store.mark_running, job_id):
+            return
+
+        queued_ms = (time.time() - job.created_at) * 1000
+        data = await asyncio.to_thread(self.store.get_data, job_id)
+
+        timer = StageTimer()
+        try:
+            # Nobody is waiting on the response, so jobs render as batch work
+            with use_timer(timer), use_priority(PRIORITY_BATCH):
+                document_service = get_document_service(job.document_type)
+                if job.storage_path:
+                    file_url = await document_service.store_document(
+                        job.template_name, data, get_storage_service(), job.storage_path
+                    )
+                    content = None
+                else:
+                    file_url = None
+                    content = await document_service.render_bytes(job.template_name, data)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            timings = {"queue": queued_ms, **timer.durations, "total": timer.elapsed_ms}
+            await asyncio.to_thread(self.store.mark_failed, job_id, str(e), timings)
+            return
+
+        timings = {"queue": queued_ms, **timer.durations, "total": timer.elapsed_ms}
+        await asyncio.to_thread(
+            self.store.mark_succeeded, job_id, timings, file_url, content,
+            len(content) if content is not None else None
+        )
+        logger.info(f"Job {job_id} finished: {job.template_name}.{job.document_type} in {timings['total']:.1f} ms")
+
+        # Expired jobs are cleaned up as new ones finish
+        await asyncio.to_thread(self.store.purge, time.time() - self.retention)
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """
+    Get the document job queue.
+    Implements a singleton pattern.
+    """
+    global _job_queue
+
+    if _job_queue is None:
+        _job_queue = JobQueue(
+            JobStore(settings.JOB_STORE_PATH, lease_seconds=settings.JOB_LEASE_SECONDS),
+            workers=settings.JOB_WORKERS,
+            max_queued=settings.JOB_QUEUE_MAX_SIZE,
+            retention=settings.JOB_RETENTION_SECONDS
+        )
+
+    return _job_queue
+
+
+def job_queue_stats() -> Optional[Dict[str, int]]:
+    """Get the statistics of the job queue, or None if it hasn't been started."""
+    return _job_queue.stats() if _job_queue is not None else None
+
+
+async def stop_job_queue():
+    """Stop the job queue if it was started."""
+    global _job_queue
+
+    if _job_queue is not None:
+        await _job_queue.stop()
+        _job_queue.store.close()
+        _job_queue = None
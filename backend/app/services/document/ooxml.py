@@ -0,0 +1,98 @@
+import posixpath
+import zipfile
+from io import BytesIO
+from typing import BinaryIO, Dict, Iterable, Mapping, Tuple
+
+from lxml import etree
+
+# Relationship type of a package's main part (word/document.xml, ppt/presentation.xml)
+OFFICE_DOCUMENT_RELATIONSHIP = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+_RELATIONSHIP_TAG = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+
+
+def _relationships_name(part_name: str) -> str:
+    """Get the member name of a part's relationships, e.g. ppt/_rels/presentation.xml.rels."""
+    directory, filename = posixpath.split(part_name)
+    return posixpath.join(directory, "_rels", f"{filename}.rels")
+
+
+def read_relationships(archive: zipfile.ZipFile, part_name: str = "") -> Dict[str, Tuple[str, str]]:
+    """
+    Read the internal relationships of a part in an OOXML package.
+
+    Args:
+        archive: The package
+        part_name: Member name of the part, or "" for the package itself
+
+    Returns:
+        Relationship type and target member name by relationship ID
+    """
+    try:
+        root = etree.fromstring(archive.read(_relationships_name(part_name)))
+    except KeyError:
+        return {}
+
+    relationships = {}
+    base = posixpath.dirname(part_name)
+    for relationship in root.iter(_RELATIONSHIP_TAG):
+        if relationship.get("TargetMode") == "External":
+            continue
+        target = relationship.get("Target")
+        if target.startswith("/"):
+            name = target.lstrip("/")
+        else:
+            name = posixpath.normpath(posixpath.join(base, target))
+        relationships[relationship.get("Id")] = (relationship.get("Type"), name)
+    return relationships
+
+
+def main_part_name(archive: zipfile.ZipFile) -> str:
+    """Get the member name of a package's main part."""
+    for relationship_type, name in read_relationships(archive).values():
+        if relationship_type == OFFICE_DOCUMENT_RELATIONSHIP:
+            return name
+    raise ValueError("Package has no main document part")
+
+
+class OoxmlPackage:
+    """
+    A template package split into the XML parts a render rewrites and everything else.
+
+    Every other member is written once into a base archive, so a render
+    copies the base as it is and only compresses the parts it rewrote,
+    instead of loading and re-saving the whole package through
+    python-docx/python-pptx.
+    """
+
+    def __init__(self, content: bytes, rewritable: Iterable[str]):
+        rewritable = set(rewritable)
+        self.parts: Dict[str, bytes] = {}
+        self._infos: Dict[str, Tuple[Tuple[int, ...], int]] = {}
+
+        base = BytesIO()
+        with zipfile.ZipFile(BytesIO(content)) as archive, \
+                zipfile.ZipFile(base, "w", compression=zipfile.ZIP_DEFLATED) as output:
+            for info in archive.infolist():
+                if info.filename in rewritable:
+                    self.parts[info.filename] = archive.read(info)
+                    self._infos[info.filename] = (info.date_time, info.compress_type)
+                else:
+                    output.writestr(info, archive.read(info))
+        self._base = base.getvalue()
+
+    def save(self, parts: Mapping[str, bytes], output: BinaryIO):
+        """
+        Write the package with some of its rewritable parts replaced.
+
+        Args:
+            parts: New content by member name; rewritable parts not listed are written unchanged
+            output: Writable stream to write the package to
+        """
+        buffer = BytesIO(self._base)
+        with zipfile.ZipFile(buffer, "a") as archive:
+            for name, content in self.parts.items():
+                date_time, compress_type = self._infos[name]
+                info = zipfile.ZipInfo(name, date_time=date_time)
+                info.compress_type = compress_type
+                archive.writestr(info, parts.get(name, content))
+        output.write(buffer.getbuffer())
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from ...core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class OutputCache:
+    """
+    Size-bounded LRU cache of generated documents.
+
+    Entries are content-addressed: the key is a hash of the template's content
+    hash, the document type and the canonicalized request data, so an edited
+    template or different data can never return a stale document. The cache
+    also remembers where identical output was last uploaded, so a repeated
+    request with the same storage path can return the existing URL without
+    rendering or uploading again.
+    """
+
+    def __init__(self, max_bytes: int, max_urls: int):
+        self.max_bytes = max_bytes
+        self.max_urls = max_urls
+        self.hits = 0
+        self.misses = 0
+        self.url_hits = 0
+        self.url_misses = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._total_bytes = 0
+        # storage key -> (output key, URL) of the last upload to that path
+        self._uploads: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def make_key(template_digest: str, document_type: str, data: Dict[str, Any]) -> str:
+        """
+        Build the cache key for a generation request.
+
+        Args:
+            template_digest: Content hash of the template
+            document_type: Type of document (docx, pptx, pdf)
+            data: Data used to populate the template
+
+        Returns:
+            Hex digest identifying the output
+        """
+        canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+        digest = hashlib.sha256()
+        for part in (template_digest, document_type, canonical):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get cached output, or None on a miss."""
+        with self._lock:
+            content = self._entries.get(key)
+            if content is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return content
+
+    def put(self, key: str, content: bytes):
+        """Store output, evicting the least recently used entries beyond the budget."""
+        if len(content) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= len(previous)
+            self._entries[key] = content
+            self._total_bytes += len(content)
+            while self._total_bytes > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted)
+                logger.debug(f"Evicting output from cache: {evicted_key}")
+
+    def get_url(self, key: str, storage_key: str) -> Optional[str]:
+        """
+        Get the URL of a previous upload of identical output to the same path.
+
+        Args:
+            key: Output cache key
+            storage_key: Identifies the storage provider and destination path
+
+        Returns:
+            The URL, or None if the path holds different or unknown content
+        """
+        with self._lock:
+            upload = self._uploads.get(storage_key)
+            if upload is None or upload[0] != key:
+                self.url_misses += 1
+                return None
+            self._uploads.move_to_end(storage_key)
+            self.url_hits += 1
+            return upload[1]
+
+    def put_url(self, key: str, storage_key: str, url: str):
+        """Record that output was uploaded to a path."""
+        with self._lock:
+            self._uploads.pop(storage_key, None)
+            self._uploads[storage_key] = (key, url)
+            while len(self._uploads) > self.max_urls:
+                self._uploads.popitem(last=False)
+
+    def forget_url(self, storage_key: str):
+        """Forget an upload, e.g. because the stored file was deleted."""
+        with self._lock:
+            self._uploads.pop(storage_key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache statistics."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "urls": len(self._uploads),
+                "url_hits": self.url_hits,
+                "url_misses": self.url_misses,
+            }
+
+
+def storage_key(storage_service, storage_path: str) -> str:
+    """Identify a destination path on a particular storage provider."""
+    return f"{storage_service.__class__.__name__}:{storage_path.lstrip('/')}"
+
+
+_output_cache: Optional[OutputCache] = None
+
+
+def get_output_cache() -> OutputCache:
+    """
+    Get the process-wide output cache.
+    Implements a singleton pattern.
+    """
+    global _output_cache
+
+    if _output_cache is None:
+        _output_cache = OutputCache(settings.OUTPUT_CACHE_MAX_BYTES, settings.OUTPUT_CACHE_MAX_URLS)
+
+    return _output_cache
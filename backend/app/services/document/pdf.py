@@ -1,34 +1,411 @@
 import os
+import copy
+import hashlib
+import itertools
 import json
 import logging
 import mimetypes
 import tempfile
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import BinaryIO, Callable, Dict, Any, FrozenSet, Iterable, Iterator, List, Optional, Union, Tuple
 from datetime import datetime
 
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.platypus import Flowable, SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
+from jinja2 import Environment, FileSystemBytecodeCache, Template, meta
 
-from weasyprint.text.fonts import FontConfiguration
-from weasyprint import HTML, CSS
+try:
+    from weasyprint.text.fonts import FontConfiguration
+    from weasyprint import HTML
+except (ImportError, OSError):  # WeasyPrint also needs the Pango system libraries
+    FontConfiguration = HTML = None
 
 from ...core.config import settings
+from ...core.timing import LapTimer
 from .base import DocumentService
+from .template_cache import get_template_cache
+from .placeholders import PlaceholderIndex, PlaceholderSubstituter, find_placeholders
 from ..storage import get_storage_service
 
 logger = logging.getLogger(__name__)
 
+
+class RendererUnavailableError(RuntimeError):
+    """Raised when a template needs a rendering engine that cannot be loaded."""
+
+
+# Styles shared by every JSON template; ReportLab only reads them while building
+STYLES = getSampleStyleSheet()
+
+# Section type -> (paragraph style, space after)
+SECTION_LAYOUT = {
+    "title": ("Title", 12),
+    "heading": ("Heading1", 12),
+    "subheading": ("Heading2", 6),
+    "paragraph": ("Normal", 12),
+}
+
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+# Builds a flowable for one request from the request's substitute function and data
+FlowableFactory = Callable[[Callable[[str], str], Dict[str, Any]], Flowable]
+
+# Data rows per Table chunk of a data-driven table
+TABLE_CHUNK_ROWS = 200
+
+# HTML templates are Jinja2 templates; data values are escaped as HTML
+_html_environment = Environment(autoescape=True)
+_bytecode_cache: Optional[FileSystemBytecodeCache] = None
+_bytecode_cache_checked = False
+
+# WeasyPrint font configuration kept per render thread
+_weasyprint_state = threading.local()
+
+
+@dataclass(frozen=True)
+class HtmlTemplate:
+    """An HTML template prepared for rendering with WeasyPrint."""
+    template: Template
+    index: PlaceholderIndex
+
+
+@dataclass(frozen=True)
+class PdfPlan:
+    """A JSON template compiled into the flowables of a document, in order."""
+    factories: Tuple[FlowableFactory, ...]
+    index: PlaceholderIndex
+    
+    def build(self, data: Dict[str, Any]) -> List[Flowable]:
+        """Create the flowables for one document."""
+        substitute = PlaceholderSubstituter(data).substitute
+        return [factory(substitute, data) for factory in self.factories]
+
+
+class StreamingTable(Flowable):
+    """
+    A table whose rows are consumed from an iterator while the document is built.
+    
+    The table is never drawn itself. Each time it reaches a frame it splits
+    off a Table holding as many of the next rows as fit, with the header
+    repeated, and puts itself back behind that chunk. Rows are read ahead
+    at most one chunk at a time, so memory stays flat regardless of the row
+    count. All chunks use the column widths computed for the first one, so
+    the columns line up from page to page, and its row heights size the
+    following chunks so they rarely need splitting again.
+    """
+    
+    def __init__(self, header: Optional[List[Flowable]], rows: Iterator[List[str]], chunk_rows: int = TABLE_CHUNK_ROWS):
+        Flowable.__init__(self)
+        self._header = header
+        self._rows = rows
+        self._chunk_rows = chunk_rows
+        self._pending: List[List[str]] = []
+        self._col_widths = None
+        self._header_height = 0.0
+        self._row_height = None
+    
+    def _fill(self) -> bool:
+        """Read the next chunk of rows, unless some are waiting; False when all rows were consumed."""
+        if not self._pending:
+            self._pending = list(itertools.islice(self._rows, self._chunk_rows))
+        return bool(self._pending)
+    
+    def _make_table(self, rows: List[List[str]]) -> Table:
+        if self._header:
+            table = Table([self._header] + rows, colWidths=self._col_widths, repeatRows=1)
+        else:
+            table = Table(rows, colWidths=self._col_widths)
+        table.setStyle(TABLE_STYLE)
+        return table
+    
+    def wrap(self, availWidth, availHeight):
+        if not self._fill():
+            return 0, 0
+        # Never fit, so that the document asks for a split
+        return availWidth, availHeight + 1
+    
+    def split(self, availWidth, availHeight):
+        if not self._fill():
+            return []
+        
+        count = len(self._pending)
+        if self._row_height:
+            count = min(count, int((availHeight - self._header_height) // self._row_height))
+            if count < 1:
+                # Not even one row fits; the rows are kept for the next frame
+                return []
+        
+        table = self._make_table(self._pending[:count])
+        _, height = table.wrap(availWidth, availHeight)
+        if self._col_widths is None:
+            self._col_widths = table._colWidths
+        body_heights = table._rowHeights[1:] if self._header else table._rowHeights
+        self._header_height = table._rowHeights[0] if self._header else 0.0
+        self._row_height = max([self._row_height or 0.0] + list(body_heights))
+        
+        if height <= availHeight:
+            parts = [table]
+        else:
+            parts = table.split(availWidth, availHeight)
+            if not parts:
+                return []
+        
+        self._pending = self._pending[count:]
+        # The document marks flowables it had to move to the next frame and
+        # fails if they don't fit there either; that only applies per chunk
+        self.__dict__.pop("_postponed", None)
+        return parts + [self]
+    
+    def draw(self):
+        pass
+
+
+def _cell_text(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+def _table_rows(rows: Iterable[Any], columns: Optional[List[str]]) -> Iterator[List[str]]:
+    """Convert data rows, either sequences or mappings, to cell texts as they are consumed."""
+    for row in rows:
+        if isinstance(row, dict):
+            values = [row.get(column) for column in columns] if columns else row.values()
+        else:
+            values = row
+        yield [_cell_text(value) for value in values]
+
+
+def _paragraph_factory(text: str, style: Any, bound: bool) -> FlowableFactory:
+    """
+    Get a factory for a paragraph.
+    
+    Paragraphs without placeholders are parsed once. Each document gets a
+    shallow copy, because ReportLab keeps layout state on the flowable.
+    """
+    if bound:
+        return lambda substitute, data: Paragraph(substitute(text), style)
+    paragraph = Paragraph(text, style)
+    return lambda substitute, data: copy.copy(paragraph)
+
+
+def _spacer_factory(height: float) -> FlowableFactory:
+    return lambda substitute, data: Spacer(1, height)
+
+
+def _table_factory(cells: List[List[FlowableFactory]]) -> FlowableFactory:
+    def build(substitute, data):
+        table = Table([[cell(substitute, data) for cell in row] for row in cells])
+        table.setStyle(TABLE_STYLE)
+        return table
+    return build
+
+
+def _data_table_factory(
+    header: Optional[List[FlowableFactory]],
+    rows_from: str,
+    columns: Optional[List[str]],
+    chunk_rows: int
+) -> FlowableFactory:
+    def build(substitute, data):
+        header_row = [cell(substitute, data) for cell in header] if header else None
+        rows = _table_rows(data.get(rows_from) or (), columns)
+        return StreamingTable(header_row, rows, chunk_rows)
+    return build
+
+
+def _compile_plan(template_config: Dict[str, Any], index: PlaceholderIndex) -> PdfPlan:
+    """
+    Compile a template configuration into a plan.
+    
+    Strings found by the placeholder index become paragraphs that are
+    created per request; everything else is built once. Table sections
+    with "rows_from" take their rows from the data key it names, a list of
+    rows given either as lists or as objects whose "columns" are picked in
+    order.
+    
+    Args:
+        template_config: The parsed template configuration
+        index: The template's placeholder index
+        
+    Returns:
+        The compiled plan
+    """
+    indexed = set(index.locations)
+    factories = []
+    
+    for section_idx, section in enumerate(template_config.get("sections", [])):
+        section_type = section.get("type", "")
+        
+        if section_type in SECTION_LAYOUT:
+            style_name, space_after = SECTION_LAYOUT[section_type]
+            location = (section_idx, "content")
+            factories.append(_paragraph_factory(section.get("content", ""), STYLES[style_name], location in indexed))
+            factories.append(_spacer_factory(space_after))
+        
+        elif section_type == "table" and "rows" in section:
+            cells = []
+            
+            # Add header row if present
+            if "header" in section:
+                cells.append([
+                    _paragraph_factory(cell, STYLES["Heading3"], (section_idx, "header", col_idx) in indexed)
+                    for col_idx, cell in enumerate(section["header"])
+                ])
+            
+            for row_idx, row in enumerate(section["rows"]):
+                cells.append([
+                    _paragraph_factory(cell, STYLES["Normal"], (section_idx, "rows", row_idx, col_idx) in indexed)
+                    for col_idx, cell in enumerate(row)
+                ])
+            
+            factories.append(_table_factory(cells))
+            factories.append(_spacer_factory(12))
+        
+        elif section_type == "table" and "rows_from" in section:
+            header = None
+            if "header" in section:
+                header = [
+                    _paragraph_factory(cell, STYLES["Heading3"], (section_idx, "header", col_idx) in indexed)
+                    for col_idx, cell in enumerate(section["header"])
+                ]
+            
+            factories.append(_data_table_factory(
+                header, section["rows_from"], section.get("columns"), section.get("chunk_rows", TABLE_CHUNK_ROWS)
+            ))
+            factories.append(_spacer_factory(12))
+    
+    return PdfPlan(tuple(factories), index)
+
+
+def _get_bytecode_cache() -> Optional[FileSystemBytecodeCache]:
+    """Get the on-disk cache of compiled HTML templates, or None if it is disabled or unusable."""
+    global _bytecode_cache, _bytecode_cache_checked
+    if not _bytecode_cache_checked:
+        if settings.PDF_HTML_BYTECODE_CACHE_PATH:
+            try:
+                cache_path = Path(settings.PDF_HTML_BYTECODE_CACHE_PATH)
+                cache_path.mkdir(parents=True, exist_ok=True)
+                _bytecode_cache = FileSystemBytecodeCache(str(cache_path), "pdf-html-%s.cache")
+            except OSError as e:
+                logger.warning(f"HTML template bytecode cache disabled: {e}")
+        _bytecode_cache_checked = True
+    return _bytecode_cache
+
+
+def _read_template_variables(path: Path) -> Optional[FrozenSet[str]]:
+    """Read the data keys of a compiled template, or None if they are missing or unusable."""
+    try:
+        return frozenset(json.loads(path.read_text()))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable HTML template variables {path}: {e}")
+        return None
+
+
+def _write_template_variables(path: Path, variables: FrozenSet[str]):
+    """Store the data keys of a compiled template next to its bytecode."""
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        temp_path.write_text(json.dumps(sorted(variables)))
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not store HTML template variables: {e}")
+        temp_path.unlink(missing_ok=True)
+
+
+def _compile_jinja_template(markup: str) -> Tuple[Template, FrozenSet[str]]:
+    """
+    Compile HTML template markup, reusing compiled code from the bytecode cache.
+    
+    Returns the template together with the data keys it reads, including
+    lists it loops over. The code is stored in the bytecode cache and the
+    keys in a JSON file beside it, both under the hash of the markup, so
+    worker processes and restarts skip Jinja's parser and compiler for
+    templates that were compiled before.
+    """
+    bytecode_cache = _get_bytecode_cache()
+    if bytecode_cache is None:
+        template_ast = _html_environment.parse(markup)
+        return _html_environment.from_string(template_ast), frozenset(meta.find_undeclared_variables(template_ast))
+    
+    name = hashlib.sha256(markup.encode("utf-8")).hexdigest()
+    bucket = bytecode_cache.get_bucket(_html_environment, name, None, markup)
+    variables_path = Path(bytecode_cache.directory) / f"pdf-html-{name}.variables.json"
+    variables = _read_template_variables(variables_path)
+    
+    template_ast = None
+    if bucket.code is None or variables is None:
+        template_ast = _html_environment.parse(markup)
+    if variables is None:
+        variables = frozenset(meta.find_undeclared_variables(template_ast))
+        _write_template_variables(variables_path, variables)
+    if bucket.code is None:
+        bucket.code = _html_environment.compile(template_ast, name)
+        try:
+            bytecode_cache.set_bucket(bucket)
+        except OSError as e:
+            logger.warning(f"Could not store compiled HTML template: {e}")
+    
+    template = _html_environment.template_class.from_code(_html_environment, bucket.code, _html_environment.globals)
+    return template, variables
+
+
+def _compile_html_template(content: bytes) -> HtmlTemplate:
+    """
+    Prepare an HTML template for rendering.
+    
+    The markup is compiled as a Jinja2 template. Its <style> blocks stay in
+    the document, so they keep author precedence over the markup's
+    presentational attributes.
+    
+    Args:
+        content: The template content
+        
+    Returns:
+        The compiled template
+    """
+    template, variables = _compile_jinja_template(content.decode("utf-8"))
+    return HtmlTemplate(template, PlaceholderIndex((), variables, 1))
+
+
+def _get_font_config() -> Any:
+    """
+    Get the WeasyPrint font configuration of the current render thread.
+    
+    Font discovery is done once per render thread rather than once per
+    request. Each thread gets its own configuration because WeasyPrint's
+    font configuration is not meant to be shared between threads.
+    """
+    state = _weasyprint_state
+    if getattr(state, "font_config", None) is None:
+        state.font_config = FontConfiguration()
+    return state.font_config
+
+
 class PdfDocumentService(DocumentService):
     """Service for generating PDF documents."""
     
+    document_type = "pdf"
+    media_type = "application/pdf"
+    
     def __init__(self):
         self.templates_path = Path(settings.PDF_TEMPLATES_PATH)
         self.storage_service = get_storage_service()
+        self.template_cache = get_template_cache()
         
         # Ensure the templates directory exists
         self._ensure_templates_path_exists()
@@ -40,7 +417,21 @@ class PdfDocumentService(DocumentService):
             self.templates_path.mkdir(parents=True, exist_ok=True)
     
     def _get_template_path(self, template_name: str) -> Path:
-        """Get the full path to a template configuration file."""
+        """
+        Get the full path to a template.
+        
+        HTML templates are only used with PDF_HTML_TEMPLATES_ENABLED on. An
+        HTML template then takes precedence over a configuration file with
+        the same name, whether or not WeasyPrint can be loaded, so which
+        engine renders a template never depends on the installed packages.
+        """
+        if settings.PDF_HTML_TEMPLATES_ENABLED:
+            html_path = self.templates_path / f"{template_name}.html"
+            if html_path.exists():
+                if HTML is None:
+                    raise RendererUnavailableError(f"WeasyPrint is required to render HTML template: {html_path}")
+                return html_path
+        
         template_path = self.templates_path / f"{template_name}.json"
         if not template_path.exists():
             raise FileNotFoundError(f"Template not found: {template_path}")
@@ -56,28 +447,114 @@ class PdfDocumentService(DocumentService):
         info_path = self.templates_path / f"{template_name}.info.json"
         return info_path
     
-    async def generate_document(
-        self, 
-        template_name: str, 
-        data: Dict[str, Any], 
-        output_path: Optional[str] = None
-    ) -> Path:
+    def _list_template_files(self) -> List[Path]:
+        """List the PDF templates in the templates directory, one file per template name."""
+        if not self.templates_path.exists():
+            return []
+        
+        template_names = {
+            file_path.stem for file_path in self.templates_path.glob("*.json")
+            if file_path.is_file()
+            and not file_path.name.startswith(".")
+            and not file_path.name.endswith((".schema.json", ".info.json"))
+        }
+        if settings.PDF_HTML_TEMPLATES_ENABLED:
+            template_names.update(
+                file_path.stem for file_path in self.templates_path.glob("*.html")
+                if file_path.is_file() and not file_path.name.startswith(".")
+            )
+        
+        template_files = []
+        for template_name in sorted(template_names):
+            try:
+                template_files.append(self._get_template_path(template_name))
+            except (FileNotFoundError, RendererUnavailableError) as e:
+                logger.warning(f"Skipping template {template_name}: {e}")
+        return template_files
+    
+    def _default_template_info(self, template_name: str) -> Dict[str, Any]:
+        """Get the info of a template without an info file."""
+        return {
+            "name": template_name,
+            "type": "pdf",
+            "description": f"PDF template: {template_name}",
+            "pages": 0
+        }
+    
+    def _load_plan(self, template_path: Path) -> PdfPlan:
+        """Get the compiled plan of a template configuration from the template cache."""
+        return self.template_cache.get_derived(
+            template_path, "pdf_plan", lambda content: _compile_plan(*self._parse_template(content))
+        )
+    
+    def _parse_template(self, content: bytes) -> Tuple[Dict[str, Any], PlaceholderIndex]:
         """
-        Generate a PDF document from a template configuration and data.
+        Parse a template configuration and index the strings that contain placeholders.
+        
+        Locations are (section, "content"), (section, "header", column) or
+        (section, "rows", row, column).
         
         Args:
-            template_name: Name of the template to use
-            data: Data to populate the template with
-            output_path: Optional path where to save the document
+            content: The template content
             
         Returns:
-            Path to the generated document
+            The parsed configuration and its placeholder index
         """
-        template_path = self._get_template_path(template_name)
+        template_config = json.loads(content)
+        locations = []
+        placeholders = set()
+        nodes_scanned = 0
+        
+        def scan(text, location):
+            nonlocal nodes_scanned
+            nodes_scanned += 1
+            found = find_placeholders(text)
+            if found:
+                locations.append(location)
+                placeholders.update(found)
         
-        # Load template configuration
-        with open(template_path, "r") as f:
-            template_config = json.load(f)
+        for section_idx, section in enumerate(template_config.get("sections", [])):
+            if "content" in section:
+                scan(section["content"], (section_idx, "content"))
+            if section.get("type") == "table":
+                for col_idx, cell in enumerate(section.get("header", [])):
+                    scan(cell, (section_idx, "header", col_idx))
+                for row_idx, row in enumerate(section.get("rows", [])):
+                    for col_idx, cell in enumerate(row):
+                        scan(cell, (section_idx, "rows", row_idx, col_idx))
+        
+        index = PlaceholderIndex(tuple(locations), frozenset(placeholders), nodes_scanned)
+        return template_config, index
+    
+    def _get_placeholder_index(self, template_path: Path) -> PlaceholderIndex:
+        """Get the cached placeholder index of a template."""
+        if template_path.suffix == ".html":
+            return self._load_html_template(template_path).index
+        return self._load_plan(template_path).index
+    
+    def _load_html_template(self, template_path: Path) -> HtmlTemplate:
+        """Get a compiled HTML template from the template cache."""
+        return self.template_cache.get_derived(template_path, "pdf_html_template", _compile_html_template)
+    
+    def _inspect_template(self, template_path: Path) -> Dict[str, Any]:
+        """Report which engine renders a template."""
+        return {"engine": "weasyprint" if template_path.suffix == ".html" else "reportlab"}
+    
+    def _resolve_output(
+        self,
+        template_name: str,
+        output_path: Optional[str],
+        output_stream: Optional[BinaryIO]
+    ) -> Tuple[Optional[Path], Union[str, BinaryIO]]:
+        """
+        Decide where a rendered PDF is written.
+        
+        Returns:
+            The output file, or None when rendering into a stream, and the render target
+        """
+        if output_stream is not None:
+            # Render straight into the caller's stream
+            return None, output_stream
         
         # Create output filename if not provided
         if not output_path:
@@ -87,10 +564,41 @@ class PdfDocumentService(DocumentService):
         # Ensure directories exist
         output_file = Path(output_path)
         output_file.parent.mkdir(parents=True, exist_ok=True)
+        return output_file, str(output_file)
+    
+    def render_document(
+        self, 
+        template_name: str, 
+        data: Dict[str, Any], 
+        output_path: Optional[str] = None,
+        output_stream: Optional[BinaryIO] = None
+    ) -> Union[Path, BinaryIO]:
+        """
+        Render a PDF document from a template configuration and data.
+        
+        Args:
+            template_name: Name of the template to use
+            data: Data to populate the template with
+            output_path: Optional path where to save the document
+            output_stream: Optional writable stream to render into instead of a file
+            
+        Returns:
+            Path to the generated document, or output_stream if one was given
+        """
+        laps = LapTimer()
+        template_path = self._get_template_path(template_name)
+        if template_path.suffix == ".html":
+            return self._render_html_document(template_name, template_path, data, output_path, output_stream)
+        
+        # Load the compiled template
+        plan = self._load_plan(template_path)
+        laps.lap("template")
+        
+        output_file, target = self._resolve_output(template_name, output_path, output_stream)
         
         # Create a PDF document
         document = SimpleDocTemplate(
-            str(output_file),
+            target,
             pagesize=letter,
             leftMargin=inch,
             rightMargin=inch,
@@ -98,234 +606,58 @@ class PdfDocumentService(DocumentService):
             bottomMargin=inch
         )
         
-        # Get styles
-        styles = getSampleStyleSheet()
-        title_style = styles["Title"]
-        heading_style = styles["Heading1"]
-        subheading_style = styles["Heading2"]
-        normal_style = styles["Normal"]
-        
-        # Build document content
-        content = []
-        
-        # Process template sections
-        for section in template_config.get("sections", []):
-            section_type = section.get("type", "")
-            section_content = section.get("content", "")
-            
-            if section_type == "title":
-                # Replace placeholders in title
-                for key, value in data.items():
-                    placeholder = f"{{{{{key}}}}}"
-                    if placeholder in section_content:
-                        section_content = section_content.replace(placeholder, str(value))
-                content.append(Paragraph(section_content, title_style))
-                content.append(Spacer(1, 12))
-            
-            elif section_type == "heading":
-                # Replace placeholders in heading
-                for key, value in data.items():
-                    placeholder = f"{{{{{key}}}}}"
-                    if placeholder in section_content:
-                        section_content = section_content.replace(placeholder, str(value))
-                content.append(Paragraph(section_content, heading_style))
-                content.append(Spacer(1, 12))
-            
-            elif section_type == "subheading":
-                # Replace placeholders in subheading
-                for key, value in data.items():
-                    placeholder = f"{{{{{key}}}}}"
-                    if placeholder in section_content:
-                        section_content = section_content.replace(placeholder, str(value))
-                content.append(Paragraph(section_content, subheading_style))
-                content.append(Spacer(1, 6))
-            
-            elif section_type == "paragraph":
-                # Replace placeholders in paragraph
-                for key, value in data.items():
-                    placeholder = f"{{{{{key}}}}}"
-                    if placeholder in section_content:
-                        section_content = section_content.replace(placeholder, str(value))
-                content.append(Paragraph(section_content, normal_style))
-                content.append(Spacer(1, 12))
-            
-            elif section_type == "table" and "rows" in section:
-                # Process table
-                table_data = []
-                
-                # Add header row if present
-                if "header" in section:
-                    header_row = []
-                    for cell in section["header"]:
-                        cell_content = cell
-                        for key, value in data.items():
-                            placeholder = f"{{{{{key}}}}}"
-                            if placeholder in cell_content:
-                                cell_content = cell_content.replace(placeholder, str(value))
-                        header_row.append(Paragraph(cell_content, styles["Heading3"]))
-                    table_data.append(header_row)
-                
-                # Process data rows
-                for row in section["rows"]:
-                    data_row = []
-                    for cell in row:
-                        cell_content = cell
-                        for key, value in data.items():
-                            placeholder = f"{{{{{key}}}}}"
-                            if placeholder in cell_content:
-                                cell_content = cell_content.replace(placeholder, str(value))
-                        data_row.append(Paragraph(cell_content, normal_style))
-                    table_data.append(data_row)
-                
-                # Create the table
-                table = Table(table_data)
-                
-                # Apply table style
-                style = TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ])
-                table.setStyle(style)
-                
-                content.append(table)
-                content.append(Spacer(1, 12))
+        # Only data-bound paragraphs are created from scratch
+        content = plan.build(data)
+        laps.lap("layout")
         
         # Build the PDF
         document.build(content)
-        logger.info(f"Generated PDF document: {output_file}")
+        laps.lap("build")
+        
+        if output_file is None:
+            logger.info(f"Generated PDF document in memory: {template_name}")
+            return output_stream
         
+        logger.info(f"Generated PDF document: {output_file}")
         return output_file
     
-    async def list_templates(self) -> List[Dict[str, Any]]:
-        """
-        List available PDF templates.
-        
-        Returns:
-            List of template metadata
+    def _render_html_document(
+        self,
+        template_name: str,
+        template_path: Path,
+        data: Dict[str, Any],
+        output_path: Optional[str] = None,
+        output_stream: Optional[BinaryIO] = None
+    ) -> Union[Path, BinaryIO]:
         """
-        templates = []
-        
-        if not self.templates_path.exists():
-            return templates
-        
-        for file_path in self.templates_path.glob("*.json"):
-            if file_path.is_file() and not file_path.name.endswith((".schema.json", ".info.json")):
-                template_name = file_path.stem
-                
-                # Try to get info from the info file
-                info = await self.get_template_info(template_name)
-                
-                templates.append({
-                    "name": template_name,
-                    "file": file_path.name,
-                    "type": "pdf",
-                    "info": info
-                })
-        
-        return templates
-    
-    async def get_template_info(self, template_name: str) -> Dict[str, Any]:
-        """
-        Get information about a specific template.
+        Render a PDF document from an HTML template with WeasyPrint.
         
         Args:
-            template_name: Name of the template
+            template_name: Name of the template to use
+            template_path: Path to the HTML template
+            data: Data to populate the template with
+            output_path: Optional path where to save the document
+            output_stream: Optional writable stream to render into instead of a file
             
         Returns:
-            Template metadata
-        """
-        info_path = self._get_info_path(template_name)
-        
-        # Default info
-        info = {
-            "name": template_name,
-            "type": "pdf",
-            "description": f"PDF template: {template_name}",
-            "pages": 0
-        }
-        
-        # Try to get info from the info file
-        if info_path.exists():
-            try:
-                with open(info_path, "r") as f:
-                    file_info = json.load(f)
-                    info.update(file_info)
-            except Exception as e:
-                logger.error(f"Error reading template info file: {e}")
-        
-        return info
-    
-    async def get_template_schema(self, template_name: str) -> Dict[str, Any]:
+            Path to the generated document, or output_stream if one was given
         """
-        Get the schema of data required for a specific template.
+        laps = LapTimer()
+        base_url = str(template_path.parent.resolve())
+        template = self._load_html_template(template_path)
+        font_config = _get_font_config()
+        laps.lap("template")
         
-        Args:
-            template_name: Name of the template
-            
-        Returns:
-            JSON schema of the data required for the template
-        """
-        schema_path = self._get_schema_path(template_name)
+        markup = template.template.render(data)
+        laps.lap("substitute")
         
-        # Default schema
-        schema = {
-            "type": "object",
-            "properties": {},
-            "required": []
-        }
+        output_file, target = self._resolve_output(template_name, output_path, output_stream)
+        HTML(string=markup, base_url=base_url).write_pdf(target, font_config=font_config)
+        laps.lap("build")
         
-        # Try to get schema from the schema file
-        if schema_path.exists():
-            try:
-                with open(schema_path, "r") as f:
-                    file_schema = json.load(f)
-                    schema.update(file_schema)
-            except Exception as e:
-                logger.error(f"Error reading template schema file: {e}")
-        else:
-            # If no schema file exists, try to extract placeholders from the template
-            try:
-                template_path = self._get_template_path(template_name)
-                
-                with open(template_path, "r") as f:
-                    template_config = json.load(f)
-                
-                # Find all placeholders in the template content
-                placeholders = set()
-                import re
-                
-                # Function to extract placeholders from text
-                def extract_placeholders(text):
-                    for match in re.finditer(r"{{([^}]+)}}", text):
-                        placeholders.add(match.group(1))
-                
-                # Process each section in the template
-                for section in template_config.get("sections", []):
-                    if "content" in section:
-                        extract_placeholders(section["content"])
-                    
-                    # Check table headers and rows
-                    if section.get("type") == "table":
-                        if "header" in section:
-                            for cell in section["header"]:
-                                extract_placeholders(cell)
-                        
-                        if "rows" in section:
-                            for row in section["rows"]:
-                                for cell in row:
-                                    extract_placeholders(cell)
-                
-                # Create schema properties for each placeholder
-                for placeholder in placeholders:
-                    schema["properties"][placeholder] = {"type": "string"}
-                    schema["required"].append(placeholder)
-            
-            except Exception as e:
-                logger.error(f"Error extracting placeholders from template: {e}")
+        if output_file is None:
+            logger.info(f"Generated PDF document from HTML in memory: {template_name}")
+            return output_stream
         
-        return schema 
\ No newline at end of file
+        logger.info(f"Generated PDF document from HTML: {output_file}")
+        return output_file
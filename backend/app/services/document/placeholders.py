@@ -0,0 +1,114 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Set, Tuple
+
+# The {{key}} grammar shared by every document service. Whitespace inside the
+# braces is ignored, so "{{ key }}" and "{{key}}" address the same value.
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*([^{}]+?)\s*\}\}")
+
+
+def has_placeholders(text: str) -> bool:
+    """Cheap pre-check used to skip text nodes that cannot contain a placeholder."""
+    return bool(text) and "{{" in text and "}}" in text
+
+
+def find_placeholders(text: str) -> Set[str]:
+    """
+    Find all placeholder keys in a piece of text.
+
+    Args:
+        text: The text to scan
+
+    Returns:
+        Set of placeholder keys
+    """
+    if not has_placeholders(text):
+        return set()
+    return {match.group(1) for match in PLACEHOLDER_PATTERN.finditer(text)}
+
+
+class PlaceholderSubstituter:
+    """
+    Replaces {{key}} placeholders with values from a data dictionary.
+
+    The substituter is created once per generation request and replaces all
+    placeholders in a text node with a single regex scan, so the cost is
+    proportional to the length of the text rather than the number of keys.
+    Placeholders without a matching key are left untouched.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self._data = data
+        self._rendered: Dict[str, str] = {}
+
+    def _replace(self, match: "re.Match[str]") -> str:
+        key = match.group(1)
+        rendered = self._rendered.get(key)
+        if rendered is None:
+            if key not in self._data:
+                return match.group(0)
+            rendered = str(self._data[key])
+            self._rendered[key] = rendered
+        return rendered
+
+    def substitute(self, text: str) -> str:
+        """
+        Replace all placeholders in a piece of text.
+
+        Args:
+            text: The text to process
+
+        Returns:
+            The text with known placeholders replaced
+        """
+        if not has_placeholders(text):
+            return text
+        return PLACEHOLDER_PATTERN.sub(self._replace, text)
+
+    __call__ = substitute
+
+
+def substitute(text: str, data: Dict[str, Any]) -> str:
+    """
+    Replace all placeholders in a piece of text with values from data.
+
+    Prefer creating a PlaceholderSubstituter when processing many text nodes
+    with the same data, so rendered values are shared between nodes.
+
+    Args:
+        text: The text to process
+        data: The data dictionary
+
+    Returns:
+        The text with known placeholders replaced
+    """
+    return PlaceholderSubstituter(data).substitute(text)
+
+
+@dataclass(frozen=True)
+class RowTemplate:
+    """
+    A table row that is repeated once per element of a list in the data.
+
+    The location is a tuple path to the row, defined by the service that
+    built it, and keys are the row's placeholders that address fields of
+    the list.
+    """
+    location: Tuple[Any, ...]
+    list_name: str
+    keys: FrozenSet[str]
+
+
+@dataclass(frozen=True)
+class PlaceholderIndex:
+    """
+    Locations of the text nodes in a template that contain placeholders.
+
+    Built once per template version by scanning the whole template, so that
+    generation only has to visit the nodes listed here. Each location is a
+    tuple path whose meaning is defined by the service that built it.
+    """
+    locations: Tuple[Tuple[Any, ...], ...]
+    placeholders: FrozenSet[str]
+    nodes_scanned: int
+    row_templates: Tuple[RowTemplate, ...] = ()
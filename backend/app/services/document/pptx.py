@@ -1,28 +1,66 @@
 import os
-import json
+import copy
 import logging
 import mimetypes
+import zipfile
+from dataclasses import dataclass
+from io import BytesIO
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import BinaryIO, Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime
 
 from pptx import Presentation
+from pptx.opc.oxml import serialize_part_xml
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import qn
+from pptx.shapes.base import BaseShape
+from pptx.shapes.shapetree import SlideShapes
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN
 from pptx.dml.color import RGBColor
 
 from ...core.config import settings
+from ...core.timing import LapTimer
 from .base import DocumentService
+from .ooxml import OoxmlPackage, main_part_name, read_relationships
+from .template_cache import get_template_cache
+from .placeholders import PlaceholderIndex, PlaceholderSubstituter, RowTemplate, find_placeholders
+from .row_templates import RowBinder, find_row_list, get_row_items, list_keys
 from ..storage import get_storage_service
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass(frozen=True)
+class PptxTemplate:
+    """
+    A PowerPoint template split around its slides with placeholders.
+    
+    slide_parts holds the part name of every slide in presentation order,
+    and indexed_slides the indexes of the slides the placeholder index
+    points into.
+    """
+    package: OoxmlPackage
+    slide_parts: Tuple[str, ...]
+    indexed_slides: Tuple[int, ...]
+    index: PlaceholderIndex
+
+
+def _slide_shapes(slide) -> List[BaseShape]:
+    """Get the top-level shapes of a parsed slide part, as python-pptx lists them for slide.shapes."""
+    return list(SlideShapes(slide.cSld.spTree, None))
+
+
 class PptxDocumentService(DocumentService):
     """Service for generating PowerPoint presentations."""
     
+    document_type = "pptx"
+    media_type = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+    
     def __init__(self):
         self.templates_path = Path(settings.PPTX_TEMPLATES_PATH)
         self.storage_service = get_storage_service()
+        self.template_cache = get_template_cache()
         
         # Ensure the templates directory exists
         self._ensure_templates_path_exists()
@@ -50,35 +88,116 @@ class PptxDocumentService(DocumentService):
         info_path = self.templates_path / f"{template_name}.info.json"
         return info_path
     
-    async def generate_document(
+    def _list_template_files(self) -> List[Path]:
+        """List the PowerPoint templates in the templates directory."""
+        if not self.templates_path.exists():
+            return []
+        return [
+            file_path for file_path in self.templates_path.glob("*.pptx")
+            if file_path.is_file() and not file_path.name.startswith(".")
+        ]
+    
+    def _default_template_info(self, template_name: str) -> Dict[str, Any]:
+        """Get the info of a template without an info file."""
+        return {
+            "name": template_name,
+            "type": "pptx",
+            "description": f"PowerPoint template: {template_name}",
+            "slides": 0
+        }
+    
+    def _inspect_template(self, template_path: Path) -> Dict[str, Any]:
+        """Count the slides in a template."""
+        try:
+            prs = Presentation(self.template_cache.open(template_path))
+            return {"slides": len(prs.slides)}
+        except Exception as e:
+            logger.error(f"Error counting slides in template: {e}")
+            return {}
+    
+    def _get_placeholder_index(self, template_path: Path) -> PlaceholderIndex:
+        """Get the cached placeholder index of a template."""
+        return self._load_template(template_path).index
+    
+    def _load_template(self, template_path: Path) -> PptxTemplate:
+        """Get a compiled template from the template cache."""
+        return self.template_cache.get_derived(template_path, "pptx_template", self._compile_template)
+    
+    def _compile_template(self, content: bytes) -> PptxTemplate:
+        """Index the slides of a template package and split it around the slides with placeholders."""
+        with zipfile.ZipFile(BytesIO(content)) as archive:
+            presentation_part = main_part_name(archive)
+            relationships = read_relationships(archive, presentation_part)
+            slide_id_list = parse_xml(archive.read(presentation_part)).sldIdLst
+            slide_ids = slide_id_list.sldId_lst if slide_id_list is not None else []
+            slide_parts = tuple(relationships[slide_id.rId][1] for slide_id in slide_ids)
+            index = self._build_placeholder_index([archive.read(name) for name in slide_parts])
+        
+        indexed_slides = {location[1] for location in index.locations}
+        indexed_slides.update(row_template.location[0] for row_template in index.row_templates)
+        package = OoxmlPackage(content, [slide_parts[slide_idx] for slide_idx in indexed_slides])
+        return PptxTemplate(package, slide_parts, tuple(sorted(indexed_slides)), index)
+    
+    def render_document(
         self, 
         template_name: str, 
         data: Dict[str, Any], 
-        output_path: Optional[str] = None
-    ) -> Path:
+        output_path: Optional[str] = None,
+        output_stream: Optional[BinaryIO] = None
+    ) -> Union[Path, BinaryIO]:
         """
-        Generate a PowerPoint presentation from a template and data.
+        Render a PowerPoint presentation from a template and data.
+        
+        By default only the slides that contain placeholders are parsed and
+        rewritten, and every other member of the package is copied to the
+        output as it is. With OOXML_FAST_PATH_ENABLED off, the whole
+        presentation is loaded and saved through python-pptx instead; both
+        produce the same presentation.
         
         Args:
             template_name: Name of the template to use
             data: Data to populate the template with
             output_path: Optional path where to save the document
+            output_stream: Optional writable stream to render into instead of a file
             
         Returns:
-            Path to the generated presentation
+            Path to the generated presentation, or output_stream if one was given
         """
+        laps = LapTimer()
         template_path = self._get_template_path(template_name)
         
-        # Create a presentation from the template
-        prs = Presentation(template_path)
+        if settings.OOXML_FAST_PATH_ENABLED:
+            template = self._load_template(template_path)
+            slides = {
+                slide_idx: parse_xml(template.package.parts[template.slide_parts[slide_idx]])
+                for slide_idx in template.indexed_slides
+            }
+            shapes_by_slide = {slide_idx: _slide_shapes(slide) for slide_idx, slide in slides.items()}
+            laps.lap("template")
+            self._substitute(shapes_by_slide, template.index, data)
+            laps.lap("substitute")
+            
+            def save(stream: BinaryIO):
+                parts = {template.slide_parts[slide_idx]: serialize_part_xml(slide) for slide_idx, slide in slides.items()}
+                template.package.save(parts, stream)
+        else:
+            # Create a presentation from the template, together with its placeholder index
+            template_stream, template = self.template_cache.open_with_derived(
+                template_path, "pptx_template", self._compile_template
+            )
+            prs = Presentation(template_stream)
+            shapes_by_slide = {slide_idx: list(prs.slides[slide_idx].shapes) for slide_idx in template.indexed_slides}
+            laps.lap("template")
+            self._substitute(shapes_by_slide, template.index, data)
+            laps.lap("substitute")
+            save = prs.save
         
-        # Process each slide in the presentation
-        for slide_idx, slide in enumerate(prs.slides):
-            for shape in slide.shapes:
-                if hasattr(shape, "text_frame") and shape.text_frame:
-                    self._process_text_frame(shape.text_frame, data)
-                if hasattr(shape, "table") and shape.table:
-                    self._process_table(shape.table, data)
+        # Render straight into the caller's stream if one was given
+        if output_stream is not None:
+            save(output_stream)
+            laps.lap("save")
+            logger.info(f"Generated presentation in memory: {template_name}")
+            return output_stream
         
         # Create output filename if not provided
         if not output_path:
@@ -90,161 +209,138 @@ class PptxDocumentService(DocumentService):
         output_file.parent.mkdir(parents=True, exist_ok=True)
         
         # Save the presentation
-        prs.save(output_file)
+        with open(output_file, "wb") as f:
+            save(f)
+        laps.lap("save")
         logger.info(f"Generated presentation: {output_file}")
         
         return output_file
     
-    def _process_text_frame(self, text_frame, data: Dict[str, Any]):
+    def _substitute(self, shapes_by_slide: Dict[int, List[BaseShape]], index: PlaceholderIndex, data: Dict[str, Any]):
         """
-        Process a text frame in a slide, replacing placeholders with data.
+        Replace the placeholders of a presentation in place.
         
         Args:
-            text_frame: The text frame to process
-            data: The data dictionary
-        """
-        for paragraph in text_frame.paragraphs:
-            for run in paragraph.runs:
-                text = run.text
-                # Replace placeholders of the form {{key}} with data values
-                for key, value in data.items():
-                    placeholder = f"{{{{{key}}}}}"
-                    if placeholder in text:
-                        text = text.replace(placeholder, str(value))
-                run.text = text
-    
-    def _process_table(self, table, data: Dict[str, Any]):
+            shapes_by_slide: The shapes of every slide in the index, by slide index
+            index: Placeholder index of the template
+            data: Data to populate the template with
         """
-        Process a table in a slide, replacing placeholders with data.
+        substituter = PlaceholderSubstituter(data)
         
-        Args:
-            table: The table to process
-            data: The data dictionary
-        """
-        for row in table.rows:
-            for cell in row.cells:
-                if cell.text_frame:
-                    self._process_text_frame(cell.text_frame, data)
-    
-    async def list_templates(self) -> List[Dict[str, Any]]:
-        """
-        List available PowerPoint templates.
+        # Only visit the runs known to contain placeholders
+        for location in index.locations:
+            kind, slide_idx, shape_idx = location[:3]
+            shape = shapes_by_slide[slide_idx][shape_idx]
+            
+            if kind == "table":
+                row_idx, col_idx, paragraph_idx, run_idx = location[3:]
+                text_frame = shape.table.cell(row_idx, col_idx).text_frame
+            else:
+                paragraph_idx, run_idx = location[3:]
+                text_frame = shape.text_frame
+            
+            self._process_run(text_frame.paragraphs[paragraph_idx].runs[run_idx], substituter)
         
-        Returns:
-            List of template metadata
+        # Expand template rows last, from the bottom up, so inserted rows don't
+        # shift the locations of the runs and rows still to be processed
+        for row_template in sorted(index.row_templates, key=lambda row_template: row_template.location, reverse=True):
+            slide_idx, shape_idx, row_idx = row_template.location
+            self._expand_row(shapes_by_slide[slide_idx][shape_idx], row_idx, row_template, data, substituter)
+    
+    def _build_placeholder_index(self, slide_xmls: List[bytes]) -> PlaceholderIndex:
         """
-        templates = []
+        Scan a template for the text runs that contain placeholders.
         
-        if not self.templates_path.exists():
-            return templates
-        
-        for file_path in self.templates_path.glob("*.pptx"):
-            if file_path.is_file() and not file_path.name.startswith("."):
-                template_name = file_path.stem
-                
-                # Try to get info from the info file
-                info = await self.get_template_info(template_name)
-                
-                templates.append({
-                    "name": template_name,
-                    "file": file_path.name,
-                    "type": "pptx",
-                    "info": info
-                })
-        
-        return templates
-    
-    async def get_template_info(self, template_name: str) -> Dict[str, Any]:
-        """
-        Get information about a specific template.
+        Covers text frames and table cells of every top-level shape. Locations
+        are ("text", slide, shape, paragraph, run) or
+        ("table", slide, shape, row, column, paragraph, run).
         
         Args:
-            template_name: Name of the template
+            slide_xmls: The template's slide parts, in presentation order
             
         Returns:
-            Template metadata
+            Placeholder index for the template
         """
-        info_path = self._get_info_path(template_name)
+        locations = []
+        placeholders = set()
+        row_templates = []
+        nodes_scanned = 0
         
-        # Default info
-        info = {
-            "name": template_name,
-            "type": "pptx",
-            "description": f"PowerPoint template: {template_name}",
-            "slides": 0
-        }
+        def scan(text_frame, location):
+            nonlocal nodes_scanned
+            found_in_frame = set()
+            for paragraph_idx, paragraph in enumerate(text_frame.paragraphs):
+                for run_idx, run in enumerate(paragraph.runs):
+                    nodes_scanned += 1
+                    found = find_placeholders(run.text)
+                    if found:
+                        locations.append(location + (paragraph_idx, run_idx))
+                        found_in_frame.update(found)
+            return found_in_frame
         
-        # Try to get info from the info file
-        if info_path.exists():
-            try:
-                with open(info_path, "r") as f:
-                    file_info = json.load(f)
-                    info.update(file_info)
-            except Exception as e:
-                logger.error(f"Error reading template info file: {e}")
+        for slide_idx, slide_xml in enumerate(slide_xmls):
+            for shape_idx, shape in enumerate(_slide_shapes(parse_xml(slide_xml))):
+                if shape.has_text_frame:
+                    placeholders.update(scan(shape.text_frame, ("text", slide_idx, shape_idx)))
+                if getattr(shape, "has_table", False):
+                    for row_idx, row in enumerate(shape.table.rows):
+                        row_keys = set()
+                        for col_idx, cell in enumerate(row.cells):
+                            row_keys.update(scan(cell.text_frame, ("table", slide_idx, shape_idx, row_idx, col_idx)))
+                        
+                        # Rows addressing list fields, e.g. {{competitors.name}}, are repeated per element
+                        list_name = find_row_list(row_keys)
+                        if list_name is not None:
+                            keys = list_keys(row_keys, list_name)
+                            row_templates.append(RowTemplate((slide_idx, shape_idx, row_idx), list_name, frozenset(keys)))
+                            row_keys -= keys
+                        placeholders.update(row_keys)
         
-        # Try to get slide count from the template
-        try:
-            template_path = self._get_template_path(template_name)
-            prs = Presentation(template_path)
-            info["slides"] = len(prs.slides)
-        except Exception as e:
-            logger.error(f"Error counting slides in template: {e}")
-        
-        return info
+        logger.info(f"Indexed {len(locations)} of {nodes_scanned} text runs containing placeholders")
+        return PlaceholderIndex(tuple(locations), frozenset(placeholders), nodes_scanned, tuple(row_templates))
     
-    async def get_template_schema(self, template_name: str) -> Dict[str, Any]:
+    def _expand_row(self, shape, row_idx: int, row_template: RowTemplate, data: Dict[str, Any], substituter: PlaceholderSubstituter):
         """
-        Get the schema of data required for a specific template.
+        Replace a template row with one filled copy per element of its list.
+        
+        The table's frame grows or shrinks by the height of the rows added or
+        removed. The row is left as it is if the data has no such list.
         
         Args:
-            template_name: Name of the template
-            
-        Returns:
-            JSON schema of the data required for the template
+            shape: The graphic frame holding the table
+            row_idx: Index of the template row
+            row_template: The indexed template row
+            data: Data to populate the template with
+            substituter: Placeholder substituter bound to the request data
         """
-        schema_path = self._get_schema_path(template_name)
-        
-        # Default schema
-        schema = {
-            "type": "object",
-            "properties": {},
-            "required": []
-        }
+        items = get_row_items(data, row_template.list_name)
+        if items is None:
+            return
         
-        # Try to get schema from the schema file
-        if schema_path.exists():
-            try:
-                with open(schema_path, "r") as f:
-                    file_schema = json.load(f)
-                    schema.update(file_schema)
-            except Exception as e:
-                logger.error(f"Error reading template schema file: {e}")
-        else:
-            # If no schema file exists, try to extract placeholders from the template
-            try:
-                template_path = self._get_template_path(template_name)
-                prs = Presentation(template_path)
-                
-                # Find all placeholders in the presentation
-                placeholders = set()
-                for slide in prs.slides:
-                    for shape in slide.shapes:
-                        if hasattr(shape, "text_frame") and shape.text_frame:
-                            for paragraph in shape.text_frame.paragraphs:
-                                for run in paragraph.runs:
-                                    text = run.text
-                                    # Find all {{key}} patterns
-                                    import re
-                                    for match in re.finditer(r"{{([^}]+)}}", text):
-                                        placeholders.add(match.group(1))
-                
-                # Create schema properties for each placeholder
-                for placeholder in placeholders:
-                    schema["properties"][placeholder] = {"type": "string"}
-                    schema["required"].append(placeholder)
-            
-            except Exception as e:
-                logger.error(f"Error extracting placeholders from template: {e}")
+        binder = RowBinder(items, row_template.keys, substituter)
+        tr = shape.table._tbl.tr_lst[row_idx]
+        anchor = tr
+        for position in range(binder.count):
+            row = copy.deepcopy(tr)
+            row_substituter = binder.substituter(position)
+            for t in row.iter(qn("a:t")):
+                if t.text:
+                    t.text = row_substituter.substitute(t.text)
+            anchor.addnext(row)
+            anchor = row
+        tr.getparent().remove(tr)
+        shape.height = shape.height + tr.h * (binder.count - 1)
+    
+    def _process_run(self, run, substituter: PlaceholderSubstituter):
+        """
+        Process a text run in a slide, replacing placeholders with data.
         
-        return schema 
\ No newline at end of file
+        Args:
+            run: The text run to process
+            substituter: Placeholder substituter bound to the request data
+        """
+        text = run.text
+        # Replace placeholders of the form {{key}} in a single pass
+        new_text = substituter.substitute(text)
+        if new_text != text:
+            run.text = new_text
@@ -0,0 +1,224 @@
+import math
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .placeholders import PLACEHOLDER_PATTERN, PlaceholderSubstituter
+
+# Decimals shown by each number format
+NUMBER_FORMATS = {
+    "currency": 2,
+    "percent": 1,
+    "thousands": 0,
+}
+CURRENCY_SYMBOL = "$"
+# Scaled magnitudes from here on don't fit the int64 arithmetic of the bulk
+# formatter and are formatted one by one instead
+_MAX_BULK_MAGNITUDE = 1e18
+
+
+def parse_row_key(key: str) -> Optional[Tuple[str, str, Optional[str]]]:
+    """
+    Split a row placeholder key such as "financials.revenue|currency".
+
+    Args:
+        key: The placeholder key
+
+    Returns:
+        The list name, field and number format (None for plain text), or
+        None if the key doesn't address a list field
+    """
+    name, _, number_format = key.partition("|")
+    list_name, dot, field = name.strip().partition(".")
+    if not dot or not list_name or not field:
+        return None
+    number_format = number_format.strip() or None
+    if number_format is not None and number_format not in NUMBER_FORMATS:
+        return None
+    return list_name, field, number_format
+
+
+def find_row_list(keys: Iterable[str]) -> Optional[str]:
+    """
+    Find the list a table row repeats over, if it is a template row.
+
+    A row is a template row when its placeholders address fields of a list,
+    e.g. {{competitors.name}}. Only fields of the first list found are
+    filled per element; other placeholders are treated as plain ones.
+
+    Args:
+        keys: The placeholder keys in the row
+
+    Returns:
+        The list name, or None if the row is an ordinary row
+    """
+    for key in sorted(keys):
+        parsed = parse_row_key(key)
+        if parsed is not None:
+            return parsed[0]
+    return None
+
+
+def list_keys(keys: Iterable[str], list_name: str) -> Set[str]:
+    """Get the keys that address fields of a list."""
+    return {key for key in keys if (parse_row_key(key) or (None,))[0] == list_name}
+
+
+def _to_numbers(values: Sequence[Any]) -> np.ndarray:
+    """Convert values to floats, with NaN for values that aren't numbers."""
+    # numpy would take booleans as 0 and 1
+    if not any(isinstance(value, bool) for value in values):
+        try:
+            return np.asarray(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            pass
+
+    def to_number(value):
+        if isinstance(value, bool):
+            return math.nan
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return math.nan
+
+    return np.fromiter((to_number(value) for value in values), dtype=np.float64, count=len(values))
+
+
+def _group_thousands(whole: np.ndarray) -> np.ndarray:
+    """Format non-negative integers with thousands separators, one group of digits at a time."""
+    text = np.where(whole >= 1000, np.char.mod("%03d", whole % 1000), np.char.mod("%d", whole % 1000))
+    rest = whole // 1000
+    while (rest > 0).any():
+        higher = rest // 1000
+        group = np.where(higher > 0, np.char.mod("%03d", rest % 1000), np.char.mod("%d", rest % 1000))
+        text = np.where(rest > 0, np.char.add(np.char.add(group, ","), text), text)
+        rest = higher
+    return text
+
+
+def format_numbers(values: Sequence[Any], number_format: str) -> List[str]:
+    """
+    Format a column of numbers in bulk.
+
+    Formats are "currency" ($1,234.50), "percent" (0.125 as 12.5%) and
+    "thousands" (1,235). The whole column is formatted with array
+    operations rather than cell by cell. Values that aren't numbers are
+    shown as they are.
+
+    Args:
+        values: The column values
+        number_format: The number format
+
+    Returns:
+        The formatted values, in order
+    """
+    if not len(values):
+        return []
+
+    numbers = _to_numbers(values)
+    if number_format == "percent":
+        numbers = numbers * 100
+    decimals = NUMBER_FORMATS[number_format]
+
+    valid = np.isfinite(numbers)
+    magnitude = np.abs(np.where(valid, numbers, 0.0)) * 10 ** decimals
+    in_range = magnitude < _MAX_BULK_MAGNITUDE
+    scaled = np.round(np.where(in_range, magnitude, 0.0)).astype(np.int64)
+    whole, fraction = np.divmod(scaled, 10 ** decimals)
+
+    text = _group_thousands(whole)
+    if decimals:
+        text = np.char.add(np.char.add(text, "."), np.char.mod(f"%0{decimals}d", fraction))
+    if number_format == "currency":
+        text = np.char.add(CURRENCY_SYMBOL, text)
+    elif number_format == "percent":
+        text = np.char.add(text, "%")
+    # Values that round to zero don't get a sign
+    text = np.where((numbers < 0) & (scaled > 0), np.char.add("-", text), text)
+
+    formatted = text.tolist()
+    for i in np.flatnonzero(~valid):
+        formatted[i] = _cell_text(values[i])
+    for i in np.flatnonzero(valid & ~in_range):
+        formatted[i] = _format_number(float(numbers[i]), number_format)
+    return formatted
+
+
+def _format_number(number: float, number_format: str) -> str:
+    """Format a single number, already scaled for percentages, the way format_numbers does."""
+    text = f"{abs(number):,.{NUMBER_FORMATS[number_format]}f}"
+    if number_format == "currency":
+        text = f"{CURRENCY_SYMBOL}{text}"
+    elif number_format == "percent":
+        text = f"{text}%"
+    return f"-{text}" if number < 0 else text
+
+
+def _cell_text(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+class RowBinder:
+    """
+    Fills clones of a template row with the elements of a list in the data.
+
+    Every column is formatted for all elements up front, so filling a clone
+    is a lookup per placeholder.
+    """
+
+    def __init__(self, items: Sequence[Any], keys: Iterable[str], substituter: PlaceholderSubstituter):
+        self.count = len(items)
+        self._substituter = substituter
+        self._columns: Dict[str, List[str]] = {}
+
+        for key in keys:
+            parsed = parse_row_key(key)
+            if parsed is None:
+                continue
+            _, field, number_format = parsed
+            values = [item.get(field) if isinstance(item, dict) else None for item in items]
+            if number_format is None:
+                self._columns[key] = [_cell_text(value) for value in values]
+            else:
+                self._columns[key] = format_numbers(values, number_format)
+
+    def substituter(self, position: int) -> "RowSubstituter":
+        """Get the substituter for the clone of the given list element."""
+        return RowSubstituter(self._columns, position, self._substituter)
+
+
+class RowSubstituter:
+    """Replaces the placeholders of one clone of a template row."""
+
+    def __init__(self, columns: Dict[str, List[str]], position: int, substituter: PlaceholderSubstituter):
+        self._columns = columns
+        self._position = position
+        self._substituter = substituter
+
+    def _replace(self, match: "re.Match[str]") -> str:
+        column = self._columns.get(match.group(1))
+        if column is None:
+            # Placeholders outside the list are filled from the data as usual
+            return self._substituter.substitute(match.group(0))
+        return column[self._position]
+
+    def substitute(self, text: str) -> str:
+        """
+        Replace all placeholders in a piece of text.
+
+        Args:
+            text: The text to process
+
+        Returns:
+            The text with known placeholders replaced
+        """
+        return PLACEHOLDER_PATTERN.sub(self._replace, text)
+
+
+def get_row_items(data: Dict[str, Any], list_name: str) -> Optional[Sequence[Any]]:
+    """Get the list a template row repeats over, or None if the data doesn't have one."""
+    items = data.get(list_name)
+    if isinstance(items, (list, tuple)):
+        return items
+    return None
@@ -0,0 +1,279 @@
+import asyncio
+import itertools
+import logging
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from ...core.config import settings
+from ...core.timing import stage
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BATCH)
+
+_current_priority: ContextVar[str] = ContextVar("render_priority", default=PRIORITY_INTERACTIVE)
+
+
+def current_priority() -> str:
+    """Get the priority class renders in the current context run with."""
+    return _current_priority.get()
+
+
+@contextmanager
+def use_priority(priority: str) -> Iterator[str]:
+    """
+    Run renders started in the current context with a priority class.
+
+    Tasks created inside the block inherit the priority, so a batch only
+    has to set it once.
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority: {priority}. Options: {', '.join(PRIORITIES)}")
+    token = _current_priority.set(priority)
+    try:
+        yield priority
+    finally:
+        _current_priority.reset(token)
+
+
+@dataclass(order=True)
+class _Waiter:
+    rank: int
+    sequence: int
+    document_type: str = field(compare=False)
+    template_name: str = field(compare=False)
+    priority: str = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class RenderSlot:
+    """A slot held by a render, see RenderScheduler.slot."""
+
+    def __init__(self, scheduler: "RenderScheduler", document_type: str, template_name: str, priority: str):
+        self.document_type = document_type
+        self.template_name = template_name
+        self.priority = priority
+        self._scheduler = scheduler
+        self._held = True
+        self._detached = False
+
+    def detach(self) -> Callable[[], None]:
+        """
+        Keep the slot after its block exits, until the returned function is called.
+
+        Hands the slot to a render job, so it is only freed once the job has
+        left its worker, even if the caller stopped waiting for it.
+        """
+        self._detached = True
+        return self.release
+
+    def release(self):
+        """Free the slot; releasing it again does nothing."""
+        if self._held:
+            self._held = False
+            self._scheduler._release(self.document_type, self.template_name, self.priority)
+
+
+class RenderScheduler:
+    """
+    Decides which render gets the next render executor worker.
+
+    Every render takes a slot before it is sent to the executor. There are
+    as many slots as workers, and a render waits while:
+
+    - all slots are taken,
+    - its document type or template is at its concurrency cap, or
+    - it is a batch render and only the slots reserved for interactive
+      renders are free.
+
+    Waiting interactive renders are started before batch renders, oldest
+    first within each class. A render that is held back by its cap doesn't
+    block renders behind it, so a burst of heavy decks leaves room for
+    one-page summaries while batch work fills the remaining capacity.
+    """
+
+    def __init__(
+        self,
+        slots: int,
+        type_limits: Optional[Dict[str, int]] = None,
+        template_limits: Optional[Dict[str, int]] = None,
+        interactive_reserved: int = 0
+    ):
+        if slots < 1:
+            raise ValueError("slots must be at least 1")
+        limits = {**(type_limits or {}), **(template_limits or {})}
+        for name, limit in limits.items():
+            if limit < 1:
+                raise ValueError(f"Concurrency limit for {name} must be at least 1")
+
+        self.slots = slots
+        self.type_limits = dict(type_limits or {})
+        self.template_limits = dict(template_limits or {})
+        # Batch renders can always use at least one slot
+        self.interactive_reserved = max(0, min(interactive_reserved, slots - 1))
+
+        self._waiters: List[_Waiter] = []
+        self._sequence = itertools.count()
+        self._running = 0
+        self._running_batch = 0
+        self._running_by_type: Dict[str, int] = {}
+        self._running_by_template: Dict[str, int] = {}
+
+    @property
+    def running(self) -> int:
+        """Number of renders holding a slot."""
+        return self._running
+
+    def running_by_type(self) -> Dict[str, int]:
+        """Number of renders holding a slot, per document type rendered so far."""
+        return dict(self._running_by_type)
+
+    def waiting(self) -> Dict[str, int]:
+        """Number of renders waiting for a slot, per priority class."""
+        counts = {priority: 0 for priority in PRIORITIES}
+        for waiter in self._waiters:
+            counts[waiter.priority] += 1
+        return counts
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Get render scheduler statistics."""
+        return {"waiting": self.waiting(), "running_by_type": self.running_by_type()}
+
+    def _can_start(self, document_type: str, template_name: str, priority: str) -> bool:
+        if self._running >= self.slots:
+            return False
+        if priority == PRIORITY_BATCH and self._running_batch >= self.slots - self.interactive_reserved:
+            return False
+
+        type_limit = self.type_limits.get(document_type)
+        if type_limit is not None and self._running_by_type.get(document_type, 0) >= type_limit:
+            return False
+
+        template_limit = self.template_limits.get(template_name)
+        if template_limit is not None and self._running_by_template.get(template_name, 0) >= template_limit:
+            return False
+
+        return True
+
+    def _take(self, document_type: str, template_name: str, priority: str):
+        self._running += 1
+        if priority == PRIORITY_BATCH:
+            self._running_batch += 1
+        self._running_by_type[document_type] = self._running_by_type.get(document_type, 0) + 1
+        self._running_by_template[template_name] = self._running_by_template.get(template_name, 0) + 1
+
+    def _release(self, document_type: str, template_name: str, priority: str):
+        self._running -= 1
+        if priority == PRIORITY_BATCH:
+            self._running_batch -= 1
+        self._running_by_type[document_type] -= 1
+        self._running_by_template[template_name] -= 1
+        if not self._running_by_template[template_name]:
+            del self._running_by_template[template_name]
+        self._dispatch()
+
+    def _dispatch(self):
+        """Hand free slots to waiting renders, in priority order."""
+        for waiter in list(self._waiters):
+            if self._running >= self.slots:
+                break
+            if waiter.future.done():
+                self._waiters.remove(waiter)
+                continue
+            if self._can_start(waiter.document_type, waiter.template_name, waiter.priority):
+                self._waiters.remove(waiter)
+                self._take(waiter.document_type, waiter.template_name, waiter.priority)
+                waiter.future.set_result(None)
+
+    async def _acquire(self, document_type: str, template_name: str, priority: str):
+        # Every render joins the queue, so a new render can't overtake an
+        # older one that is able to start
+        waiter = _Waiter(
+            rank=PRIORITIES.index(priority),
+            sequence=next(self._sequence),
+            document_type=document_type,
+            template_name=template_name,
+            priority=priority,
+            future=asyncio.get_running_loop().create_future()
+        )
+        self._waiters.append(waiter)
+        self._waiters.sort()
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The slot was handed over just as the caller gave up
+                self._release(document_type, template_name, priority)
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        document_type: str,
+        template_name: str,
+        priority: Optional[str] = None
+    ) -> AsyncIterator[RenderSlot]:
+        """
+        Hold a render slot for the duration of the block.
+
+        The slot is freed when the block exits, unless it was detached and
+        handed to the render job; see RenderSlot.detach.
+
+        Args:
+            document_type: Type of the document being rendered
+            template_name: Name of the template being rendered
+            priority: Priority class; defaults to the priority of the current context
+
+        Yields:
+            The slot, with the priority class the render runs with
+        """
+        priority = priority or current_priority()
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}. Options: {', '.join(PRIORITIES)}")
+
+        with stage("schedule"):
+            await self._acquire(document_type, template_name, priority)
+        render_slot = RenderSlot(self, document_type, template_name, priority)
+        try:
+            yield render_slot
+        finally:
+            if not render_slot._detached:
+                render_slot.release()
+
+
+_render_scheduler: Optional[RenderScheduler] = None
+
+
+def get_render_scheduler() -> RenderScheduler:
+    """
+    Get the render scheduler.
+    Implements a singleton pattern.
+    """
+    global _render_scheduler
+
+    if _render_scheduler is None:
+        _render_scheduler = RenderScheduler(
+            slots=settings.RENDER_MAX_WORKERS,
+            type_limits=settings.RENDER_TYPE_LIMITS,
+            template_limits=settings.RENDER_TEMPLATE_LIMITS,
+            interactive_reserved=settings.RENDER_INTERACTIVE_RESERVED_WORKERS
+        )
+        logger.info(
+            f"Render scheduler started: {_render_scheduler.slots} slots, "
+            f"type limits {_render_scheduler.type_limits}, template limits {_render_scheduler.template_limits}, "
+            f"{_render_scheduler.interactive_reserved} reserved for interactive renders"
+        )
+
+    return _render_scheduler
+
+
+def render_scheduler_stats() -> Optional[Dict[str, Dict[str, int]]]:
+    """Get the statistics of the render scheduler, or None if it hasn't been started."""
+    return _render_scheduler.stats() if _render_scheduler is not None else None
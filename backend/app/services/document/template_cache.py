@@ -0,0 +1,216 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from ...core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class _CacheEntry:
+    """A cached template file and the objects derived from it."""
+    mtime_ns: int
+    size: int
+    content: bytes
+    digest: str
+    derived: Dict[str, Any] = field(default_factory=dict)
+
+
+class TemplateCache:
+    """
+    Process-wide LRU cache of template files.
+
+    Entries are keyed by path and validated against the file's mtime and size
+    on every access, so an edited template is reloaded on the next request.
+    The raw bytes are kept in memory and each caller gets a fresh stream over
+    them, which lets python-docx/python-pptx parse a new, independent object
+    without touching the disk. Objects derived from a template (parsed
+    configs, indexes, schemas) can be cached alongside it and are dropped
+    together with the entry.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+
+    def _load_entry(self, path: Path, key: str) -> _CacheEntry:
+        """Read a template from disk and store it, evicting old entries if needed."""
+        stat = path.stat()
+        content = path.read_bytes()
+        entry = _CacheEntry(
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            content=content,
+            digest=hashlib.sha256(content).hexdigest(),
+        )
+
+        with self._lock:
+            self._discard(key)
+            if len(content) > self.max_bytes:
+                logger.warning(f"Template {path} exceeds the cache budget, not caching it")
+                return entry
+            self._entries[key] = entry
+            self._total_bytes += len(content)
+            while self._total_bytes > self.max_bytes and self._entries:
+                evicted_key, _ = next(iter(self._entries.items()))
+                logger.info(f"Evicting template from cache: {evicted_key}")
+                self._discard(evicted_key)
+
+        logger.info(f"Loaded template into cache: {path} ({len(content)} bytes)")
+        return entry
+
+    def _discard(self, key: str):
+        """Remove an entry from the cache. Must be called with the lock held."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= len(entry.content)
+
+    def _get_entry(self, path: Path) -> _CacheEntry:
+        """Return an up-to-date cache entry for a template."""
+        path = Path(path)
+        key = str(path.resolve())
+        stat = path.stat()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        return self._load_entry(path, key)
+
+    def get_bytes(self, path: Path) -> bytes:
+        """
+        Get the raw content of a template.
+
+        Args:
+            path: Path to the template file
+
+        Returns:
+            The template content
+        """
+        return self._get_entry(path).content
+
+    def open(self, path: Path) -> BytesIO:
+        """
+        Get a fresh in-memory stream over a template's content.
+
+        Args:
+            path: Path to the template file
+
+        Returns:
+            A new stream positioned at the start of the template
+        """
+        return BytesIO(self._get_entry(path).content)
+
+    def get_digest(self, path: Path) -> str:
+        """
+        Get the SHA-256 content hash of a template.
+
+        Args:
+            path: Path to the template file
+
+        Returns:
+            Hex digest of the template content
+        """
+        return self._get_entry(path).digest
+
+    def get_derived(self, path: Path, name: str, builder: Callable[[bytes], T]) -> T:
+        """
+        Get an object derived from a template, building it on first use.
+
+        Derived objects are shared between callers and must be treated as
+        read-only. They are invalidated together with the template.
+
+        Args:
+            path: Path to the template file
+            name: Name identifying the kind of derived object
+            builder: Function building the object from the template content
+
+        Returns:
+            The derived object
+        """
+        return self._derive(self._get_entry(path), name, builder)
+
+    def _derive(self, entry: _CacheEntry, name: str, builder: Callable[[bytes], T]) -> T:
+        """Return a derived object stored on an entry, building it if needed."""
+        if name in entry.derived:
+            return entry.derived[name]
+
+        value = builder(entry.content)
+        with self._lock:
+            entry.derived.setdefault(name, value)
+            return entry.derived[name]
+
+    def open_with_derived(self, path: Path, name: str, builder: Callable[[bytes], T]) -> Tuple[BytesIO, T]:
+        """
+        Get a fresh stream over a template together with a derived object.
+
+        Both come from the same cache entry, so they always describe the same
+        version of the template even if the file changes concurrently.
+
+        Args:
+            path: Path to the template file
+            name: Name identifying the kind of derived object
+            builder: Function building the object from the template content
+
+        Returns:
+            A new stream over the template and the derived object
+        """
+        entry = self._get_entry(path)
+        return BytesIO(entry.content), self._derive(entry, name, builder)
+
+    def invalidate(self, path: Optional[Path] = None):
+        """
+        Drop a template from the cache, or the whole cache if no path is given.
+
+        Args:
+            path: Path to the template file
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._total_bytes = 0
+            else:
+                self._discard(str(Path(path).resolve()))
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache statistics."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_template_cache: Optional[TemplateCache] = None
+
+
+def get_template_cache() -> TemplateCache:
+    """
+    Get the process-wide template cache.
+    Implements a singleton pattern.
+    """
+    global _template_cache
+
+    if _template_cache is None:
+        _template_cache = TemplateCache(settings.TEMPLATE_CACHE_MAX_BYTES)
+
+    return _template_cache
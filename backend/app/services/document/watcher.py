@@ -0,0 +1,156 @@
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ...core.config import settings
+from .base import DocumentService
+
+logger = logging.getLogger(__name__)
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # pragma: no cover - watchdog is optional
+    FileSystemEventHandler = object
+    Observer = None
+
+
+class _WakeOnChange(FileSystemEventHandler):
+    """Wakes the watcher whenever anything changes in a template directory."""
+
+    def __init__(self, wake: threading.Event):
+        super().__init__()
+        self._wake = wake
+
+    def on_any_event(self, event):
+        # Ignore directories and hidden files such as the catalog manifest
+        if not event.is_directory and not Path(event.src_path).name.startswith("."):
+            self._wake.set()
+
+
+class TemplateWatcher:
+    """
+    Keeps the template caches warm while templates are edited.
+
+    A background thread syncs every template directory: it refreshes the
+    template catalog, then loads each template, its placeholder index and
+    schema into the template cache, and drops removed templates from it.
+    Syncs run once at start-up, then whenever a directory changes. Changes
+    are detected with watchdog (inotify on Linux) when it is installed, and
+    by polling otherwise; refreshing the catalog only stats unchanged files,
+    so a poll is cheap.
+
+    Caches are per process, so render workers in a process pool still load
+    templates on their first request.
+    """
+
+    def __init__(self, services: List[DocumentService], poll_interval: float = 2.0, debounce: float = 0.5):
+        self.services = services
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self._known: Dict[str, Dict[str, Path]] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+
+    @property
+    def mode(self) -> str:
+        return "poll" if self._observer is None else "watchdog"
+
+    def start(self):
+        """Start watching in the background, beginning with a full sync."""
+        if Observer is not None:
+            try:
+                observer = Observer()
+                handler = _WakeOnChange(self._wake)
+                for service in self.services:
+                    observer.schedule(handler, str(service.templates_path), recursive=False)
+                observer.start()
+                self._observer = observer
+            except Exception as e:
+                logger.warning(f"Cannot watch template directories, polling instead: {e}")
+
+        self._thread = threading.Thread(target=self._run, name="template-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Template watcher started ({self.mode})")
+
+    def stop(self):
+        """Stop watching and wait for the background thread to finish."""
+        self._stop.set()
+        self._wake.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        logger.info("Template watcher stopped")
+
+    def _run(self):
+        timeout = self.poll_interval if self._observer is None else None
+        while not self._stop.is_set():
+            self.sync()
+            self._wake.wait(timeout)
+            # Let editors finish writing before reading the files
+            if self._wake.is_set() and self._stop.wait(self.debounce):
+                break
+            self._wake.clear()
+
+    def sync(self):
+        """Bring the caches of every template directory up to date."""
+        for service in self.services:
+            try:
+                self._sync_service(service)
+            except Exception as e:
+                logger.exception(f"Failed to sync templates in {service.templates_path}: {e}")
+
+    def _sync_service(self, service: DocumentService):
+        """Bring the caches of one template directory up to date."""
+        entries = service.catalog.refresh(service)
+        current = {name: service.templates_path / entry["file"] for name, entry in entries.items()}
+
+        previous = self._known.get(service.document_type, {})
+        for template_name in previous.keys() - current.keys():
+            logger.info(f"Template removed: {previous[template_name]}")
+            service.template_cache.invalidate(previous[template_name])
+            service.template_cache.invalidate(service._get_schema_path(template_name))
+
+        for template_name in current:
+            try:
+                service.warm_template(template_name)
+            except Exception as e:
+                logger.error(f"Failed to load template {template_name}: {e}")
+
+        self._known[service.document_type] = current
+
+
+_template_watcher: Optional[TemplateWatcher] = None
+
+
+def start_template_watcher() -> Optional[TemplateWatcher]:
+    """
+    Start the template watcher if it is enabled.
+    Implements a singleton pattern.
+    """
+    global _template_watcher
+
+    if _template_watcher is None and settings.TEMPLATE_WATCHER_ENABLED:
+        from . import get_document_service
+
+        services = [get_document_service(document_type) for document_type in ("docx", "pptx", "pdf")]
+        _template_watcher = TemplateWatcher(services, poll_interval=settings.TEMPLATE_WATCHER_POLL_SECONDS)
+        _template_watcher.start()
+
+    return _template_watcher
+
+
+def stop_template_watcher():
+    """Stop the template watcher if it was started."""
+    global _template_watcher
+
+    if _template_watcher is not None:
+        _template_watcher.stop()
+        _template_watcher = None
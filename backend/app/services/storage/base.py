@@ -6,6 +6,8 @@ from pathlib import Path
 class StorageService(ABC):
     """Base abstract class for storage services."""
     
+    provider: str = ""
+    
     @abstractmethod
     async def upload_file(self, file_path: Path, destination_path: str) -> str:
         """
@@ -7,6 +7,8 @@ from typing import BinaryIO, List, Dict, Any, Optional
 import mimetypes
 
 from ...core.config import settings
+from ...core.metrics import observe_storage_operation
+from ...core.timing import stage
 from .base import StorageService
 
 logger = logging.getLogger(__name__)
@@ -16,6 +18,8 @@ class LocalStorageService(StorageService):
     Local storage service for uploading, downloading, and managing files on the local file system.
     """
     
+    provider = "local"
+    
     def __init__(self):
         self.storage_path = Path(settings.LOCAL_STORAGE_PATH)
         
@@ -32,6 +36,7 @@ class LocalStorageService(StorageService):
         normalized_path = path.lstrip('/')
         return self.storage_path / normalized_path
     
+    @observe_storage_operation
     async def upload_file(self, file_path: Path, destination_path: str) -> str:
         """
         Upload a file to local storage.
@@ -54,12 +59,14 @@ class LocalStorageService(StorageService):
         dest_full_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Copy the file
-        shutil.copy2(file_path, dest_full_path)
+        with stage("disk"):
+            shutil.copy2(file_path, dest_full_path)
         logger.info(f"File uploaded from {file_path} to {dest_full_path}")
         
         # Return a file:// URL
         return f"file://{dest_full_path.absolute()}"
     
+    @observe_storage_operation
     async def upload_stream(self, file_stream: BinaryIO, destination_path: str, content_type: str) -> str:
         """
         Upload a file from a binary stream to local storage.
@@ -79,7 +86,7 @@ class LocalStorageService(StorageService):
         dest_full_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Write the file from the stream
-        with open(dest_full_path, 'wb') as f:
+        with stage("disk"), open(dest_full_path, 'wb') as f:
             # Read the stream in chunks to handle large files
             chunk_size = 1024 * 1024  # 1MB chunks
             chunk = file_stream.read(chunk_size)
@@ -92,6 +99,7 @@ class LocalStorageService(StorageService):
         # Return a file:// URL
         return f"file://{dest_full_path.absolute()}"
     
+    @observe_storage_operation
     async def download_file(self, file_path: str, destination_path: Path) -> Path:
         """
         Download a file from local storage.
@@ -119,6 +127,7 @@ class LocalStorageService(StorageService):
         
         return destination_path
     
+    @observe_storage_operation
     async def get_file_url(self, file_path: str) -> str:
         """
         Get the URL for a file in local storage.
@@ -137,6 +146,7 @@ class LocalStorageService(StorageService):
         
         return f"file://{full_path.absolute()}"
     
+    @observe_storage_operation
     async def list_files(self, folder_path: str) -> List[Dict[str, Any]]:
         """
         List files in a folder.
@@ -180,6 +190,7 @@ class LocalStorageService(StorageService):
         
         return files_list
     
+    @observe_storage_operation
     async def delete_file(self, file_path: str) -> bool:
         """
         Delete a file from local storage.
@@ -209,6 +220,7 @@ class LocalStorageService(StorageService):
             logger.error(f"Error deleting {file_full_path}: {str(e)}")
             return False
     
+    @observe_storage_operation
     async def create_folder(self, folder_path: str) -> str:
         """
         Create a folder in local storage.
@@ -227,6 +239,7 @@ class LocalStorageService(StorageService):
         
         return str(folder_full_path)
     
+    @observe_storage_operation
     async def folder_exists(self, folder_path: str) -> bool:
         """
         Check if a folder exists in local storage.
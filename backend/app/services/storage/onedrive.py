@@ -1,5 +1,6 @@
 import os
 import json
+import asyncio
 import requests
 import logging
 from datetime import datetime, timedelta
@@ -13,6 +14,8 @@ from cryptography.hazmat.primitives.serialization import pkcs12
 import jwt
 
 from ...core.config import settings
+from ...core.metrics import observe_storage_operation
+from ...core.timing import stage
 from .base import StorageService
 
 logger = logging.getLogger(__name__)
@@ -23,6 +26,8 @@ class OneDriveStorageService(StorageService):
     Uses certificate-based authentication with Azure AD.
     """
     
+    provider = "onedrive"
+    
     def __init__(self):
         self.tenant_id = settings.AZURE_TENANT_ID
         self.client_id = settings.AZURE_CLIENT_ID
@@ -99,7 +104,7 @@ class OneDriveStorageService(StorageService):
             "scope": "https://graph.microsoft.com/.default"
         }
         
-        response = requests.post(token_url, data=token_data)
+        response = await self._request("POST", token_url, data=token_data)
         
         if response.status_code == 200:
             token_data = response.json()
@@ -112,6 +117,11 @@ class OneDriveStorageService(StorageService):
             logger.error(f"Failed to get access token: {response.status_code} - {response.text}")
             raise Exception(f"Failed to get access token: {response.status_code} - {response.text}")
     
+    async def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send an HTTP request to Microsoft Graph without blocking the event loop."""
+        with stage("graph"):
+            return await asyncio.to_thread(requests.request, method, url, **kwargs)
+    
     def _get_headers(self, token: str, content_type: Optional[str] = "application/json") -> Dict[str, str]:
         """Get the headers for a request."""
         headers = {
@@ -129,7 +139,7 @@ class OneDriveStorageService(StorageService):
         
         # Get the drives for the site
         url = f"https://graph.microsoft.com/v1.0/sites/root/drives"
-        response = requests.get(url, headers=self._get_headers(token))
+        response = await self._request("GET", url, headers=self._get_headers(token))
         
         if response.status_code != 200:
             logger.error(f"Failed to get drives: {response.status_code} - {response.text}")
@@ -150,7 +160,7 @@ class OneDriveStorageService(StorageService):
         
         # Check if the root folder exists
         url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root:/{self.root_folder}"
-        response = requests.get(url, headers=self._get_headers(token))
+        response = await self._request("GET", url, headers=self._get_headers(token))
         
         if response.status_code == 200:
             # Folder exists, return its ID
@@ -165,7 +175,7 @@ class OneDriveStorageService(StorageService):
             "@microsoft.graph.conflictBehavior": "rename"
         }
         
-        response = requests.post(url, headers=self._get_headers(token), json=data)
+        response = await self._request("POST", url, headers=self._get_headers(token), json=data)
         
         if response.status_code not in [201, 200]:
             logger.error(f"Failed to create root folder: {response.status_code} - {response.text}")
@@ -173,6 +183,7 @@ class OneDriveStorageService(StorageService):
         
         return response.json()["id"]
     
+    @observe_storage_operation
     async def upload_file(self, file_path: Path, destination_path: str) -> str:
         """
         Upload a file to OneDrive.
@@ -188,18 +199,16 @@ class OneDriveStorageService(StorageService):
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        # Get file data
-        with open(file_path, "rb") as f:
-            file_data = f.read()
-        
         # Get MIME type
         content_type, _ = mimetypes.guess_type(str(file_path))
         if not content_type:
             content_type = "application/octet-stream"
         
-        # Upload using stream method
-        return await self.upload_stream(file_data, destination_path, content_type)
+        # Upload using stream method, sending the file as it is read
+        with open(file_path, "rb") as f:
+            return await self.upload_stream(f, destination_path, content_type)
     
+    @observe_storage_operation
     async def upload_stream(self, file_stream: BinaryIO, destination_path: str, content_type: str) -> str:
         """
         Upload a file stream to OneDrive.
@@ -236,13 +245,9 @@ class OneDriveStorageService(StorageService):
         
         headers = self._get_headers(token, content_type)
         
-        # Convert to bytes if it's a file-like object
-        if hasattr(file_stream, 'read') and callable(file_stream.read):
-            file_data = file_stream.read()
-        else:
-            file_data = file_stream
-        
-        response = requests.put(url, headers=headers, data=file_data)
+        # File-like objects are streamed by requests in blocks, so the file
+        # is never held in memory as a whole
+        response = await self._request("PUT", url, headers=headers, data=file_stream)
         
         if response.status_code not in [200, 201]:
             logger.error(f"Failed to upload file: {response.status_code} - {response.text}")
@@ -251,6 +256,7 @@ class OneDriveStorageService(StorageService):
         # Return the webUrl from the response
         return response.json().get("webUrl", "")
     
+    @observe_storage_operation
     async def download_file(self, file_path: str, destination_path: Path) -> Path:
         """
         Download a file from OneDrive.
@@ -268,7 +274,7 @@ class OneDriveStorageService(StorageService):
         # Build the download URL
         url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root:/{self.root_folder}/{file_path}:/content"
         
-        response = requests.get(url, headers=self._get_headers(token, None))
+        response = await self._request("GET", url, headers=self._get_headers(token, None))
         
         if response.status_code != 200:
             logger.error(f"Failed to download file: {response.status_code} - {response.text}")
@@ -283,6 +289,7 @@ class OneDriveStorageService(StorageService):
         
         return destination_path
     
+    @observe_storage_operation
     async def get_file_url(self, file_path: str) -> str:
         """
         Get a URL for a file in OneDrive.
@@ -299,7 +306,7 @@ class OneDriveStorageService(StorageService):
         # Build the URL
         url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root:/{self.root_folder}/{file_path}"
         
-        response = requests.get(url, headers=self._get_headers(token))
+        response = await self._request("GET", url, headers=self._get_headers(token))
         
         if response.status_code != 200:
             logger.error(f"Failed to get file URL: {response.status_code} - {response.text}")
@@ -307,6 +314,7 @@ class OneDriveStorageService(StorageService):
         
         return response.json().get("webUrl", "")
     
+    @observe_storage_operation
     async def list_files(self, folder_path: str) -> List[Dict[str, Any]]:
         """
         List files in a folder.
@@ -324,7 +332,7 @@ class OneDriveStorageService(StorageService):
         path = f"{self.root_folder}/{folder_path}" if folder_path else self.root_folder
         url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root:/{path}:/children"
         
-        response = requests.get(url, headers=self._get_headers(token))
+        response = await self._request("GET", url, headers=self._get_headers(token))
         
         if response.status_code != 200:
             logger.error(f"Failed to list files: {response.status_code} - {response.text}")
@@ -332,6 +340,7 @@ class OneDriveStorageService(StorageService):
         
         return response.json().get("value", [])
     
+    @observe_storage_operation
     async def delete_file(self, file_path: str) -> bool:
         """
         Delete a file from OneDrive.
@@ -348,7 +357,7 @@ class OneDriveStorageService(StorageService):
         # Build the URL
         url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root:/{self.root_folder}/{file_path}"
         
-        response = requests.delete(url, headers=self._get_headers(token))
+        response = await self._request("DELETE", url, headers=self._get_headers(token))
         
         if response.status_code == 204:
             return True
@@ -356,6 +365,7 @@ class OneDriveStorageService(StorageService):
         logger.error(f"Failed to delete file: {response.status_code} - {response.text}")
         return False
     
+    @observe_storage_operation
     async def create_folder(self, folder_path: str) -> str:
         """
         Create a folder in OneDrive.
@@ -385,7 +395,7 @@ class OneDriveStorageService(StorageService):
             
             # Check if the folder exists
             url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root:/{current_path}"
-            response = requests.get(url, headers=self._get_headers(token))
+            response = await self._request("GET", url, headers=self._get_headers(token))
             
             if response.status_code == 200:
                 # Folder exists, get its ID
@@ -404,7 +414,7 @@ class OneDriveStorageService(StorageService):
                 "@microsoft.graph.conflictBehavior": "rename"
             }
             
-            response = requests.post(url, headers=self._get_headers(token), json=data)
+            response = await self._request("POST", url, headers=self._get_headers(token), json=data)
             
             if response.status_code not in [201, 200]:
                 logger.error(f"Failed to create folder: {response.status_code} - {response.text}")
@@ -414,6 +424,7 @@ class OneDriveStorageService(StorageService):
         
         return parent_id
     
+    @observe_storage_operation
     async def folder_exists(self, folder_path: str) -> bool:
         """
         Check if a folder exists in OneDrive.
@@ -431,6 +442,6 @@ class OneDriveStorageService(StorageService):
         path = f"{self.root_folder}/{folder_path}" if folder_path else self.root_folder
         url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root:/{path}"
         
-        response = requests.get(url, headers=self._get_headers(token))
+        response = await self._request("GET", url, headers=self._get_headers(token))
         
         return response.status_code == 200 
\ No newline at end of file
@@ -0,0 +1,253 @@
+"""
+End-to-end benchmark for document generation.
+
+Builds synthetic DOCX, PPTX and PDF templates of growing size (paragraphs,
+slides or sections) and placeholder key counts, then times
+DocumentService.generate_document through the configured render executor.
+Every case reports latency percentiles, throughput and the peak RSS of the
+process so far, and all results are written to a JSON file so runs can be
+compared over time.
+
+The output cache is disabled so every request really renders.
+
+Usage (from the backend directory):
+    python benchmarks/bench_generation.py [--formats docx pptx pdf]
+        [--sizes 10 100 1000] [--keys 10 100 500] [--iterations 20]
+        [--concurrency 1] [--executor thread] [--no-ooxml-fast-path]
+        [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def placeholder_line(i, key_count):
+    """A line of text referencing three of the data keys."""
+    keys = [f"field_{(i * 3 + j) % key_count}" for j in range(3)]
+    return "Lorem ipsum " + " and ".join(f"{{{{{key}}}}}" for key in keys) + " dolor sit amet."
+
+
+def build_docx(path, size, key_count):
+    from docx import Document
+
+    doc = Document()
+    doc.add_heading("Benchmark {{field_0}}", 0)
+    for i in range(size):
+        doc.add_paragraph(placeholder_line(i, key_count))
+        if i % 10 == 9:
+            table = doc.add_table(rows=2, cols=2)
+            for row_idx, row in enumerate(table.rows):
+                for col_idx, cell in enumerate(row.cells):
+                    cell.text = placeholder_line(i + row_idx * 2 + col_idx, key_count)
+    doc.save(path)
+
+
+def build_pptx(path, size, key_count):
+    from pptx import Presentation
+    from pptx.util import Inches
+
+    prs = Presentation()
+    layout = prs.slide_layouts[5]
+    for i in range(size):
+        slide = prs.slides.add_slide(layout)
+        slide.shapes.title.text = f"Slide {i} for {{{{field_{i % key_count}}}}}"
+        body = slide.shapes.add_textbox(Inches(1), Inches(2), Inches(8), Inches(4)).text_frame
+        body.text = placeholder_line(i, key_count)
+        body.add_paragraph().text = "Plain text without any placeholders."
+    prs.save(path)
+
+
+def build_pdf(path, size, key_count):
+    sections = [{"type": "title", "content": "Benchmark {{field_0}}"}]
+    for i in range(size):
+        if i % 10 == 9:
+            sections.append({
+                "type": "table",
+                "header": ["Metric", "Value"],
+                "rows": [[f"Row {j}", placeholder_line(i + j, key_count)] for j in range(3)],
+            })
+        else:
+            sections.append({"type": "paragraph", "content": placeholder_line(i, key_count)})
+    Path(path).write_text(json.dumps({"sections": sections}))
+
+
+BUILDERS = {
+    "docx": (build_docx, "docx"),
+    "pptx": (build_pptx, "pptx"),
+    "pdf": (build_pdf, "json"),
+}
+
+
+def percentile(values, pct):
+    """Percentile with linear interpolation between the closest ranks."""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+async def run_case(document_service, template_name, key_count, iterations, warmup, concurrency):
+    """Time repeated generations of one template and summarize them."""
+    latencies = []
+    sizes = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def generate(run):
+        # Vary the data per run, as real requests would
+        data = {f"field_{i}": f"value {i} of run {run}" for i in range(key_count)}
+        async with semaphore:
+            started = time.perf_counter()
+            buffer = BytesIO()
+            await document_service.generate_document(template_name, data, output_stream=buffer)
+            elapsed = time.perf_counter() - started
+        return elapsed, buffer.getbuffer().nbytes
+
+    for run in range(warmup):
+        await generate(-1 - run)
+
+    started = time.perf_counter()
+    for elapsed, size in await asyncio.gather(*(generate(run) for run in range(iterations))):
+        latencies.append(elapsed * 1000)
+        sizes.append(size)
+    wall = time.perf_counter() - started
+
+    return {
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p90_ms": round(percentile(latencies, 90), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(max(latencies), 2),
+        "throughput_per_s": round(iterations / wall, 2),
+        "output_bytes": int(statistics.median(sizes)),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+async def run_benchmarks(args, template_root):
+    from app.services.document import get_document_service
+    from app.services.document.executor import shutdown_render_executor
+
+    results = []
+    print(f"{'format':>6} {'size':>6} {'keys':>5} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'docs/s':>8} {'rss MiB':>8}")
+    try:
+        for document_type in args.formats:
+            builder, extension = BUILDERS[document_type]
+            document_service = get_document_service(document_type)
+            for size in args.sizes:
+                for key_count in args.keys:
+                    template_name = f"bench_{size}_{key_count}"
+                    builder(template_root / document_type / f"{template_name}.{extension}", size, key_count)
+                    summary = await run_case(
+                        document_service, template_name, key_count,
+                        args.iterations, args.warmup, args.concurrency
+                    )
+                    results.append({"format": document_type, "size": size, "keys": key_count, **summary})
+                    print(
+                        f"{document_type:>6} {size:>6} {key_count:>5} {summary['p50_ms']:>9.1f} "
+                        f"{summary['p90_ms']:>9.1f} {summary['p99_ms']:>9.1f} "
+                        f"{summary['throughput_per_s']:>8.1f} {summary['peak_rss_mb']:>8.1f}"
+                    )
+    finally:
+        shutdown_render_executor()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--formats", nargs="+", choices=sorted(BUILDERS), default=["docx", "pptx", "pdf"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10, 100, 1000],
+                        help="Paragraphs, slides or sections per template")
+    parser.add_argument("--keys", nargs="+", type=int, default=[10, 100, 500], help="Placeholder keys per template")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed generations per case")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed generations per case")
+    parser.add_argument("--concurrency", type=int, default=1, help="Generations in flight at once")
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread", help="Render executor kind")
+    parser.add_argument("--workers", type=int, default=4, help="Render executor workers")
+    parser.add_argument("--no-ooxml-fast-path", dest="ooxml_fast_path", action="store_false",
+                        help="Render DOCX/PPTX through the python-docx/python-pptx object model")
+    parser.add_argument("--output", type=Path, help="Results file (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args()
+
+    started_at = datetime.now(timezone.utc)
+    with tempfile.TemporaryDirectory(prefix="nexus-bench-") as workdir:
+        template_root = Path(workdir)
+        for document_type in BUILDERS:
+            (template_root / document_type).mkdir()
+
+        # Settings are read when the app modules are first imported
+        os.environ.update({
+            "DOCX_TEMPLATES_PATH": str(template_root / "docx"),
+            "PPTX_TEMPLATES_PATH": str(template_root / "pptx"),
+            "PDF_TEMPLATES_PATH": str(template_root / "pdf"),
+            "STORAGE_PROVIDER": "local",
+            "LOCAL_STORAGE_PATH": str(template_root / "output"),
+            "OUTPUT_CACHE_MAX_BYTES": "0",
+            "RENDER_EXECUTOR": args.executor,
+            "RENDER_MAX_WORKERS": str(args.workers),
+            "OOXML_FAST_PATH_ENABLED": str(args.ooxml_fast_path).lower(),
+        })
+
+        results = asyncio.run(run_benchmarks(args, template_root))
+
+    report = {
+        "started_at": started_at.isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parameters": {
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "executor": args.executor,
+            "workers": args.workers,
+            "ooxml_fast_path": args.ooxml_fast_path,
+        },
+        "results": results,
+    }
+
+    output = args.output or RESULTS_DIR / f"generation-{started_at.strftime('%Y%m%dT%H%M%SZ')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
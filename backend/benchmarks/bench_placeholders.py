@@ -0,0 +1,74 @@
+"""
+Micro-benchmark for placeholder substitution.
+
+Compares the legacy per-key replace loop against the shared single-pass
+PlaceholderSubstituter as the number of data keys grows.
+
+Usage (from the backend directory):
+    python benchmarks/bench_placeholders.py [--nodes 2000] [--repeat 5]
+"""
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.document.placeholders import PlaceholderSubstituter
+
+
+def legacy_substitute(text, data):
+    """The per-key loop the document services used before the shared engine."""
+    for key, value in data.items():
+        placeholder = f"{{{{{key}}}}}"
+        if placeholder in text:
+            text = text.replace(placeholder, str(value))
+    return text
+
+
+def build_workload(key_count, node_count):
+    """Build a data payload and text nodes that reference a few keys each."""
+    data = {f"field_{i}": f"value {i}" for i in range(key_count)}
+    nodes = []
+    for i in range(node_count):
+        if i % 4 == 0:
+            keys = [f"field_{(i + j) % key_count}" for j in range(3)]
+            nodes.append("Lorem ipsum " + " and ".join(f"{{{{{k}}}}}" for k in keys) + " dolor sit amet.")
+        else:
+            nodes.append("Plain paragraph text without any placeholders in it.")
+    return data, nodes
+
+
+def run_legacy(data, nodes):
+    for text in nodes:
+        if "{{" in text:
+            legacy_substitute(text, data)
+
+
+def run_engine(data, nodes):
+    substituter = PlaceholderSubstituter(data)
+    for text in nodes:
+        substituter.substitute(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=2000, help="Text nodes per document")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    print(f"{'keys':>6} {'legacy ms':>12} {'engine ms':>12} {'speedup':>9}")
+    for key_count in (10, 30, 100, 200, 500):
+        data, nodes = build_workload(key_count, args.nodes)
+
+        # Sanity check: both implementations must agree
+        substituter = PlaceholderSubstituter(data)
+        assert all(legacy_substitute(t, data) == substituter.substitute(t) for t in nodes)
+
+        legacy = min(timeit.repeat(lambda: run_legacy(data, nodes), number=1, repeat=args.repeat))
+        engine = min(timeit.repeat(lambda: run_engine(data, nodes), number=1, repeat=args.repeat))
+        print(f"{key_count:>6} {legacy * 1000:>12.2f} {engine * 1000:>12.2f} {legacy / engine:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
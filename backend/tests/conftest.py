@@ -0,0 +1,20 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+TEMPLATES_DIR = BACKEND_DIR / "data" / "templates"
+
+# Configure the app before any of its modules read the settings
+_scratch = tempfile.mkdtemp(prefix="nexus-tests-")
+os.environ.setdefault("STORAGE_PROVIDER", "local")
+os.environ.setdefault("LOCAL_STORAGE_PATH", os.path.join(_scratch, "storage"))
+os.environ.setdefault("JOB_STORE_PATH", os.path.join(_scratch, "jobs.sqlite3"))
+os.environ.setdefault("DOCX_TEMPLATES_PATH", str(TEMPLATES_DIR / "docx"))
+os.environ.setdefault("PPTX_TEMPLATES_PATH", str(TEMPLATES_DIR / "pptx"))
+os.environ.setdefault("PDF_TEMPLATES_PATH", str(TEMPLATES_DIR / "pdf"))
+os.environ.setdefault("PDF_HTML_BYTECODE_CACHE_PATH", os.path.join(_scratch, "pdf_html"))
+os.environ.setdefault("TEMPLATE_WATCHER_ENABLED", "false")
+
+sys.path.insert(0, str(BACKEND_DIR))
@@ -0,0 +1,129 @@
+import asyncio
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.core.admission import AdmissionController, AdmissionMiddleware, AdmissionRejectedError
+
+
+def test_rejects_requests_over_the_byte_limit():
+    async def main():
+        controller = AdmissionController("test", max_in_flight=1, max_bytes=100)
+        with pytest.raises(AdmissionRejectedError) as rejected:
+            async with controller.admit(101):
+                pass
+        assert rejected.value.status_code == 413
+        assert rejected.value.retry_after is None
+
+    asyncio.run(main())
+
+
+def test_rejects_when_the_queue_is_full():
+    async def main():
+        controller = AdmissionController("test", max_in_flight=1, max_queued=1, retry_after=7)
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.admit():
+                await release.wait()
+
+        tasks = [asyncio.create_task(hold()) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        assert (controller.in_flight, controller.queued) == (1, 1)
+
+        with pytest.raises(AdmissionRejectedError) as rejected:
+            async with controller.admit():
+                pass
+        assert rejected.value.status_code == 429
+        assert rejected.value.retry_after == 7
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert (controller.in_flight, controller.queued) == (0, 0)
+
+    asyncio.run(main())
+
+
+def test_rejects_after_the_queue_timeout():
+    async def main():
+        controller = AdmissionController("test", max_in_flight=1, max_queued=1, queue_timeout=0.05)
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.admit():
+                await release.wait()
+
+        task = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        with pytest.raises(AdmissionRejectedError) as rejected:
+            async with controller.admit():
+                pass
+        assert rejected.value.status_code == 503
+        assert controller.queued == 0
+
+        release.set()
+        await task
+
+    asyncio.run(main())
+
+
+def test_byte_budget_holds_back_requests():
+    async def main():
+        controller = AdmissionController("test", max_in_flight=4, max_queued=4, max_bytes=100)
+        release = asyncio.Event()
+        admitted = []
+
+        async def hold(size):
+            async with controller.admit(size):
+                admitted.append(size)
+                await release.wait()
+
+        tasks = [asyncio.create_task(hold(60)), asyncio.create_task(hold(60))]
+        await asyncio.sleep(0.01)
+        assert admitted == [60]
+        assert controller.bytes_in_flight == 60
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert admitted == [60, 60]
+        assert controller.bytes_in_flight == 0
+
+    asyncio.run(main())
+
+
+def _app(controller: AdmissionController) -> AdmissionMiddleware:
+    async def upload(request: Request):
+        body = await request.body()
+        return JSONResponse({"size": len(body), "bytes_in_flight": controller.bytes_in_flight})
+
+    return AdmissionMiddleware(Starlette(routes=[Route("/upload", upload, methods=["POST"])]), {"/upload": controller})
+
+
+def test_middleware_counts_chunked_bodies():
+    async def main():
+        controller = AdmissionController("test", max_in_flight=2, max_bytes=1000)
+
+        async def chunks(count):
+            for _ in range(count):
+                yield b"x" * 100
+
+        transport = httpx.ASGITransport(app=_app(controller))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/upload", content=chunks(5))
+            assert response.status_code == 200
+            # The chunked body was counted against the budget while the request was in flight
+            assert response.json() == {"size": 500, "bytes_in_flight": 500}
+
+            response = await client.post("/upload", content=chunks(20))
+            assert response.status_code == 413
+
+            response = await client.post("/upload", content=b"x" * 2000)
+            assert response.status_code == 413
+
+        assert (controller.in_flight, controller.bytes_in_flight) == (0, 0)
+
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+import io
+import json
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+
+BATCH_URL = "/api/v1/documents/generate-batch?template_name=business_summary&document_type=pdf"
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def _manifest(response):
+    assert response.status_code == 200
+    return json.loads(zipfile.ZipFile(io.BytesIO(response.content)).read("manifest.json"))
+
+
+def test_batch_from_json_array(client):
+    manifest = _manifest(client.post(BATCH_URL, json=[{"business_name": "A"}, {"business_name": "B"}]))
+    assert [entry["status"] for entry in manifest] == ["ok", "ok"]
+
+
+def test_batch_from_ndjson(client):
+    body = b'{"business_name": "A"}\n\n{"business_name": "B"}\n{"business_name": "C"}'
+    response = client.post(BATCH_URL, content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert len(_manifest(response)) == 3
+
+
+def test_batch_limits(client, monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_MAX_RECORDS", 2)
+    response = client.post(BATCH_URL, json=[{}, {}, {}])
+    assert response.status_code == 413
+
+    monkeypatch.setattr(settings, "BATCH_MAX_BYTES", 100)
+    response = client.post(BATCH_URL, content=b"{}\n" * 50, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 413
+
+
+def test_batch_body_must_be_a_list(client):
+    assert client.post(BATCH_URL, json={"business_name": "A"}).status_code == 400
@@ -0,0 +1,47 @@
+import io
+import json
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+DOCUMENTS = [
+    {"document_type": "pdf", "template_name": "business_summary"},
+    {"document_type": "docx", "template_name": "business_plan"},
+]
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def test_bundle_without_storage_returns_a_zip(client):
+    response = client.post("/api/v1/documents/bundle", json={"documents": DOCUMENTS, "data": {"business_name": "Acme"}})
+    assert response.status_code == 200
+    assert int(response.headers["content-length"]) == len(response.content)
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    manifest = json.loads(archive.read("manifest.json"))
+    assert [entry["status"] for entry in manifest] == ["ok", "ok"]
+    assert len(archive.namelist()) == 3
+
+
+def test_bundle_with_storage_returns_a_manifest(client):
+    response = client.post(
+        "/api/v1/documents/bundle",
+        json={"documents": DOCUMENTS, "data": {"business_name": "Acme"}, "storage_folder": "bundles/acme"}
+    )
+    assert response.status_code == 200
+    assert [entry["storage_path"] for entry in response.json()["documents"]] == [
+        "bundles/acme/business_summary.pdf", "bundles/acme/business_plan.docx"
+    ]
+
+
+def test_bundle_mixing_stored_and_unstored_documents_is_rejected(client):
+    documents = [{**DOCUMENTS[0], "storage_path": "bundles/acme/summary.pdf"}, DOCUMENTS[1]]
+    response = client.post("/api/v1/documents/bundle", json={"documents": documents, "data": {}})
+    assert response.status_code == 422
+    assert "business_plan.docx" in response.json()["detail"]
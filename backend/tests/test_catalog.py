@@ -0,0 +1,88 @@
+import json
+
+import pytest
+from docx import Document
+
+from app.services.document import catalog as catalog_module
+from app.services.document.catalog import CATALOG_FILENAME, CATALOG_VERSION, TemplateCatalog
+from app.services.document.docx import DocxDocumentService
+from app.services.document.template_cache import TemplateCache
+
+
+def _service(templates_path):
+    service = DocxDocumentService()
+    service.templates_path = templates_path
+    service.template_cache = TemplateCache(max_bytes=64 * 1024 * 1024)
+    return service
+
+
+def _write_template(path, text):
+    document = Document()
+    document.add_paragraph(text)
+    document.save(path)
+
+
+def test_catalog_is_written_and_reused(tmp_path, monkeypatch):
+    _write_template(tmp_path / "plan.docx", "Plan for {{business_name}}")
+    service = _service(tmp_path)
+
+    entries = TemplateCatalog(tmp_path).refresh(service)
+    assert entries["plan"]["placeholders"] == ["business_name"]
+
+    manifest = json.loads((tmp_path / CATALOG_FILENAME).read_text())
+    assert manifest["version"] == CATALOG_VERSION
+    assert manifest["templates"]["plan"]["hash"] == entries["plan"]["hash"]
+    assert list(tmp_path.glob(f"{CATALOG_FILENAME}.*.tmp")) == []
+
+    # A new catalog reads the manifest instead of opening the unchanged template
+    def build_entry(*args):
+        raise AssertionError("template was described again")
+
+    monkeypatch.setattr(TemplateCatalog, "_build_entry", build_entry)
+    assert TemplateCatalog(tmp_path).refresh(service) == entries
+    monkeypatch.undo()
+
+    # A changed template is described again and the manifest follows
+    _write_template(tmp_path / "plan.docx", "Plan for {{tagline}}")
+    entries = TemplateCatalog(tmp_path).refresh(service)
+    assert entries["plan"]["placeholders"] == ["tagline"]
+    manifest = json.loads((tmp_path / CATALOG_FILENAME).read_text())
+    assert manifest["templates"]["plan"]["placeholders"] == ["tagline"]
+
+
+def test_catalog_stays_in_memory_when_directory_is_read_only(tmp_path, monkeypatch):
+    _write_template(tmp_path / "plan.docx", "Plan for {{business_name}}")
+    service = _service(tmp_path)
+
+    # Permission bits don't stop root, so fail the write itself
+    writes = []
+
+    def replace(source, destination):
+        writes.append(destination)
+        raise PermissionError(13, "Read-only file system", str(destination))
+
+    monkeypatch.setattr(catalog_module.os, "replace", replace)
+
+    catalog = TemplateCatalog(tmp_path)
+    entries = catalog.refresh(service)
+    assert entries["plan"]["placeholders"] == ["business_name"]
+    assert not (tmp_path / CATALOG_FILENAME).exists()
+    assert list(tmp_path.glob(f"{CATALOG_FILENAME}.*.tmp")) == []
+    assert len(writes) == 1
+
+    # Later changes are still picked up, without trying to write again
+    _write_template(tmp_path / "deck.docx", "{{tagline}}")
+    entries = catalog.refresh(service)
+    assert sorted(entries) == ["deck", "plan"]
+    assert len(writes) == 1
+
+
+@pytest.mark.parametrize("content", ["not json", json.dumps({"version": CATALOG_VERSION + 1, "templates": {}})])
+def test_unusable_catalog_is_rebuilt(tmp_path, content):
+    _write_template(tmp_path / "plan.docx", "Plan for {{business_name}}")
+    (tmp_path / CATALOG_FILENAME).write_text(content)
+
+    entries = TemplateCatalog(tmp_path).refresh(_service(tmp_path))
+    assert entries["plan"]["placeholders"] == ["business_name"]
+    manifest = json.loads((tmp_path / CATALOG_FILENAME).read_text())
+    assert manifest["version"] == CATALOG_VERSION
@@ -0,0 +1,101 @@
+import asyncio
+import io
+import math
+import threading
+import uuid
+
+import pytest
+
+from app.core.timing import StageTimer, use_timer
+from app.services.document import get_document_service
+from app.services.document.executor import RenderExecutor, RenderTimeoutError
+
+
+async def _until(condition):
+    for _ in range(500):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition was not met")
+
+
+def test_timed_out_job_keeps_its_worker():
+    async def main():
+        executor = RenderExecutor("thread", max_workers=1, timeout=0.05)
+        release = threading.Event()
+        finished = []
+        try:
+            with pytest.raises(RenderTimeoutError):
+                await executor.run(release.wait, on_finished=lambda: finished.append(True))
+
+            # The caller gave up, but the worker is still busy with the job
+            assert executor.pending == 1
+            assert finished == []
+
+            release.set()
+            await _until(lambda: finished)
+            assert executor.pending == 0
+        finally:
+            release.set()
+            executor.shutdown()
+
+    asyncio.run(main())
+
+
+def test_process_pool_renders_in_a_worker_process():
+    async def main():
+        executor = RenderExecutor("process", max_workers=1, timeout=60)
+        try:
+            assert await executor.run(math.factorial, 5) == 120
+
+            # Unique data, so the document isn't served from the output cache
+            output = io.BytesIO()
+            with use_timer(StageTimer()) as timer:
+                result = await executor.render(
+                    get_document_service("pdf"), "business_summary", {"business_name": uuid.uuid4().hex},
+                    output_stream=output
+                )
+            assert result is output
+            assert output.getvalue().startswith(b"%PDF")
+            # Stages timed in the worker are added to the caller's timer
+            assert {"render"} <= timer.durations.keys()
+        finally:
+            executor.shutdown()
+
+    asyncio.run(main())
+
+
+def test_shutdown_cancels_jobs_that_have_not_started():
+    async def main():
+        executor = RenderExecutor("thread", max_workers=1)
+        started = threading.Event()
+        release = threading.Event()
+        finished = []
+
+        def block():
+            started.set()
+            release.wait()
+            return "done"
+
+        running = asyncio.create_task(executor.run(block, on_finished=lambda: finished.append("running")))
+        await asyncio.to_thread(started.wait)
+        waiting = asyncio.create_task(executor.run(str, 1, on_finished=lambda: finished.append("waiting")))
+        await _until(lambda: executor.queue_depth == 1)
+
+        executor.shutdown(wait=False)
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        await _until(lambda: finished == ["waiting"])
+
+        # The running job is left to finish
+        release.set()
+        assert await running == "done"
+        await _until(lambda: executor.pending == 0)
+        assert finished == ["waiting", "running"]
+
+        # Nothing can be submitted once the pool is stopped
+        with pytest.raises(RuntimeError):
+            await executor.run(str, 1, on_finished=lambda: finished.append("late"))
+        assert finished[-1] == "late"
+
+    asyncio.run(main())
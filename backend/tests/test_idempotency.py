@@ -0,0 +1,100 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.idempotency import IdempotencyKeyConflictError, IdempotencyStore, request_fingerprint
+from app.main import app
+
+
+def test_fingerprint_ignores_key_order():
+    assert request_fingerprint("pdf", {"a": 1, "b": 2}) == request_fingerprint("pdf", {"b": 2, "a": 1})
+    assert request_fingerprint("pdf", {"a": 1}) != request_fingerprint("docx", {"a": 1})
+
+
+def test_concurrent_and_later_requests_share_one_result():
+    async def main():
+        store = IdempotencyStore()
+        calls = []
+
+        async def operation():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return b"document"
+
+        results = await asyncio.gather(*(store.run("generate", "key", "fp", operation) for _ in range(3)))
+        assert results == [(b"document", False), (b"document", True), (b"document", True)]
+        assert await store.run("generate", "key", "fp", operation) == (b"document", True)
+        assert len(calls) == 1
+        assert store.stats() == {"keys": 1, "bytes": len(b"document")}
+
+        # Keys are scoped per endpoint
+        assert await store.run("upload", "key", "fp", operation) == (b"document", False)
+
+    asyncio.run(main())
+
+
+def test_reusing_a_key_for_another_request_conflicts():
+    async def main():
+        store = IdempotencyStore()
+
+        async def operation():
+            return "result"
+
+        await store.run("generate", "key", "fp", operation)
+        with pytest.raises(IdempotencyKeyConflictError):
+            await store.run("generate", "key", "other", operation)
+
+    asyncio.run(main())
+
+
+def test_failures_are_not_stored():
+    async def main():
+        store = IdempotencyStore()
+        attempts = []
+
+        async def operation():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("storage unavailable")
+            return "result"
+
+        with pytest.raises(RuntimeError):
+            await store.run("generate", "key", "fp", operation)
+        assert await store.run("generate", "key", "fp", operation) == ("result", False)
+
+    asyncio.run(main())
+
+
+def test_results_expire_and_are_evicted():
+    async def main():
+        async def operation():
+            return b"x" * 10
+
+        store = IdempotencyStore(ttl=0)
+        await store.run("generate", "key", "fp", operation)
+        assert await store.run("generate", "key", "other", operation) == (b"x" * 10, False)
+
+        store = IdempotencyStore(max_bytes=15)
+        await store.run("generate", "a", "fp", operation)
+        await store.run("generate", "b", "fp", operation)
+        assert store.stats() == {"keys": 1, "bytes": 10}
+
+    asyncio.run(main())
+
+
+def test_generate_replays_responses():
+    url = "/api/v1/documents/generate?template_name=business_summary&document_type=pdf"
+    headers = {"Idempotency-Key": uuid.uuid4().hex}
+    with TestClient(app) as client:
+        first = client.post(url, json={"business_name": "Acme"}, headers=headers)
+        second = client.post(url, json={"business_name": "Acme"}, headers=headers)
+        conflict = client.post(url, json={"business_name": "Other"}, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert int(first.headers["content-length"]) == len(first.content)
+    assert "idempotent-replayed" not in first.headers
+    assert second.headers["idempotent-replayed"] == "true"
+    assert second.content == first.content
+    assert conflict.status_code == 422
@@ -0,0 +1,136 @@
+import asyncio
+import sqlite3
+import time
+import uuid
+
+import pytest
+
+from app.services.document.jobs import (
+    JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JobQueue, JobQueueFullError, JobStore
+)
+
+
+def test_store_lifecycle():
+    store = JobStore(":memory:")
+    job = store.create("pdf", "business_summary", {"business_name": "Acme"}, None)
+    assert store.get(job.id).status == JOB_QUEUED
+    assert store.get_data(job.id) == {"business_name": "Acme"}
+
+    store.mark_running(job.id)
+    assert store.get(job.id).status == JOB_RUNNING
+    store.mark_succeeded(job.id, {"render": 1.5}, content=b"%PDF", content_size=4)
+
+    finished = store.get(job.id)
+    assert (finished.status, finished.timings, finished.content_size) == (JOB_SUCCEEDED, {"render": 1.5}, 4)
+    assert store.get_content(job.id) == b"%PDF"
+    # The request data isn't kept once the job has finished
+    assert store.get_data(job.id) == {}
+
+    assert store.purge(time.time() + 1) == 1
+    assert store.get(job.id) is None
+    assert store.get("missing") is None
+
+
+def test_unfinished_jobs_are_queued_again(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(path)
+    queued = store.create("pdf", "a", {}, None)
+    running = store.create("pdf", "b", {}, None)
+    failed = store.create("pdf", "c", {}, None)
+    assert store.mark_running(running.id)
+    store.mark_failed(failed.id, "boom")
+    assert not store.mark_running(failed.id)
+
+    # A process sharing the database leaves the running job to its live owner
+    other = JobStore(path)
+    assert other.requeue_unfinished() == [queued.id]
+    assert other.get(running.id).status == JOB_RUNNING
+    assert not other.mark_running(running.id)
+
+    # Once the owner stops renewing its lease, the job is queued again
+    store.lease_seconds = 0
+    store.renew_leases()
+    time.sleep(0.01)
+    assert other.requeue_expired() == [running.id]
+    assert other.requeue_unfinished() == [queued.id, running.id]
+    assert other.mark_running(running.id)
+    assert other.get(failed.id).error == "boom"
+    store.close()
+    other.close()
+
+
+def test_released_jobs_are_queued_again():
+    store = JobStore(":memory:")
+    job = store.create("pdf", "a", {}, None)
+    assert store.mark_running(job.id)
+    assert store.requeue_unfinished() == []
+
+    assert store.release() == [job.id]
+    assert store.get(job.id).status == JOB_QUEUED
+    assert store.get(job.id).started_at is None
+
+
+def test_store_adds_lease_columns_to_an_old_database(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, document_type TEXT NOT NULL, "
+        "template_name TEXT NOT NULL, storage_path TEXT, data TEXT NOT NULL, created_at REAL NOT NULL, "
+        "started_at REAL, finished_at REAL, timings TEXT, file_url TEXT, content BLOB, content_size INTEGER, "
+        "error TEXT)"
+    )
+    connection.execute(
+        "INSERT INTO jobs (id, status, document_type, template_name, data, created_at, started_at) "
+        "VALUES ('old', ?, 'pdf', 'a', '{}', 1, 2)",
+        (JOB_RUNNING,)
+    )
+    connection.commit()
+    connection.close()
+
+    # Jobs running before leases existed have none, so they are queued again
+    store = JobStore(path)
+    assert store.requeue_unfinished() == ["old"]
+    assert store.mark_running("old")
+    store.close()
+
+
+async def _wait(queue: JobQueue, job_id: str):
+    for _ in range(500):
+        job = await queue.get(job_id)
+        if job.finished:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_queue_runs_jobs():
+    async def main():
+        queue = JobQueue(JobStore(":memory:"), workers=1)
+        try:
+            # Unique data, so the document isn't served from the output cache
+            job = await queue.submit("pdf", "business_summary", {"business_name": uuid.uuid4().hex})
+            finished = await _wait(queue, job.id)
+            assert finished.status == JOB_SUCCEEDED
+            assert {"queue", "render", "total"} <= finished.timings.keys()
+            assert (await queue.get_content(job.id)).startswith(b"%PDF")
+
+            job = await queue.submit("pdf", "missing_template", {})
+            finished = await _wait(queue, job.id)
+            assert finished.status == JOB_FAILED
+            assert "not found" in finished.error
+        finally:
+            await queue.stop()
+
+    asyncio.run(main())
+
+
+def test_full_queue_rejects_jobs():
+    async def main():
+        queue = JobQueue(JobStore(":memory:"), workers=1, max_queued=0)
+        try:
+            with pytest.raises(JobQueueFullError):
+                await queue.submit("pdf", "business_summary", {})
+        finally:
+            await queue.stop()
+
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.metrics import MetricsRegistry, _Metric
+from app.main import app
+
+
+def test_metric_must_define_its_samples():
+    class Incomplete(_Metric):
+        type_name = "gauge"
+
+    with pytest.raises(TypeError):
+        Incomplete("incomplete", "No samples")
+
+
+def test_render_escapes_label_values():
+    registry = MetricsRegistry()
+    errors = registry.counter("errors_total", "Errors", ("template",))
+    errors.inc(template='quote " backslash \\ newline \n end')
+
+    assert registry.render() == (
+        "# HELP errors_total Errors\n"
+        "# TYPE errors_total counter\n"
+        'errors_total{template="quote \\" backslash \\\\ newline \\n end"} 1\n'
+    )
+
+
+def test_collectors_run_before_each_render():
+    registry = MetricsRegistry()
+    hits = registry.counter("hits_total", "Hits", ("cache",))
+    ratio = registry.gauge("hit_ratio", "Hit ratio", ("cache",))
+    duration = registry.histogram("duration_seconds", "Duration", buckets=(0.1, 1.0))
+    source = {"hits": 3}
+
+    def collect():
+        # Totals kept elsewhere replace the counter's value rather than adding to it
+        hits.set_total(source["hits"], cache="template")
+        ratio.set(0.75, cache="template")
+
+    registry.add_collector(collect)
+    duration.observe(0.5)
+    duration.observe(2.0)
+
+    rendered = registry.render()
+    assert 'hits_total{cache="template"} 3\n' in rendered
+    assert 'hit_ratio{cache="template"} 0.75\n' in rendered
+    assert 'duration_seconds_bucket{le="0.1"} 0\n' in rendered
+    assert 'duration_seconds_bucket{le="1"} 1\n' in rendered
+    assert 'duration_seconds_bucket{le="+Inf"} 2\n' in rendered
+    assert "duration_seconds_sum 2.5\n" in rendered
+    assert "duration_seconds_count 2\n" in rendered
+
+    source["hits"] = 5
+    assert 'hits_total{cache="template"} 5\n' in registry.render()
+
+
+def test_labels_must_match():
+    registry = MetricsRegistry()
+    errors = registry.counter("errors_total", "Errors", ("template",))
+    with pytest.raises(ValueError):
+        errors.inc(document_type="pdf")
+    with pytest.raises(ValueError):
+        registry.gauge("errors_total", "Registered twice")
+
+
+def test_metrics_endpoint():
+    with TestClient(app) as client:
+        client.get("/api/v1/documents/templates", params={"document_type": "pdf"})
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'route="/api/v1/documents/templates"' in body
+    # The runtime collector copied the cache statistics into the registry
+    assert 'cache_hits_total{cache="template"}' in body
+    assert 'cache_entries{cache="output"}' in body
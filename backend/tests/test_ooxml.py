@@ -0,0 +1,130 @@
+import io
+import zipfile
+from pathlib import Path
+
+import pytest
+from docx import Document
+from lxml import etree
+from pptx import Presentation
+from pptx.util import Inches
+
+from app.core.config import settings
+from app.services.document.docx import DocxDocumentService
+from app.services.document.pptx import PptxDocumentService
+from app.services.document.template_cache import TemplateCache
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "data" / "templates"
+
+DATA = {
+    "business_name": "Acme & Co",
+    "tagline": "Tabs\tand\nnewlines",
+    "financials": [{"year": 2026 + i, "revenue": 1234567.891 * i, "margin": 0.125 * i - 0.1} for i in range(4)],
+    "competitors": [{"name": f"C{i}", "users": 1000 * i + 7} for i in range(3)],
+}
+
+
+@pytest.fixture
+def docx_templates(tmp_path):
+    document = Document()
+    paragraph = document.add_paragraph()
+    # A placeholder split across runs, as Word often saves them
+    paragraph.add_run("Plan for {{busi")
+    paragraph.add_run("ness_name}}: {{tagline}}")
+    table = document.add_table(rows=3, cols=3)
+    for row, texts in zip(table.rows, [
+        ["Year", "Revenue", "Margin"],
+        ["{{financials.year}}", "{{financials.revenue|currency}}", "{{financials.margin|percent}} at {{business_name}}"],
+        ["Total", "{{unknown}}", "{{business_name}}"],
+    ]):
+        for cell, text in zip(row.cells, texts):
+            cell.text = text
+    document.save(tmp_path / "rows.docx")
+    return tmp_path
+
+
+@pytest.fixture
+def pptx_templates(tmp_path):
+    presentation = Presentation()
+    slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+    slide.shapes.title.text = "{{business_name}}"
+    presentation.slides.add_slide(presentation.slide_layouts[6])
+    slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+    table = slide.shapes.add_table(3, 2, Inches(1), Inches(2), Inches(6), Inches(1.2)).table
+    for row, texts in enumerate([["Competitor", "Users"], ["{{competitors.name}}", "{{competitors.users|thousands}}"],
+                                 ["Us", "{{business_name}}"]]):
+        for column, text in enumerate(texts):
+            table.cell(row, column).text = text
+    presentation.save(tmp_path / "rows.pptx")
+    return tmp_path
+
+
+def _service(service_class, templates_path: Path):
+    service = service_class()
+    service.templates_path = templates_path
+    service.template_cache = TemplateCache(max_bytes=64 * 1024 * 1024)
+    return service
+
+
+def _render(service, template_name: str, fast: bool, monkeypatch) -> bytes:
+    monkeypatch.setattr(settings, "OOXML_FAST_PATH_ENABLED", fast)
+    output = io.BytesIO()
+    service.render_document(template_name, DATA, output_stream=output)
+    return output.getvalue()
+
+
+def _canonical_members(content: bytes):
+    members = {}
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        for name in archive.namelist():
+            member = archive.read(name)
+            if name.endswith((".xml", ".rels")):
+                member = etree.tostring(etree.fromstring(member), method="c14n")
+            members[name] = member
+    return members
+
+
+@pytest.mark.parametrize("service_class, templates, template_name", [
+    (DocxDocumentService, "docx_templates", "rows"),
+    (PptxDocumentService, "pptx_templates", "rows"),
+    (DocxDocumentService, None, "business_plan"),
+    (PptxDocumentService, None, "business_plan"),
+])
+def test_fast_path_matches_the_object_model(service_class, templates, template_name, request, monkeypatch):
+    if templates is None:
+        templates_path = TEMPLATES_DIR / service_class.document_type
+    else:
+        templates_path = request.getfixturevalue(templates)
+    service = _service(service_class, templates_path)
+
+    fast = _render(service, template_name, True, monkeypatch)
+    slow = _render(service, template_name, False, monkeypatch)
+    assert _canonical_members(fast) == _canonical_members(slow)
+
+
+def test_docx_fast_path_output(docx_templates, monkeypatch):
+    service = _service(DocxDocumentService, docx_templates)
+    document = Document(io.BytesIO(_render(service, "rows", True, monkeypatch)))
+
+    assert document.paragraphs[0].text == "Plan for Acme & Co: Tabs\tand\nnewlines"
+    rows = [[cell.text for cell in row.cells] for row in document.tables[0].rows]
+    assert rows == [
+        ["Year", "Revenue", "Margin"],
+        ["2026", "$0.00", "-10.0% at Acme & Co"],
+        ["2027", "$1,234,567.89", "2.5% at Acme & Co"],
+        ["2028", "$2,469,135.78", "15.0% at Acme & Co"],
+        ["2029", "$3,703,703.67", "27.5% at Acme & Co"],
+        ["Total", "{{unknown}}", "Acme & Co"],
+    ]
+
+
+def test_pptx_fast_path_output(pptx_templates, monkeypatch):
+    service = _service(PptxDocumentService, pptx_templates)
+    presentation = Presentation(io.BytesIO(_render(service, "rows", True, monkeypatch)))
+
+    slides = list(presentation.slides)
+    assert len(slides) == 3
+    assert slides[0].shapes.title.text == "Acme & Co"
+    table = next(shape for shape in slides[2].shapes if shape.has_table).table
+    assert [[cell.text for cell in row.cells] for row in table.rows] == [
+        ["Competitor", "Users"], ["C0", "7"], ["C1", "1,007"], ["C2", "2,007"], ["Us", "Acme & Co"]
+    ]
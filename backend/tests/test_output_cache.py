@@ -0,0 +1,37 @@
+from app.services.document.output_cache import OutputCache
+
+
+def test_keys_are_content_addressed():
+    key = OutputCache.make_key("digest", "pdf", {"a": 1, "b": [1, 2]})
+    assert key == OutputCache.make_key("digest", "pdf", {"b": [1, 2], "a": 1})
+    assert key != OutputCache.make_key("other", "pdf", {"a": 1, "b": [1, 2]})
+    assert key != OutputCache.make_key("digest", "docx", {"a": 1, "b": [1, 2]})
+    assert key != OutputCache.make_key("digest", "pdf", {"a": 2, "b": [1, 2]})
+
+
+def test_lru_eviction():
+    cache = OutputCache(max_bytes=10, max_urls=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"
+    cache.put("c", b"cccc")
+
+    # "b" was the least recently used entry
+    assert cache.get("b") is None
+    assert cache.get("c") == b"cccc"
+    cache.put("d", b"x" * 11)
+    assert cache.get("d") is None
+    assert cache.stats()["bytes"] == 8
+
+
+def test_upload_urls():
+    cache = OutputCache(max_bytes=10, max_urls=1)
+    cache.put_url("key", "LocalStorageService:plans/a.pdf", "file:///a.pdf")
+    assert cache.get_url("key", "LocalStorageService:plans/a.pdf") == "file:///a.pdf"
+    # Different output at the same path must be uploaded again
+    assert cache.get_url("other", "LocalStorageService:plans/a.pdf") is None
+
+    cache.put_url("key", "LocalStorageService:plans/b.pdf", "file:///b.pdf")
+    assert cache.get_url("key", "LocalStorageService:plans/a.pdf") is None
+    cache.forget_url("LocalStorageService:plans/b.pdf")
+    assert cache.get_url("key", "LocalStorageService:plans/b.pdf") is None
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import types
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services.document import get_document_service, pdf
+from app.services.document.pdf import PdfDocumentService, RendererUnavailableError, _compile_html_template
+
+HTML_TEMPLATE = (
+    b"<html><head><style>p { color: red }</style></head><body>"
+    b"<p>{{ business_name }}</p>{% for competitor in competitors %}<p>{{ competitor.name }}</p>{% endfor %}"
+    b"</body></html>"
+)
+
+
+@pytest.fixture
+def service(tmp_path):
+    (tmp_path / "summary.json").write_text('{"sections": [{"type": "title", "content": "{{business_name}}"}]}')
+    (tmp_path / "summary.html").write_bytes(HTML_TEMPLATE)
+    service = PdfDocumentService()
+    service.templates_path = tmp_path
+    return service
+
+
+def test_html_templates_are_opt_in(service, monkeypatch):
+    monkeypatch.setattr(settings, "PDF_HTML_TEMPLATES_ENABLED", False)
+    monkeypatch.setattr(pdf, "HTML", object())
+    assert service._get_template_path("summary").suffix == ".json"
+    assert [path.name for path in service._list_template_files()] == ["summary.json"]
+
+
+def test_enabled_html_templates_take_precedence(service, monkeypatch):
+    monkeypatch.setattr(settings, "PDF_HTML_TEMPLATES_ENABLED", True)
+    monkeypatch.setattr(pdf, "HTML", object())
+    assert service._get_template_path("summary").suffix == ".html"
+
+    # Without WeasyPrint the template fails rather than silently switching engines
+    monkeypatch.setattr(pdf, "HTML", None)
+    with pytest.raises(RendererUnavailableError):
+        service._get_template_path("summary")
+
+
+def test_html_templates_without_weasyprint_are_unavailable(service, monkeypatch):
+    monkeypatch.setattr(settings, "PDF_HTML_TEMPLATES_ENABLED", True)
+    monkeypatch.setattr(pdf, "HTML", None)
+    monkeypatch.setattr(get_document_service("pdf"), "templates_path", service.templates_path)
+
+    with TestClient(app) as client:
+        info = client.get("/api/v1/documents/templates/summary/info", params={"document_type": "pdf"})
+        generate = client.post(
+            "/api/v1/documents/generate",
+            params={"template_name": "summary", "document_type": "pdf"},
+            json={"business_name": "Acme"}
+        )
+
+    assert info.status_code == generate.status_code == 503
+    assert "WeasyPrint" in generate.json()["detail"]
+
+
+def test_html_template_keeps_its_styles():
+    template = _compile_html_template(HTML_TEMPLATE)
+    assert template.index.placeholders == frozenset({"business_name", "competitors"})
+
+    markup = template.template.render({"business_name": "<A&B>", "competitors": [{"name": "C0"}]})
+    assert "<style>p { color: red }</style>" in markup
+    assert "<p>&lt;A&amp;B&gt;</p><p>C0</p>" in markup
+
+
+def test_cached_html_template_is_not_parsed_again(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PDF_HTML_BYTECODE_CACHE_PATH", str(tmp_path))
+    monkeypatch.setattr(pdf, "_bytecode_cache", None)
+    monkeypatch.setattr(pdf, "_bytecode_cache_checked", False)
+    first = _compile_html_template(HTML_TEMPLATE)
+
+    def parse(*args, **kwargs):
+        raise AssertionError("template was parsed again")
+
+    # A restarted worker finds the code and the variables in the bytecode cache
+    monkeypatch.setattr(pdf._html_environment, "parse", parse)
+    second = _compile_html_template(HTML_TEMPLATE)
+    assert second.index.placeholders == first.index.placeholders == frozenset({"business_name", "competitors"})
+    assert second.template.render({"business_name": "Acme"}) == first.template.render({"business_name": "Acme"})
+
+    # The bytecode cache only holds code; the variables are kept beside it
+    markup = HTML_TEMPLATE.decode("utf-8")
+    name = hashlib.sha256(HTML_TEMPLATE).hexdigest()
+    bucket = pdf._bytecode_cache.get_bucket(pdf._html_environment, name, None, markup)
+    assert isinstance(bucket.code, types.CodeType)
+    [variables_file] = tmp_path.glob("pdf-html-*.variables.json")
+    assert json.loads(variables_file.read_text()) == ["business_name", "competitors"]
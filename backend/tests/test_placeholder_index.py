@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+from docx import Document
+from pptx import Presentation
+
+from app.services.document.docx import DocxDocumentService
+from app.services.document.pdf import PdfDocumentService
+from app.services.document.pptx import PptxDocumentService
+from app.services.document.template_cache import TemplateCache
+
+
+def _service(service_class, templates_path):
+    service = service_class()
+    service.templates_path = templates_path
+    service.template_cache = TemplateCache(max_bytes=64 * 1024 * 1024)
+    return service
+
+
+def test_docx_index(tmp_path):
+    document = Document()
+    document.add_paragraph("No placeholders")
+    document.add_paragraph("Plan for {{business_name}}")
+    table = document.add_table(rows=2, cols=2)
+    table.cell(0, 0).text = "{{tagline}}"
+    table.cell(1, 0).text = "{{competitors.name}}"
+    table.cell(1, 1).text = "{{competitors.users|thousands}}"
+    document.save(tmp_path / "plan.docx")
+
+    service = _service(DocxDocumentService, tmp_path)
+    index = service._get_placeholder_index(service._get_template_path("plan"))
+    assert index.placeholders == frozenset({"business_name", "tagline"})
+    assert len(index.locations) == 4
+    assert index.nodes_scanned == 6
+    [row_template] = index.row_templates
+    assert row_template.list_name == "competitors"
+    assert row_template.keys == frozenset({"competitors.name", "competitors.users|thousands"})
+
+    # The index is built once per template version
+    assert service._get_placeholder_index(service._get_template_path("plan")) is index
+
+    schema = asyncio.run(service.get_template_schema("plan"))
+    assert schema["required"] == ["business_name", "tagline", "competitors"]
+    assert schema["properties"]["competitors"]["items"]["properties"] == {
+        "name": {"type": "string"}, "users": {"type": "number"}
+    }
+
+
+def test_pptx_index(tmp_path):
+    presentation = Presentation()
+    slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+    slide.shapes.title.text = "{{business_name}}"
+    presentation.slides.add_slide(presentation.slide_layouts[6])
+    presentation.save(tmp_path / "deck.pptx")
+
+    service = _service(PptxDocumentService, tmp_path)
+    index = service._get_placeholder_index(service._get_template_path("deck"))
+    assert index.placeholders == frozenset({"business_name"})
+    assert len(index.locations) == 1
+
+
+def test_pdf_index(tmp_path):
+    (tmp_path / "summary.json").write_text(json.dumps({"sections": [
+        {"type": "title", "content": "{{business_name}}"},
+        {"type": "paragraph", "content": "Static text"},
+        {"type": "table", "header": ["Metric", "{{year}}"], "rows": [["Revenue", "{{revenue}}"]]},
+    ]}))
+
+    service = _service(PdfDocumentService, tmp_path)
+    index = service._get_placeholder_index(service._get_template_path("summary"))
+    assert index.placeholders == frozenset({"business_name", "year", "revenue"})
+    assert index.locations == ((0, "content"), (2, "header", 1), (2, "rows", 0, 1))
+    assert index.nodes_scanned == 6
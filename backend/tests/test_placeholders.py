@@ -0,0 +1,27 @@
+from app.services.document.placeholders import PlaceholderSubstituter, find_placeholders, has_placeholders, substitute
+
+
+def test_find_placeholders():
+    assert find_placeholders("{{ business_name }} - {{tagline}} {{business_name}}") == {"business_name", "tagline"}
+    assert find_placeholders("no placeholders {here}") == set()
+    assert find_placeholders("") == set()
+
+
+def test_has_placeholders():
+    assert has_placeholders("a {{b}}")
+    assert not has_placeholders("a {{b")
+    assert not has_placeholders(None)
+
+
+def test_substitute():
+    data = {"business_name": "Acme", "year": 2026, "empty": ""}
+    assert substitute("{{business_name}} ({{ year }}){{empty}}", data) == "Acme (2026)"
+    # Unknown placeholders are left as they are
+    assert substitute("{{business_name}} {{unknown}}", data) == "Acme {{unknown}}"
+
+
+def test_substituter_is_single_pass():
+    # Values containing placeholders are not substituted again
+    substituter = PlaceholderSubstituter({"a": "{{b}}", "b": "x"})
+    assert substituter.substitute("{{a}} {{b}}") == "{{b}} x"
+    assert substituter("{{a}}") == "{{b}}"
@@ -0,0 +1,60 @@
+import math
+
+import pytest
+
+from app.services.document.placeholders import PlaceholderSubstituter
+from app.services.document.row_templates import RowBinder, find_row_list, format_numbers, parse_row_key
+
+
+def test_parse_row_key():
+    assert parse_row_key("financials.revenue|currency") == ("financials", "revenue", "currency")
+    assert parse_row_key("competitors.name") == ("competitors", "name", None)
+    assert parse_row_key("business_name") is None
+    assert parse_row_key("financials.revenue|roman") is None
+
+
+def test_find_row_list():
+    assert find_row_list({"business_name", "competitors.name", "competitors.users|thousands"}) == "competitors"
+    assert find_row_list({"business_name"}) is None
+
+
+@pytest.mark.parametrize("number_format, values, expected", [
+    ("currency", [1234.5, 0, 1234567.891], ["$1,234.50", "$0.00", "$1,234,567.89"]),
+    ("percent", [0.125, 1, -0.5], ["12.5%", "100.0%", "-50.0%"]),
+    ("thousands", [999.5, 1000, 12345678], ["1,000", "1,000", "12,345,678"]),
+])
+def test_format_numbers(number_format, values, expected):
+    assert format_numbers(values, number_format) == expected
+
+
+def test_format_numbers_negative():
+    assert format_numbers([-1234.5, -0.001], "currency") == ["-$1,234.50", "$0.00"]
+    assert format_numbers([-1e19], "thousands") == ["-10,000,000,000,000,000,000"]
+
+
+def test_format_numbers_beyond_int64():
+    assert format_numbers([1e17], "currency") == ["$100,000,000,000,000,000.00"]
+    assert format_numbers([1e19, 5], "thousands") == ["10,000,000,000,000,000,000", "5"]
+    assert format_numbers([1e17], "percent") == ["10,000,000,000,000,000,000.0%"]
+    assert format_numbers([1e300], "thousands")[0].startswith("1,000,000,000")
+
+
+def test_format_numbers_not_numbers():
+    values = [math.nan, None, "n/a", True, False, 2]
+    assert format_numbers(values, "thousands") == ["nan", "", "n/a", "True", "False", "2"]
+    assert format_numbers([True, 2], "currency") == ["True", "$2.00"]
+    assert format_numbers([], "currency") == []
+
+
+def test_row_binder():
+    items = [{"name": "C0", "users": 7}, {"name": "C1", "users": 1007}, "not a dict"]
+    keys = {"competitors.name", "competitors.users|thousands"}
+    binder = RowBinder(items, keys, PlaceholderSubstituter({"business_name": "Acme"}))
+
+    assert binder.count == 3
+    text = "{{competitors.name}}: {{competitors.users|thousands}} vs {{business_name}}"
+    assert [binder.substituter(i).substitute(text) for i in range(3)] == [
+        "C0: 7 vs Acme",
+        "C1: 1,007 vs Acme",
+        ":  vs Acme",
+    ]
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.document.executor import RenderExecutor, RenderTimeoutError
+from app.services.document.scheduler import PRIORITY_BATCH, PRIORITY_INTERACTIVE, RenderScheduler, use_priority
+
+
+async def _start(scheduler, started, document_type, template_name, priority, release):
+    async with scheduler.slot(document_type, template_name, priority) as render_slot:
+        started.append((document_type, template_name, render_slot.priority))
+        await release.wait()
+
+
+def test_type_and_template_caps():
+    async def main():
+        scheduler = RenderScheduler(4, type_limits={"pptx": 2}, template_limits={"big": 1})
+        started, release = [], asyncio.Event()
+        tasks = [asyncio.create_task(_start(scheduler, started, "pptx", "big", None, release)) for _ in range(2)]
+        tasks += [asyncio.create_task(_start(scheduler, started, "pptx", "deck", None, release)) for _ in range(2)]
+        tasks += [asyncio.create_task(_start(scheduler, started, "pdf", "summary", None, release))]
+        await asyncio.sleep(0.01)
+
+        # One "big" render, one "deck" render (pptx cap) and the pdf render run
+        assert sorted(started) == [("pdf", "summary", "interactive"), ("pptx", "big", "interactive"),
+                                   ("pptx", "deck", "interactive")]
+        assert scheduler.running_by_type() == {"pptx": 2, "pdf": 1}
+        assert scheduler.waiting() == {PRIORITY_INTERACTIVE: 2, PRIORITY_BATCH: 0}
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert len(started) == 5
+        assert scheduler.running == 0
+
+    asyncio.run(main())
+
+
+def test_interactive_renders_go_first():
+    async def main():
+        scheduler = RenderScheduler(2, interactive_reserved=1)
+        started, release = [], asyncio.Event()
+        tasks = [asyncio.create_task(_start(scheduler, started, "pdf", "a", PRIORITY_BATCH, release)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        # Batch renders can't take the reserved slot
+        assert len(started) == 1
+
+        tasks.append(asyncio.create_task(_start(scheduler, started, "pdf", "b", PRIORITY_INTERACTIVE, release)))
+        tasks.append(asyncio.create_task(_start(scheduler, started, "pdf", "c", PRIORITY_INTERACTIVE, release)))
+        await asyncio.sleep(0.01)
+        assert [template for _, template, _ in started] == ["a", "b"]
+
+        release.set()
+        await asyncio.gather(*tasks)
+        # The waiting interactive render started before the older batch renders
+        assert [template for _, template, _ in started] == ["a", "b", "c", "a", "a"]
+
+    asyncio.run(main())
+
+
+def test_priority_from_context():
+    async def main():
+        scheduler = RenderScheduler(2)
+        with use_priority(PRIORITY_BATCH):
+            async with scheduler.slot("pdf", "a") as render_slot:
+                assert render_slot.priority == PRIORITY_BATCH
+        with pytest.raises(ValueError):
+            with use_priority("urgent"):
+                pass
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def main():
+        scheduler = RenderScheduler(1)
+        started, release = [], asyncio.Event()
+        running = asyncio.create_task(_start(scheduler, started, "pdf", "a", None, release))
+        waiting = asyncio.create_task(_start(scheduler, started, "pdf", "b", None, release))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        await asyncio.sleep(0.01)
+        assert scheduler.waiting()[PRIORITY_INTERACTIVE] == 0
+
+        release.set()
+        await running
+        assert scheduler.running == 0
+        assert [template for _, template, _ in started] == ["a"]
+
+    asyncio.run(main())
+
+
+def test_timed_out_render_keeps_its_slot():
+    async def main():
+        scheduler = RenderScheduler(1)
+        executor = RenderExecutor("thread", max_workers=1, timeout=0.05)
+        unblock = threading.Event()
+        try:
+            async with scheduler.slot("pdf", "slow") as render_slot:
+                with pytest.raises(RenderTimeoutError):
+                    await executor.run(unblock.wait, on_finished=render_slot.detach())
+
+            # The job still occupies the worker, so the slot is still taken
+            assert scheduler.running == 1
+            assert executor.pending == 1
+
+            unblock.set()
+            for _ in range(100):
+                if not scheduler.running:
+                    break
+                await asyncio.sleep(0.01)
+            assert scheduler.running == 0
+            assert executor.pending == 0
+        finally:
+            unblock.set()
+            executor.shutdown()
+
+    asyncio.run(main())
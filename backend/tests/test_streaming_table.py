@@ -0,0 +1,104 @@
+from io import BytesIO
+
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Table
+
+from app.services.document.pdf import STYLES, StreamingTable, _data_table_factory, _table_rows
+
+
+def _header():
+    return [Paragraph("Name", STYLES["Heading3"]), Paragraph("Users", STYLES["Heading3"])]
+
+
+def _rows(count):
+    # Later rows are wider, so columns sized per chunk would not line up
+    return [[f"Competitor {i}" + "x" * (i // 100), str(i * 1000)] for i in range(count)]
+
+
+def _build(flowables):
+    """Build a document, returning its content and page count."""
+    output = BytesIO()
+    document = SimpleDocTemplate(output, pagesize=letter)
+    document.build(flowables)
+    return output.getvalue(), document.page
+
+
+def _record_tables(monkeypatch):
+    tables = []
+    make_table = StreamingTable._make_table
+
+    def record(self, rows):
+        table = make_table(self, rows)
+        tables.append(table)
+        return table
+
+    monkeypatch.setattr(StreamingTable, "_make_table", record)
+    return tables
+
+
+def test_rows_are_split_across_frames(monkeypatch):
+    tables = _record_tables(monkeypatch)
+    header = _header()
+    rows = _rows(500)
+
+    _, pages = _build([StreamingTable(header, iter(rows), chunk_rows=50)])
+    assert pages > 1
+
+    # Every row is drawn once, in order, in chunks of at most chunk_rows
+    body = [row for table in tables for row in table._cellvalues[1:]]
+    assert body == rows
+    assert len(tables) >= 10
+    assert all(len(table._cellvalues) - 1 <= 50 for table in tables)
+
+    # Each chunk repeats the header and uses the first chunk's column widths
+    assert all([list(cell) for cell in table._cellvalues[0]] == [[header[0]], [header[1]]] for table in tables)
+    assert all(table.repeatRows == 1 for table in tables)
+    assert len({tuple(table._colWidths) for table in tables}) == 1
+
+
+def test_rows_without_header(monkeypatch):
+    tables = _record_tables(monkeypatch)
+    rows = _rows(120)
+
+    _build([StreamingTable(None, iter(rows), chunk_rows=50)])
+    assert [row for table in tables for row in table._cellvalues] == rows
+    assert all(table.repeatRows == 0 for table in tables)
+
+
+def test_row_taller_than_the_frame_waits_for_the_next_one():
+    table = StreamingTable(_header(), iter(_rows(20)), chunk_rows=10)
+
+    # Before any row was measured, a frame too small for the chunk is refused
+    assert table.split(400, 5) == []
+
+    chunk, rest = table.split(400, 1000)
+    assert isinstance(chunk, Table) and rest is table
+    assert len(chunk._cellvalues) == 11
+
+    # Once rows were measured, a frame without room for one row is refused
+    # and the rows are kept for the next frame
+    assert table.split(400, table._header_height + table._row_height / 2) == []
+    chunk, rest = table.split(400, 1000)
+    assert [row[1] for row in chunk._cellvalues[1:]] == [str(i * 1000) for i in range(10, 20)]
+
+    # All rows were consumed
+    assert table.wrap(400, 1000) == (0, 0)
+    assert table.split(400, 1000) == []
+
+
+def test_empty_rows_from_draws_nothing(monkeypatch):
+    tables = _record_tables(monkeypatch)
+    build = _data_table_factory(None, "competitors", ["name", "users"], 50)
+
+    for data in ({"competitors": []}, {"competitors": None}, {}):
+        table = build(lambda text: text, data)
+        assert table.wrap(400, 1000) == (0, 0)
+        assert table.split(400, 1000) == []
+        pdf, pages = _build([Paragraph("Competitors", STYLES["Normal"]), table])
+        assert pdf.startswith(b"%PDF") and pages == 1
+    assert tables == []
+
+
+def test_table_rows_pick_columns_from_mappings():
+    rows = [{"users": 5, "name": "Acme", "extra": 1}, ["Beta", None]]
+    assert list(_table_rows(rows, ["name", "users"])) == [["Acme", "5"], ["Beta", ""]]
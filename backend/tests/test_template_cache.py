@@ -0,0 +1,69 @@
+import os
+
+from app.services.document.template_cache import TemplateCache
+
+
+def _write(path, content: bytes, mtime_ns: int):
+    path.write_bytes(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_hits_and_reload_on_change(tmp_path):
+    path = tmp_path / "template.bin"
+    _write(path, b"version 1", 1_000_000_000)
+    cache = TemplateCache(max_bytes=1024)
+
+    assert cache.get_bytes(path) == b"version 1"
+    assert cache.open(path).read() == b"version 1"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    digest = cache.get_digest(path)
+    _write(path, b"version 2", 2_000_000_000)
+    assert cache.get_bytes(path) == b"version 2"
+    assert cache.get_digest(path) != digest
+    assert cache.stats()["entries"] == 1
+
+
+def test_derived_objects_follow_the_template(tmp_path):
+    path = tmp_path / "template.bin"
+    _write(path, b"abc", 1_000_000_000)
+    cache = TemplateCache(max_bytes=1024)
+    builds = []
+
+    def build(content):
+        builds.append(content)
+        return content.upper()
+
+    assert cache.get_derived(path, "upper", build) == b"ABC"
+    stream, derived = cache.open_with_derived(path, "upper", build)
+    assert (stream.read(), derived) == (b"abc", b"ABC")
+    assert builds == [b"abc"]
+
+    _write(path, b"xyz", 2_000_000_000)
+    assert cache.get_derived(path, "upper", build) == b"XYZ"
+    assert builds == [b"abc", b"xyz"]
+
+
+def test_eviction_and_invalidation(tmp_path):
+    cache = TemplateCache(max_bytes=10)
+    paths = []
+    for name in ("a", "b", "c"):
+        path = tmp_path / name
+        _write(path, name.encode() * 4, 1_000_000_000)
+        paths.append(path)
+        cache.get_bytes(path)
+
+    # Only the two most recently used templates fit in the budget
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["bytes"] == 8
+
+    cache.invalidate(paths[2])
+    assert cache.stats()["entries"] == 1
+    cache.invalidate()
+    assert cache.stats() == {"entries": 0, "bytes": 0, "max_bytes": 10, "hits": 0, "misses": 3}
+
+    # Templates beyond the budget are served without being cached
+    big = tmp_path / "big"
+    _write(big, b"x" * 20, 1_000_000_000)
+    assert cache.get_bytes(big) == b"x" * 20
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,52 @@
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.core.timing import LapTimer, StageTimer, record_stages, stage, use_timer
+from app.main import app
+
+
+def _stages(header):
+    return [metric.split(";")[0] for metric in header.split(", ")]
+
+
+def test_stages_are_recorded_into_the_current_timer():
+    # Outside a request, instrumented code runs without recording anything
+    with stage("render"):
+        pass
+    LapTimer().lap("layout")
+
+    with use_timer(StageTimer()) as timer:
+        laps = LapTimer()
+        with stage("render"):
+            laps.lap("layout")
+        with stage("render"):
+            laps.lap("build")
+        record_stages({"build": 2.0, "upload": 1.0})
+
+    assert list(timer.durations) == ["layout", "render", "build", "upload"]
+    assert timer.durations["build"] >= 2.0
+    assert _stages(timer.header_value()) == ["layout", "render", "build", "upload", "total"]
+
+
+def test_generate_reports_its_stages():
+    with TestClient(app) as client:
+        # Unique data, so the document isn't served from the output cache
+        response = client.post(
+            "/api/v1/documents/generate",
+            params={"template_name": "business_summary", "document_type": "pdf"},
+            json={"business_name": uuid.uuid4().hex}
+        )
+
+    assert response.status_code == 200
+    stages = _stages(response.headers["server-timing"])
+    assert {"template", "render", "total"} <= set(stages)
+    assert stages[-1] == "total"
+
+
+def test_requests_without_stages_get_no_header():
+    with TestClient(app) as client:
+        for path in ("/health", "/metrics"):
+            response = client.get(path)
+            assert response.status_code == 200
+            assert "server-timing" not in response.headers
@@ -0,0 +1,48 @@
+import shutil
+import time
+from pathlib import Path
+
+import pytest
+
+from app.services.document.pdf import PdfDocumentService
+from app.services.document.template_cache import TemplateCache
+from app.services.document.watcher import TemplateWatcher
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "data" / "templates"
+
+
+@pytest.fixture
+def service(tmp_path):
+    shutil.copy(TEMPLATES_DIR / "pdf" / "business_summary.json", tmp_path / "summary.json")
+    service = PdfDocumentService()
+    service.templates_path = tmp_path
+    service.template_cache = TemplateCache(max_bytes=1024 * 1024)
+    return service
+
+
+def test_sync_warms_and_drops_templates(service, tmp_path):
+    watcher = TemplateWatcher([service])
+    watcher.sync()
+    assert service.template_cache.stats()["entries"] == 1
+
+    # Rendering finds the template and its plan in the cache
+    misses = service.template_cache.misses
+    service._get_placeholder_index(service._get_template_path("summary"))
+    assert service.template_cache.misses == misses
+
+    (tmp_path / "summary.json").unlink()
+    watcher.sync()
+    assert service.template_cache.stats()["entries"] == 0
+
+
+def test_watcher_picks_up_new_templates(service, tmp_path):
+    watcher = TemplateWatcher([service], poll_interval=0.05, debounce=0.01)
+    watcher.start()
+    try:
+        shutil.copy(tmp_path / "summary.json", tmp_path / "copy.json")
+        deadline = time.monotonic() + 10
+        while service.template_cache.stats()["entries"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert service.template_cache.stats()["entries"] == 2
+    finally:
+        watcher.stop()
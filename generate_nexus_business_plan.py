@@ -8,7 +8,7 @@ from datetime import datetime
 # Add the backend directory to the Python path
 sys.path.insert(0, str(Path(__file__).parent / "backend"))
 
-from app.services.document import get_document_service
+from app.services.document.bundle import BundleItem, generate_bundle
 from app.services.storage import get_storage_service
 from app.services.storage.onedrive import OneDriveStorageService
 
@@ -83,53 +83,35 @@ async def generate_business_plan_materials():
     output_dir = Path("output/nexus_business_plan")
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    # Generate PowerPoint presentation
-    print("Generating PowerPoint presentation...")
-    pptx_service = get_document_service('pptx')
+    # Generate the PowerPoint presentation and PDF overview together;
+    # both render and upload in parallel from the same data
+    print("Generating PowerPoint presentation and PDF business overview...")
+    date_stamp = datetime.now().strftime('%Y%m%d')
+    pptx_output_path = output_dir / "nexus_concept_presentation.pptx"
+    pdf_output_path = output_dir / "nexus_business_overview.pdf"
+    onedrive_pptx_path = f"presentations/nexus_business_plan_{date_stamp}.pptx"
+    onedrive_pdf_path = f"documents/nexus_business_plan_{date_stamp}.pdf"
     
     try:
-        pptx_output_path = output_dir / "nexus_concept_presentation.pptx"
-        pptx_result = await pptx_service.generate_document(
-            template_name="nexus_concept_enhanced",
-            data=data,
-            output_path=str(pptx_output_path)
+        results = await generate_bundle(
+            [
+                BundleItem("pptx", "nexus_concept_enhanced", onedrive_pptx_path),
+                BundleItem("pdf", "nexus_solutions", onedrive_pdf_path),
+            ],
+            data,
+            storage_service
         )
-        print(f"PowerPoint presentation generated successfully: {pptx_result}")
         
-        # Upload to OneDrive
-        onedrive_pptx_path = f"presentations/nexus_business_plan_{datetime.now().strftime('%Y%m%d')}.pptx"
-        print(f"Uploading to OneDrive at path: {onedrive_pptx_path}")
-        pptx_url = await storage_service.upload_file(pptx_result, onedrive_pptx_path)
-        print(f"PowerPoint presentation uploaded successfully!")
-        print(f"Access URL: {pptx_url}")
+        for result, local_path in zip(results, [pptx_output_path, pdf_output_path]):
+            if result.error:
+                print(f"Error generating {result.filename}: {result.error}")
+                continue
+            local_path.write_bytes(result.content)
+            print(f"{result.filename} generated in {result.render_ms:.0f} ms: {local_path}")
+            print(f"Uploaded to {result.item.storage_path} in {result.upload_ms:.0f} ms")
+            print(f"Access URL: {result.file_url}")
     except Exception as e:
-        print(f"Error generating PowerPoint presentation: {e}")
-        import traceback
-        traceback.print_exc()
-    
-    print()
-    
-    # Generate PDF document
-    print("Generating PDF business overview...")
-    pdf_service = get_document_service('pdf')
-    
-    try:
-        pdf_output_path = output_dir / "nexus_business_overview.pdf"
-        pdf_result = await pdf_service.generate_document(
-            template_name="nexus_solutions",
-            data=data, 
-            output_path=str(pdf_output_path)
-        )
-        print(f"PDF generated successfully: {pdf_result}")
-        
-        # Upload to OneDrive
-        onedrive_pdf_path = f"documents/nexus_business_plan_{datetime.now().strftime('%Y%m%d')}.pdf"
-        print(f"Uploading to OneDrive at path: {onedrive_pdf_path}")
-        pdf_url = await storage_service.upload_file(pdf_result, onedrive_pdf_path)
-        print(f"PDF uploaded successfully!")
-        print(f"Access URL: {pdf_url}")
-    except Exception as e:
-        print(f"Error generating PDF: {e}")
+        print(f"Error generating business plan materials: {e}")
         import traceback
         traceback.print_exc()
     